@@ -1,5 +1,6 @@
 from .general_database import Database
 from .multi_frame_database import MultiFrameDatabase
 from .database_components import *
+from .source_router import DataSource, SourceRouter
 from .singleton import Singleton
 from .info import *
\ No newline at end of file
@@ -0,0 +1,3 @@
+"""
+Offline benchmarks for the database. Run a module with ``python -m <package>.benchmarks.<module>``.
+"""
@@ -0,0 +1,74 @@
+"""
+Compares the vectorized business-day forward fill with the loop it replaced.
+
+Usage: python -m <package>.benchmarks.alignment
+"""
+import time
+from datetime import timedelta
+import numpy as np
+import pandas as pd
+from ..database_components import DatabaseComponents
+
+
+def legacy_alignment(series, name, open_date, close_date):
+    """
+    The per-day loop previously used by _fetch_CDI, _fetch_PIB_BR and _fetch_sgs.
+    """
+    df = series.to_frame(name)
+    raw_date_range = pd.date_range(
+        start=open_date, end=close_date+timedelta(days=1))
+    date_range = [date for date in raw_date_range if date.weekday() < 5]
+    values = []
+    dates_to_add = []
+    for date in date_range:
+        try:
+            values.append(df[[name]].loc[:date].values[-1][-1])
+            dates_to_add.append(date)
+        except:
+            pass
+    df = pd.DataFrame({name: values}, index=dates_to_add)
+    return df.loc[open_date:close_date]
+
+
+def synthetic_series(open_date, close_date, freq):
+    """
+    Builds a random series observed at the given frequency.
+    """
+    index = pd.date_range(open_date, close_date, freq=freq)
+    values = np.random.default_rng(0).random(len(index))
+    return pd.Series(values, index=index)
+
+
+def run(open_date='1990-01-01', close_date='2024-12-31'):
+    """
+    Times both implementations on a daily and a monthly multi-decade series.
+
+    Returns
+    -------
+    list of dict
+        One entry per series with the timings and the speedup.
+    """
+    open_date = pd.to_datetime(open_date)
+    close_date = pd.to_datetime(close_date)
+    components = DatabaseComponents()
+    results = []
+    for label, freq in [('daily (SELIC-like)', 'B'), ('monthly (IPCA-like)', 'MS')]:
+        series = synthetic_series(open_date, close_date, freq)
+        start = time.perf_counter()
+        legacy = legacy_alignment(series, 'X_close', open_date, close_date)
+        legacy_time = time.perf_counter() - start
+        start = time.perf_counter()
+        vectorized = components._align_to_business_days(
+            series, 'X_close', open_date, close_date)
+        vectorized_time = time.perf_counter() - start
+        pd.testing.assert_frame_equal(legacy, vectorized, check_freq=False)
+        results.append({'series': label, 'observations': len(series),
+                        'legacy_s': legacy_time, 'vectorized_s': vectorized_time,
+                        'speedup': legacy_time / vectorized_time})
+    return results
+
+
+if __name__ == '__main__':
+    for result in run():
+        print("{series}: {observations} observations, legacy {legacy_s:.3f}s, "
+              "vectorized {vectorized_s:.5f}s, {speedup:.0f}x faster".format(**result))
@@ -0,0 +1,347 @@
+"""
+Offline backends that stand in for Yahoo Finance, BRAPI and the Brazilian Central Bank.
+
+A backend answers the ``yf.download`` calls and the HTTP GET requests of the databases.
+FakeBackend generates deterministic synthetic data, LiveBackend calls the real services
+and ReplayBackend serves responses recorded from another backend. They are installed
+with ``patched``.
+"""
+import os
+import json
+import time
+import hashlib
+import zlib
+import functools
+from contextlib import contextmanager
+from urllib.parse import urlparse, parse_qs
+import numpy as np
+import pandas as pd
+import yfinance as yf
+from ..database_components import DatabaseComponents
+from ..http_session import HttpSession
+from ..info import BRAPI_RANGES
+
+# SGS codes published every business day. The others are monthly.
+DAILY_SGS_CODES = {11, 12, 1}
+
+DAILY_INTERVALS = {'1d', '5d', '1wk', '1mo', '3mo'}
+
+
+def _seed(name):
+    return zlib.crc32(str(name).encode())
+
+
+@functools.lru_cache(maxsize=None)
+def _candle_history(symbol, interval):
+    """
+    Generates the full history of a symbol once, from 1950 for daily candles and for the
+    last 60 days for intraday ones.
+    """
+    close_date = pd.Timestamp.today().normalize() + pd.Timedelta(days=11)
+    if interval in DAILY_INTERVALS:
+        index = pd.bdate_range('1950-01-01', close_date)
+    else:
+        minutes = {'1h': 60, '90m': 90}.get(interval, int(interval.rstrip('m')))
+        index = pd.date_range(close_date - pd.Timedelta(days=71), close_date,
+                              freq=f'{minutes}min')
+        index = index[(index.weekday < 5) & (index.hour >= 10) & (index.hour < 17)]
+    seed = _seed(symbol)
+    phase = (index.asi8 // 10**9 // 60 + seed) % 100003
+    close = 20 + 10 * np.sin(phase / 5000.0 + seed % 7) + (seed % 13)
+    spread = 0.01 * close
+    volume = (phase * 7919 + seed) % 1000000 + 1000
+    return pd.DataFrame({'Open': close - spread / 2, 'High': close + spread, 'Low': close - spread,
+                         'Close': close, 'Adj Close': close, 'Volume': volume.astype('int64')},
+                        index=pd.DatetimeIndex(index, name='Date'))
+
+
+def synthetic_candles(symbol, open_date, close_date, interval='1d'):
+    """
+    Returns deterministic OHLCV candles for a symbol, in the layout of yf.download.
+
+    Daily candles are generated on business days. Intraday candles are generated between
+    10:00 and 17:00 on weekdays. The prices of a bar only depend on the symbol and the
+    timestamp, so overlapping requests return the same values. The history of every
+    symbol is generated once and sliced afterwards, so the fixtures cost almost nothing
+    inside the timed scenarios.
+
+    Parameters
+    ----------
+    symbol : str
+        The Yahoo Finance symbol.
+    open_date : datetime
+        The first date, inclusive.
+    close_date : datetime
+        The last date, exclusive.
+    interval : str, optional
+        The candle interval. Defaults to '1d'.
+
+    Returns
+    -------
+    DataFrame
+        The Open, High, Low, Close, Adj Close and Volume columns, indexed by 'Date'.
+    """
+    history = _candle_history(symbol, interval)
+    start = history.index.searchsorted(pd.to_datetime(open_date), side='left')
+    stop = history.index.searchsorted(pd.to_datetime(close_date), side='left')
+    return history.iloc[start:stop].copy()
+
+
+@functools.lru_cache(maxsize=None)
+def synthetic_sgs(code, open_date, close_date):
+    """
+    Builds the observations of an SGS series, in the layout of the BCB JSON API.
+
+    Parameters
+    ----------
+    code : int
+        The SGS code. Codes in DAILY_SGS_CODES are daily, the others monthly.
+    open_date : datetime
+        The first date, inclusive.
+    close_date : datetime
+        The last date, inclusive.
+
+    Returns
+    -------
+    tuple of dict
+        The observations, with their 'data' and 'valor'.
+    """
+    freq = 'B' if code in DAILY_SGS_CODES else 'MS'
+    index = pd.date_range(pd.to_datetime(open_date), pd.to_datetime(close_date), freq=freq)
+    values = 0.5 + 0.1 * np.sin((index.asi8 // 10**9 // 86400 + _seed(code)) / 90.0)
+    return tuple({'data': day.strftime('%d/%m/%Y'), 'valor': '{:.6f}'.format(value)}
+                 for day, value in zip(index, values))
+
+
+class FakeResponse:
+    """
+    The subset of requests.Response and httpx.Response used by the databases.
+    """
+
+    def __init__(self, data, status_code=200):
+        self.status_code = status_code
+        self.headers = {}
+        self._data = data
+
+    @property
+    def text(self):
+        return json.dumps(self._data)
+
+    @property
+    def content(self):
+        return self.text.encode()
+
+    def json(self):
+        return self._data
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise Exception("""HTTP error {}!""".format(self.status_code))
+
+
+class FakeBackend:
+    """
+    Answers every call with synthetic data, optionally after a simulated latency.
+    """
+
+    def __init__(self, latency: float = 0.0, universe: list = None) -> None:
+        """
+        Parameters
+        ----------
+        latency : float, optional
+            The number of seconds every call sleeps, to simulate the network.
+        universe : list, optional
+            The tickers listed by the BRAPI available and quote/list endpoints.
+        """
+        self.latency = latency
+        self.universe = universe or []
+        self.calls = {'download': 0, 'http': 0}
+
+    def prepare(self, symbols, intervals=('1d',)):
+        """
+        Generates the fixtures of the given symbols ahead of the timed runs.
+
+        Parameters
+        ----------
+        symbols : list
+            The Yahoo Finance symbols.
+        intervals : tuple, optional
+            The candle intervals to generate.
+        """
+        for symbol in symbols:
+            for interval in intervals:
+                _candle_history(symbol, interval)
+
+    def download(self, tickers=None, start=None, end=None, interval='1d', period=None,
+                 group_by='column', **kwargs):
+        """
+        Stands in for yf.download.
+        """
+        self.calls['download'] += 1
+        time.sleep(self.latency)
+        if period is not None:
+            end = pd.Timestamp.today().normalize() + pd.Timedelta(days=1)
+            start = end - pd.Timedelta(days=int(period.rstrip('d')))
+        if end is None:
+            end = pd.Timestamp.today().normalize() + pd.Timedelta(days=1)
+        if isinstance(tickers, str) and ' ' not in tickers:
+            return synthetic_candles(tickers, start, end, interval)
+        symbols = tickers.split() if isinstance(tickers, str) else list(tickers)
+        frames = {symbol: synthetic_candles(symbol, start, end, interval) for symbol in symbols}
+        df = pd.concat(frames, axis=1)
+        if group_by != 'ticker':
+            df = df.swaplevel(0, 1, axis=1)
+        return df
+
+    def http_get(self, url, params=None):
+        """
+        Stands in for a GET request to BRAPI or to the BCB API.
+        """
+        self.calls['http'] += 1
+        time.sleep(self.latency)
+        parsed = urlparse(url)
+        query = {key: values[0] for key, values in parse_qs(parsed.query).items()}
+        query.update(params or {})
+        if 'bcdata.sgs.' in parsed.path:
+            code = int(parsed.path.split('bcdata.sgs.')[1].split('/')[0])
+            return FakeResponse(list(synthetic_sgs(
+                code, pd.to_datetime(query['dataInicial'], dayfirst=True),
+                pd.to_datetime(query['dataFinal'], dayfirst=True))))
+        if parsed.path.endswith('/api/available'):
+            return FakeResponse({'stocks': list(self.universe)})
+        if parsed.path.endswith('/api/quote/list'):
+            sectors = ['Energy', 'Finance', 'Mining', 'Retail']
+            return FakeResponse({'stocks': [{'stock': ticker, 'sector': sectors[_seed(ticker) % 4]}
+                                            for ticker in self.universe]})
+        if '/api/quote/' in parsed.path:
+            ticker = parsed.path.rsplit('/', 1)[-1]
+            days = dict(BRAPI_RANGES).get(query.get('range'), 365 * 30)
+            close_date = pd.Timestamp.today().normalize() + pd.Timedelta(days=1)
+            candles = synthetic_candles(ticker, close_date - pd.Timedelta(days=days), close_date)
+            prices = [{'date': int(day.timestamp()) + 3 * 3600, 'open': row.Open, 'high': row.High,
+                       'low': row.Low, 'close': row.Close, 'Adj Close': row.Close,
+                       'volume': int(row.Volume)}
+                      for day, row in zip(candles.index, candles.itertuples())]
+            return FakeResponse({'results': [{'historicalDataPrice': prices}]})
+        return FakeResponse({'error': True}, 404)
+
+
+class ReplayBackend:
+    """
+    Serves the responses recorded in a directory, recording the missing ones from another
+    backend if one is given.
+
+    Every call is keyed by a hash of its arguments. Downloads are stored as pickled
+    DataFrames and HTTP responses as JSON, so a recording taken once against the real
+    services can be replayed offline.
+    """
+
+    def __init__(self, path: str, record_from=None) -> None:
+        """
+        Parameters
+        ----------
+        path : str
+            The directory of the recording. It is created if missing.
+        record_from : object, optional
+            A backend with download and http_get methods, used for the calls not
+            recorded yet. Without it, a missing call raises a KeyError.
+        """
+        self.path = os.path.abspath(path)
+        os.makedirs(self.path, exist_ok=True)
+        self.record_from = record_from
+        self.calls = {'download': 0, 'http': 0}
+
+    def _file(self, kind, key):
+        digest = hashlib.sha1(repr(key).encode()).hexdigest()
+        return os.path.join(self.path, '{}-{}.{}'.format(kind, digest, 'pkl' if kind == 'download' else 'json'))
+
+    def download(self, tickers=None, start=None, end=None, interval='1d', period=None,
+                 group_by='column', **kwargs):
+        """
+        Replays a yf.download call.
+        """
+        self.calls['download'] += 1
+        key = (tickers if isinstance(tickers, str) else tuple(tickers), str(start), str(end),
+               interval, period, group_by)
+        file_path = self._file('download', key)
+        if os.path.exists(file_path):
+            return pd.read_pickle(file_path)
+        if self.record_from is None:
+            raise KeyError("""No recorded download for {}!""".format(key))
+        df = self.record_from.download(tickers=tickers, start=start, end=end, interval=interval,
+                                       period=period, group_by=group_by, **kwargs)
+        df.to_pickle(file_path)
+        return df
+
+    def http_get(self, url, params=None):
+        """
+        Replays a GET request.
+        """
+        self.calls['http'] += 1
+        key = (url, sorted((params or {}).items()))
+        file_path = self._file('http', key)
+        if os.path.exists(file_path):
+            with open(file_path) as file:
+                recorded = json.load(file)
+            return FakeResponse(recorded['data'], recorded['status_code'])
+        if self.record_from is None:
+            raise KeyError("""No recorded request for {}!""".format(url))
+        response = self.record_from.http_get(url, params)
+        with open(file_path, 'w') as file:
+            json.dump({'data': response.json(), 'status_code': response.status_code}, file)
+        return response
+
+
+class LiveBackend:
+    """
+    Forwards every call to the real services, to record them with ReplayBackend.
+    """
+
+    def __init__(self) -> None:
+        self._download = yf.download
+        self._http = HttpSession()
+        self.calls = {'download': 0, 'http': 0}
+
+    def download(self, *args, **kwargs):
+        self.calls['download'] += 1
+        return self._download(*args, **kwargs)
+
+    def http_get(self, url, params=None):
+        self.calls['http'] += 1
+        return self._http.get(url, params=params)
+
+
+class _BackendHttp:
+    """
+    Replaces the shared HttpSession, forwarding every request to a backend.
+    """
+
+    def __init__(self, backend) -> None:
+        self.backend = backend
+
+    def get(self, url, params=None, headers=None):
+        return self.backend.http_get(url, params)
+
+    async def aget(self, client, url, params=None):
+        return self.backend.http_get(url, params)
+
+
+@contextmanager
+def patched(backend):
+    """
+    Routes yf.download and the HTTP requests of every database to a backend.
+
+    Parameters
+    ----------
+    backend : FakeBackend or ReplayBackend
+        The backend answering the calls.
+    """
+    download = yf.download
+    http = DatabaseComponents._http
+    yf.download = backend.download
+    DatabaseComponents._http = _BackendHttp(backend)
+    try:
+        yield backend
+    finally:
+        yf.download = download
+        DatabaseComponents._http = http
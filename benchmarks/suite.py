@@ -0,0 +1,220 @@
+"""
+Runs the database scenarios against an offline backend and writes a JSON report.
+
+Every scenario starts from empty databases and is timed with perf_counter, with its
+peak memory traced by tracemalloc. The report also records the calls made to the
+backend, so a scenario that starts hitting the network more often shows up too.
+
+Usage: python -m <package>.benchmarks.suite [--tickers N] [--repeat R]
+       [--latency S] [--replay DIR] [--output report.json]
+"""
+import sys
+import json
+import time
+import argparse
+import platform
+import tracemalloc
+from datetime import date, timedelta
+import pandas as pd
+from ..general_database import Database
+from ..multi_frame_database import MultiFrameDatabase
+from ..info import SGS_INFO
+from .backends import FakeBackend, ReplayBackend, patched
+
+
+def universe(size):
+    """
+    Returns synthetic B3-like ticker names.
+    """
+    return ['T{:03d}{}'.format(position, 3 + position % 2) for position in range(size)]
+
+
+def _fresh_databases():
+    """
+    Empties both singletons and disables the on-disk cache, so every scenario starts cold.
+    """
+    database = Database()
+    database.disable_persistence()
+    database.reset()
+    multi_frame = MultiFrameDatabase()
+    multi_frame.reset()
+    return database, multi_frame
+
+
+def cold_load(tickers, open_date, close_date):
+    """
+    Loads the multi-decade daily closes of every ticker into an empty database.
+    """
+    database, _ = _fresh_databases()
+    yield
+    database.get_info(tickers, open_date, close_date)
+
+
+def range_extension(tickers, open_date, close_date):
+    """
+    Extends the stored range of every ticker by the ten years before it.
+    """
+    database, _ = _fresh_databases()
+    database.get_info(tickers, open_date + pd.DateOffset(years=10), close_date)
+    yield
+    database.get_info(tickers, open_date, close_date)
+
+
+def universe_transforms(tickers, open_date, close_date):
+    """
+    Computes the returns and the 21-day volatility of every ticker, with the prices stored.
+    """
+    database, _ = _fresh_databases()
+    database.get_info(tickers, open_date, close_date)
+    yield
+    database.get_info(['RET_' + ticker for ticker in tickers]
+                      + ['VOL21_' + ticker for ticker in tickers], open_date, close_date)
+
+
+def sgs_forward_fill(tickers, open_date, close_date):
+    """
+    Loads the CDI and every SGS series, forward-filled onto business days.
+    """
+    database, _ = _fresh_databases()
+    yield
+    database.get_info(['CDI'] + list(SGS_INFO.keys()), open_date, close_date)
+
+
+def repeated_hits(tickers, open_date, close_date, calls=50):
+    """
+    Repeats the same request once everything is stored.
+    """
+    database, _ = _fresh_databases()
+    request = tickers[:10] + ['RET_' + ticker for ticker in tickers[:10]]
+    database.get_info(request, open_date, close_date)
+    yield
+    for _ in range(calls):
+        database.get_info(request, open_date, close_date)
+
+
+def intraday_cold_load(tickers, open_date, close_date):
+    """
+    Loads eight weeks of 5-minute bars of every ticker.
+    """
+    _, multi_frame = _fresh_databases()
+    intraday_open = pd.to_datetime(date.today()) - timedelta(days=56)
+    yield
+    multi_frame.get_info(tickers, '5m', intraday_open, info='ohlcv')
+
+
+def intraday_resample(tickers, open_date, close_date):
+    """
+    Serves 15 and 60-minute bars of every ticker from the stored 5-minute bars.
+    """
+    _, multi_frame = _fresh_databases()
+    intraday_open = pd.to_datetime(date.today()) - timedelta(days=56)
+    multi_frame.get_info(tickers, '5m', intraday_open, info='ohlcv')
+    yield
+    multi_frame.get_info(tickers, '15m', intraday_open, info='ohlcv')
+    multi_frame.get_info(tickers, '60m', intraday_open, info='ohlcv')
+
+
+SCENARIOS = {
+    'cold_load': cold_load,
+    'range_extension': range_extension,
+    'universe_transforms': universe_transforms,
+    'sgs_forward_fill': sgs_forward_fill,
+    'repeated_hits': repeated_hits,
+    'intraday_cold_load': intraday_cold_load,
+    'intraday_resample': intraday_resample,
+}
+
+
+def run_scenario(scenario, backend, tickers, open_date, close_date):
+    """
+    Runs a scenario once, timing only the part after its setup.
+
+    Scenarios are generators: the code before their yield prepares the databases and
+    the code after it is measured.
+
+    Returns
+    -------
+    dict
+        The elapsed seconds, the peak traced bytes and the backend calls of the run.
+    """
+    steps = scenario(tickers, open_date, close_date)
+    next(steps)
+    calls = dict(backend.calls)
+    tracemalloc.start()
+    start = time.perf_counter()
+    for _ in steps:
+        pass
+    elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return {'seconds': elapsed, 'peak_bytes': peak,
+            'calls': {kind: backend.calls[kind] - calls[kind] for kind in calls}}
+
+
+def run(tickers=50, repeat=3, latency=0.0, replay=None, scenarios=None,
+        open_date='1990-01-01', close_date=None):
+    """
+    Runs the scenarios and collects the report.
+
+    Parameters
+    ----------
+    tickers : int, optional
+        The number of synthetic tickers.
+    repeat : int, optional
+        The number of runs of every scenario. The report keeps the best and the median.
+    latency : float, optional
+        The simulated latency of every backend call, in seconds.
+    replay : str, optional
+        A directory of recorded responses. Missing ones are generated and recorded.
+    scenarios : list, optional
+        The names of the scenarios to run. Defaults to all of them.
+    open_date : str, optional
+        The start date of the daily scenarios.
+    close_date : str, optional
+        The end date of the daily scenarios. Defaults to today.
+
+    Returns
+    -------
+    dict
+        The environment, the parameters and the results of every scenario.
+    """
+    backend = FakeBackend(latency=latency, universe=universe(tickers))
+    backend.prepare([ticker + '.SA' for ticker in universe(tickers)], ('1d', '5m'))
+    if replay is not None:
+        backend = ReplayBackend(replay, record_from=backend)
+    open_date = pd.to_datetime(open_date)
+    close_date = pd.to_datetime(date.today() if close_date is None else close_date)
+    names = list(SCENARIOS) if scenarios is None else scenarios
+    results = {}
+    with patched(backend):
+        for name in names:
+            runs = [run_scenario(SCENARIOS[name], backend, universe(tickers), open_date, close_date)
+                    for _ in range(repeat)]
+            seconds = sorted(result['seconds'] for result in runs)
+            results[name] = {'best_s': seconds[0], 'median_s': seconds[len(seconds) // 2],
+                             'peak_bytes': max(result['peak_bytes'] for result in runs),
+                             'calls': runs[-1]['calls']}
+    return {'created': pd.Timestamp.now().isoformat(), 'python': sys.version.split()[0],
+            'pandas': pd.__version__, 'platform': platform.platform(),
+            'parameters': {'tickers': tickers, 'repeat': repeat, 'latency': latency,
+                           'open_date': open_date.isoformat(), 'close_date': close_date.isoformat()},
+            'scenarios': results}
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--tickers', type=int, default=50)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--latency', type=float, default=0.0)
+    parser.add_argument('--replay', default=None)
+    parser.add_argument('--scenario', action='append', choices=list(SCENARIOS), default=None)
+    parser.add_argument('--output', default=None)
+    args = parser.parse_args()
+    report = run(args.tickers, args.repeat, args.latency, args.replay, args.scenario)
+    for name, result in report['scenarios'].items():
+        print("{}: best {:.3f}s, median {:.3f}s, peak {:.1f} MB, calls {}".format(
+            name, result['best_s'], result['median_s'], result['peak_bytes'] / 2**20,
+            result['calls']))
+    if args.output is not None:
+        with open(args.output, 'w') as file:
+            json.dump(report, file, indent=2)
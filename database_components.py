@@ -1,9 +1,25 @@
+import asyncio
+import threading
+from collections import Counter, OrderedDict
+from contextlib import contextmanager, ExitStack
 import numpy as np
 from datetime import timedelta, date
 import yfinance as yf
-import requests
+import httpx
 import pandas as pd
-import json
+import re
+import functools
+import time
+from .info import (ASYNC_MAX_CONNECTIONS, HTTP_TIMEOUT, YF_SYMBOLS, YF_BATCH_SIZE,
+                   TICKER_CLASS_PATTERNS, METADATA_TTL_SECONDS, SCREEN_CACHE_SIZE, SGS_INFO)
+from .date_ranges import missing_ranges
+from .http_session import HttpSession
+from .streaming_transform import StreamingTransform
+from .instrumentation import Instrumentation
+from .persistent_store import PersistentStore
+from .metadata_cache import MetadataCache
+
+_TICKER_CLASS_RULES = {name: re.compile(pattern) for name, pattern in TICKER_CLASS_PATTERNS.items()}
 
 class DatabaseComponents:
     """
@@ -11,9 +27,1019 @@ class DatabaseComponents:
     returns, volatility, and ticker information from various sources.
     """
 
+    _http = HttpSession()
+    _yf_lock = threading.Lock()
+    _screens_lock = threading.Lock()
+    _instrumentation = Instrumentation()
+    _metadata = MetadataCache()
+
     def __init__(self) -> None:
         pass
 
+    def configure_http(self, **kwargs):
+        """
+        Replaces the HTTP session shared by every database with a new configuration.
+
+        Parameters
+        ----------
+        **kwargs
+            The HttpSession arguments: timeout, retries, backoff, backoff_max,
+            pool_size and min_interval.
+        """
+        DatabaseComponents._http = HttpSession(**kwargs)
+
+    def configure_metadata(self, path=None, ttl=METADATA_TTL_SECONDS):
+        """
+        Replaces the cache of the ticker universe and the sector list shared by every database.
+
+        Parameters
+        ----------
+        path : str, optional
+            The directory where the metadata is stored, so it survives process restarts.
+            None keeps it in memory only.
+        ttl : float, optional
+            The number of seconds the metadata is served before being revalidated.
+        """
+        DatabaseComponents._metadata = MetadataCache(path, ttl)
+
+    def add_hook(self, hook):
+        """
+        Registers a callable that receives the timing and counter events of every request.
+
+        Spans are reported for the stages of a request: 'get_info' as a whole, 'plan' and
+        'allow_changes', every 'download' with its source, 'parse', 'alignment', 'merge',
+        'transform' and the final 'slice'. Counters are reported for the 'bytes_downloaded'
+        and 'rows_downloaded' per source, the 'cache_hits' and 'cache_misses' of the stored
+        series and of the transformations, and the 'rows_produced'. Hooks are shared by
+        both databases. A PrometheusExporter can be registered as a hook.
+
+        Parameters
+        ----------
+        hook : callable
+            The function to call with each event dictionary.
+        """
+        DatabaseComponents._instrumentation.add_hook(hook)
+
+    def remove_hook(self, hook):
+        """
+        Unregisters a hook added with add_hook.
+
+        Parameters
+        ----------
+        hook : callable
+            The function to remove.
+        """
+        DatabaseComponents._instrumentation.remove_hook(hook)
+
+    @staticmethod
+    def _url_source(url):
+        """
+        Returns the name of the source an URL belongs to, used to label the download events.
+        """
+        if 'brapi.dev' in url:
+            return 'brapi'
+        if 'bcb.gov.br' in url:
+            return 'bcb'
+        return 'http'
+
+    def _http_get(self, url, params=None, headers=None):
+        """
+        Sends a GET request through the shared pooled session.
+
+        Parameters
+        ----------
+        url : str
+            The URL to request.
+        params : dict, optional
+            The query parameters.
+        headers : dict, optional
+            Extra request headers.
+
+        Returns
+        -------
+        requests.Response
+            The response received.
+        """
+        instrumentation = self._instrumentation
+        source = self._url_source(url)
+        with instrumentation.span('download', source=source):
+            response = self._http.get(url, params=params, headers=headers)
+        if instrumentation.enabled:
+            instrumentation.count('bytes_downloaded', len(response.content), source=source)
+        return response
+
+    def _async_client(self):
+        """
+        Returns the pooled asynchronous HTTP client of the running event loop.
+
+        The client is created on first use and reused by every coroutine running on
+        the same loop, so concurrent requests share keep-alive connections.
+
+        Returns
+        -------
+        httpx.AsyncClient
+            The client bound to the running loop.
+        """
+        loop = asyncio.get_running_loop()
+        state = getattr(self, '_async_state', None)
+        if state is None or state['loop'] is not loop:
+            limits = httpx.Limits(max_connections=ASYNC_MAX_CONNECTIONS,
+                                  max_keepalive_connections=ASYNC_MAX_CONNECTIONS)
+            client = httpx.AsyncClient(limits=limits, timeout=HTTP_TIMEOUT)
+            self._async_state = {'loop': loop, 'client': client, 'semaphores': {}}
+        return self._async_state['client']
+
+    async def _aget(self, url, params=None):
+        """
+        Sends a GET request with the pooled asynchronous client, using the retry policy
+        of the shared HTTP session.
+
+        Parameters
+        ----------
+        url : str
+            The URL to request.
+        params : dict, optional
+            The query parameters.
+
+        Returns
+        -------
+        httpx.Response
+            The response received.
+        """
+        instrumentation = self._instrumentation
+        source = self._url_source(url)
+        with instrumentation.span('download', source=source):
+            response = await self._http.aget(self._async_client(), url, params=params)
+        if instrumentation.enabled:
+            instrumentation.count('bytes_downloaded', len(response.content), source=source)
+        return response
+
+    async def _aget_json(self, url, params=None):
+        """
+        Sends a GET request with the pooled asynchronous client and decodes the JSON response.
+
+        Parameters
+        ----------
+        url : str
+            The URL to request.
+        params : dict, optional
+            The query parameters.
+
+        Returns
+        -------
+        dict or list
+            The decoded response.
+        """
+        return (await self._aget(url, params=params)).json()
+
+    async def aclose(self):
+        """
+        Closes the asynchronous HTTP client of the running event loop, if one was created.
+        """
+        state = getattr(self, '_async_state', None)
+        if state is not None and state['loop'] is asyncio.get_running_loop():
+            await state['client'].aclose()
+            self._async_state = None
+
+    def _stores(self, interval=None):
+        """
+        Returns the series storage and derived cache that hold the data of an interval.
+
+        A single storage holds every series by default. MultiFrameDatabase keeps one
+        storage per interval.
+
+        Parameters
+        ----------
+        interval : str, optional
+            The data interval.
+
+        Returns
+        -------
+        tuple
+            The SeriesStore and the DerivedCache.
+        """
+        return self._storage, self._derived
+
+    def _yf_download(self, *args, **kwargs):
+        """
+        Calls yf.download, one thread at a time.
+
+        yfinance keeps the results of a download in module-level state, so concurrent
+        calls from different threads, or from both databases, would mix their results.
+        Its batch downloads are still threaded internally.
+
+        Returns
+        -------
+        DataFrame
+            The value returned by yf.download.
+        """
+        instrumentation = self._instrumentation
+        with instrumentation.span('download', source='yahoo'):
+            with DatabaseComponents._yf_lock:
+                candles = yf.download(*args, **kwargs)
+        instrumentation.count('rows_downloaded', len(candles), source='yahoo')
+        return candles
+
+    def _download_yf(self, ticker, open_date, close_date, interval='1d'):
+        """
+        Downloads the candles of a ticker from Yahoo Finance, first with its Yahoo symbol
+        and then, if nothing is found, with its raw name.
+
+        Parameters
+        ----------
+        ticker : str
+            The ticker symbol.
+        open_date : datetime
+            The first date to download, in the exchange time zone.
+        close_date : datetime
+            The end date of the data range.
+        interval : str, optional
+            The data interval. Defaults to '1d'.
+
+        Returns
+        -------
+        tuple
+            The candles in the TICKER_field layout and the symbol they were downloaded
+            with, or (None, None) if no data was found.
+        """
+        close_to_seek = close_date + timedelta(days=10)
+        for symbol in (self._yf_symbol(ticker), ticker):
+            candles = self._yf_download(tickers=symbol, start=open_date, end=close_to_seek,
+                                        interval=interval, progress=False, show_errors=False)
+            if len(candles) > 0:
+                return self._format_candles(candles, ticker), symbol
+        return None, None
+
+    def _format_candles(self, candles, ticker, close='Adj Close'):
+        """
+        Renames the columns of Yahoo Finance candles to the TICKER_field layout.
+
+        Parameters
+        ----------
+        candles : DataFrame
+            The candles returned by Yahoo Finance for a single symbol.
+        ticker : str
+            The ticker symbol.
+        close : str, optional
+            The Yahoo Finance column used as the close. Defaults to the adjusted close.
+
+        Returns
+        -------
+        DataFrame
+            The close, open, high, low and volume columns of the ticker.
+        """
+        candles = candles.rename(
+            columns={'Open': ticker+'_open', 'High': ticker + '_high',
+                     'Low': ticker + '_low', close: ticker + '_close',
+                     'Volume': ticker + '_volume'})
+        candles.index.names = ['date']
+        candles = candles.tz_localize(None)
+        candles = candles[[ticker+'_close', ticker+'_open',
+                           ticker+'_high', ticker+'_low', ticker+'_volume']]
+        return candles
+
+    def _check_index(self, ticker):
+        """
+        Analyzes a requested ticker and returns how it is fetched and transformed.
+
+        Parameters
+        ----------
+        ticker : str
+            The ticker symbol, possibly with a transformation prefix, or a currency pair.
+
+        Returns
+        -------
+        dict
+            The raw 'ticker', its transformation 'transf' and 'periods', the 'previous_days'
+            needed by the transformation, whether it is one of the 'currencies' and whether
+            it 'get_prices' from a price source rather than a macro series.
+        """
+        info_dct = {'ticker': ticker, 'transf': None,
+                    'get_prices': True, 'previous_days': None, 'currencies': False}
+        ticker_splitted = ticker.split('_')
+        if ticker_splitted[0][:3] == 'VOL':
+            info_dct['ticker'] = ticker_splitted[1]
+            info_dct['transf'] = 'VOL'
+            info_dct['periods'] = int(ticker_splitted[0][3:])
+            info_dct['previous_days'] = (int(ticker_splitted[0][3:])+150)
+        elif ticker_splitted[0] == 'RET' or ticker_splitted[0] == 'LRET':
+            info_dct['ticker'] = ticker_splitted[1]
+            info_dct['transf'] = ticker_splitted[0]
+            info_dct['previous_days'] = None
+        elif ticker_splitted[0] == 'CRET' or ticker_splitted[0] == 'CLRET':
+            info_dct['ticker'] = ticker_splitted[1]
+            info_dct['transf'] = ticker_splitted[0]
+            info_dct['previous_days'] = None
+        is_currency = len(ticker.split('/')) > 1
+        if is_currency:
+            info_dct['currencies'] = True
+        is_cdi = ticker_splitted[-1] == 'CDI'
+        is_pib = ticker_splitted[-1] == 'PIBBR'
+        is_sgs = ticker_splitted[-1] in SGS_INFO
+        if is_cdi or is_currency or is_pib or is_sgs:
+            info_dct['get_prices'] = False
+        return info_dct
+
+    def _yf_symbol(self, ticker):
+        """
+        Returns the Yahoo Finance symbol of a ticker: the index symbols of YF_SYMBOLS, or
+        the B3 symbol with the '.SA' suffix.
+
+        Parameters
+        ----------
+        ticker : str
+            The ticker symbol.
+
+        Returns
+        -------
+        str
+            The symbol used by Yahoo Finance.
+        """
+        return YF_SYMBOLS.get(ticker, ticker+'.SA')
+
+    def register_source(self, source):
+        """
+        Registers a data source, replacing the one with the same name.
+
+        The built-in sources can be replaced this way, for instance by a local stand-in,
+        or complemented by an internal vendor feed with a lower cost.
+
+        Parameters
+        ----------
+        source : DataSource
+            The source to register.
+        """
+        self._router.register(source)
+
+    def unregister_source(self, name):
+        """
+        Removes a data source, ignoring it if it is not registered.
+
+        Parameters
+        ----------
+        name : str
+            The name of the source.
+        """
+        self._router.unregister(name)
+
+    def source_health(self):
+        """
+        Returns the health of every registered data source.
+
+        Returns
+        -------
+        dict
+            For each source name, its smoothed latency per ticker, its consecutive
+            failures, its calls and errors, and whether it is demoted.
+        """
+        return self._router.health()
+
+    @staticmethod
+    def _ticker_kind(ticker_data):
+        """
+        Returns the kind of a ticker used to route it: 'currency', 'price' or 'macro'.
+        """
+        if ticker_data['currencies']:
+            return 'currency'
+        if ticker_data['get_prices']:
+            return 'price'
+        return 'macro'
+
+    def _route(self, ticker_data, interval='1d'):
+        """
+        Returns the sources to try for a ticker, in order.
+
+        Parameters
+        ----------
+        ticker_data : dict
+            The dictionary returned by _check_index.
+        interval : str, optional
+            The data interval. Defaults to '1d'.
+
+        Returns
+        -------
+        list of DataSource
+            The sources serving the ticker.
+
+        Raises
+        ------
+        Exception
+            If no registered source serves the ticker.
+        """
+        route = self._router.route(self._ticker_kind(ticker_data), ticker_data['ticker'], interval)
+        if len(route) == 0:
+            raise Exception("""No data source for {}!""".format(ticker_data['ticker']))
+        return route
+
+    def _fetch_from(self, source, tickers, open_date, close_date, interval='1d'):
+        """
+        Fetches tickers from a source and records its latency and errors in the router.
+
+        Parameters
+        ----------
+        source : DataSource
+            The source to fetch from. Its batch function is used if it has one.
+        tickers : list
+            The ticker symbols.
+        open_date : datetime
+            The start date of the data.
+        close_date : datetime
+            The end date of the data.
+        interval : str, optional
+            The data interval. Defaults to '1d'.
+
+        Returns
+        -------
+        dict
+            The candles of every ticker, None for the ones without data.
+        """
+        start = time.perf_counter()
+        try:
+            if source.batch is not None:
+                found = source.batch(tickers, open_date, close_date, interval)
+            else:
+                found = {ticker: source.fetch(ticker, open_date, close_date, interval)
+                         for ticker in tickers}
+        except Exception:
+            self._router.record(source.name, (time.perf_counter() - start) / len(tickers), False)
+            raise
+        self._router.record(source.name, (time.perf_counter() - start) / len(tickers), True)
+        return found
+
+    async def _afetch_from(self, source, tickers, open_date, close_date, interval='1d'):
+        """
+        Asynchronous version of _fetch_from, for the sources with an afetch coroutine.
+        """
+        start = time.perf_counter()
+        found = {}
+        try:
+            for ticker in tickers:
+                found[ticker] = await source.afetch(ticker, open_date, close_date, interval)
+        except Exception:
+            self._router.record(source.name, (time.perf_counter() - start) / len(tickers), False)
+            raise
+        self._router.record(source.name, (time.perf_counter() - start) / len(tickers), True)
+        return found
+
+    def _fetch_routed(self, ticker_data, open_date, close_date, interval='1d'):
+        """
+        Fetches a ticker from the first of its sources that returns data.
+
+        Parameters
+        ----------
+        ticker_data : dict
+            The dictionary returned by _check_index.
+        open_date : datetime
+            The start date of the data.
+        close_date : datetime
+            The end date of the data.
+        interval : str, optional
+            The data interval. Defaults to '1d'.
+
+        Returns
+        -------
+        DataFrame or None
+            The raw columns of the ticker, or None if every source answered without data,
+            which is a legitimate answer for a range with no trading days.
+
+        Raises
+        ------
+        Exception
+            If no source returns data and at least one of them failed, since the range
+            may not be empty.
+        """
+        ticker = ticker_data['ticker']
+        error = None
+        for source in self._route(ticker_data, interval):
+            try:
+                df = self._fetch_from(source, [ticker], open_date, close_date, interval).get(ticker)
+            except Exception as source_error:
+                error = source_error
+                continue
+            if df is not None and len(df) > 0:
+                return df
+        if error is not None:
+            raise Exception("""No data found for {}!""".format(ticker)) from error
+        return None
+
+    def _covering_range(self, key, open_date, close_date):
+        """
+        Returns the contiguous fetched range of a ticker that covers a requested range.
+
+        Parameters
+        ----------
+        key : hashable
+            The key of the ticker in _seeken_dates.
+        open_date : datetime
+            The start date of the requested range.
+        close_date : datetime
+            The end date of the requested range.
+
+        Returns
+        -------
+        tuple or None
+            The (start, close) fetched range, or None if the requested range is not
+            fully fetched.
+        """
+        seeken = self._seeken_dates.get(key)
+        if seeken is None:
+            return None
+        for start, close in seeken['ranges']:
+            if start <= open_date and close >= close_date:
+                return start, close
+        return None
+
+    def _ticker_lock(self, key):
+        """
+        Returns the lock that guards the fetched ranges and raw columns of a ticker.
+
+        Parameters
+        ----------
+        key : hashable
+            The ticker, or the (ticker, interval) pair in MultiFrameDatabase.
+
+        Returns
+        -------
+        threading.RLock
+            The lock of the ticker, created on first use.
+        """
+        with self._lock:
+            if key not in self._ticker_locks:
+                self._ticker_locks[key] = threading.RLock()
+            return self._ticker_locks[key]
+
+    @contextmanager
+    def _tickers_locked(self, keys):
+        """
+        Holds the locks of several tickers, always acquired in the same order to avoid deadlocks.
+
+        Parameters
+        ----------
+        keys : iterable
+            The tickers, or (ticker, interval) pairs.
+        """
+        with ExitStack() as stack:
+            for key in sorted(set(keys), key=str):
+                stack.enter_context(self._ticker_lock(key))
+            yield
+
+    def configure_storage(self, compact=False):
+        """
+        Switches the compact storage mode on or off.
+
+        In compact mode, raw prices are stored as float32 and volumes as unsigned
+        integers, which takes a half to a quarter of the memory of float64 columns.
+        Every column keeps its own dense dates, and columns fetched together share
+        them. get_info still returns float64 DataFrames with the same layout.
+
+        Parameters
+        ----------
+        compact : bool, optional
+            If True, the stored series are converted to compact dtypes.
+        """
+        with self._lock:
+            self._compact = compact
+            for storage, _ in self._all_stores():
+                storage.set_compact(compact)
+
+    def _all_stores(self):
+        """
+        Returns the series storages and derived caches of every interval.
+
+        Returns
+        -------
+        list of tuple
+            The SeriesStore and DerivedCache pairs.
+        """
+        return [(self._storage, self._derived)]
+
+    def configure_memory(self, max_bytes=None, spill_path=None):
+        """
+        Sets the memory budget of the stored series.
+
+        Once the series use more than max_bytes, the least recently used tickers are
+        evicted at the end of each request, together with their fetched ranges and
+        cached transformations, so the next request for them fetches them again.
+        Tickers used by a running request are never evicted.
+
+        Parameters
+        ----------
+        max_bytes : int, optional
+            The maximum number of bytes kept in memory. None means no limit.
+        spill_path : str, optional
+            A directory where evicted tickers are written, so they are loaded back from
+            disk instead of being fetched again.
+        """
+        with self._lock:
+            self._budget.max_bytes = max_bytes
+            self._spill = None if spill_path is None else PersistentStore(spill_path)
+            keys = list(self._seeken_dates)
+        if max_bytes is not None:
+            for key in keys:
+                with self._ticker_lock(key):
+                    if key in self._seeken_dates:
+                        self._budget.touch(key, self._resident_bytes(key))
+        self._enforce_budget()
+
+    def memory_stats(self):
+        """
+        Returns the memory used by the stored series and the cache counters.
+
+        Returns
+        -------
+        dict
+            The budget, the tracked bytes and tickers, and the hit, miss, eviction,
+            spill and reload counters. Bytes and tickers are only tracked while a
+            budget is set.
+        """
+        return self._budget.stats()
+
+    @staticmethod
+    def _key_parts(key):
+        """
+        Splits a _seeken_dates key into the ticker and the interval, which is None
+        for the databases that keep a single storage.
+        """
+        return key if isinstance(key, tuple) else (key, None)
+
+    def _resident_bytes(self, key):
+        """
+        Returns the bytes used by the series of a ticker, including their dates.
+        """
+        ticker, interval = self._key_parts(key)
+        return self._stores(interval)[0].ticker_bytes(ticker)
+
+    @contextmanager
+    def _request_scope(self, keys):
+        """
+        Marks tickers as used by a running request, so they are not evicted meanwhile.
+
+        When the request ends, their sizes are updated, they become the most recently
+        used ones and the budget is enforced. Without a budget, nothing is tracked.
+
+        Parameters
+        ----------
+        keys : list
+            The keys of the requested tickers in _seeken_dates.
+        """
+        self._begin_request(keys)
+        try:
+            yield
+        finally:
+            self._end_request(keys)
+
+    def _begin_request(self, keys):
+        """
+        Marks tickers as used by a running request. See _request_scope.
+        """
+        with self._lock:
+            self._active.update(keys)
+
+    def _end_request(self, keys):
+        """
+        Releases the tickers of a finished request and enforces the budget. See _request_scope.
+        """
+        with self._lock:
+            self._active -= Counter(keys)
+        if self._budget.max_bytes is not None:
+            for key in keys:
+                with self._ticker_lock(key):
+                    if key in self._seeken_dates:
+                        self._budget.touch(key, self._resident_bytes(key))
+            self._enforce_budget()
+
+    def _record_access(self, hit):
+        """
+        Counts a ticker served from memory, or one that had to be loaded or fetched.
+
+        Parameters
+        ----------
+        hit : bool
+            True if the requested range was already in memory.
+        """
+        self._budget.record(hit)
+        self._instrumentation.count('cache_hits' if hit else 'cache_misses', cache='series')
+
+    def _enforce_budget(self):
+        """
+        Evicts the least recently used tickers until the budget is met.
+        """
+        with self._lock:
+            protected = set(self._active)
+        for key in self._budget.victims(protected):
+            self._evict(key)
+
+    def _evict(self, key):
+        """
+        Removes a ticker from memory, with its fetched ranges and cached transformations.
+
+        Its raw columns are written to the spill directory first, if one is configured.
+
+        Parameters
+        ----------
+        key : hashable
+            The key of the ticker in _seeken_dates.
+        """
+        ticker, interval = self._key_parts(key)
+        storage, derived = self._stores(interval)
+        with self._ticker_lock(key):
+            with self._lock:
+                if key in self._active:
+                    return
+                seeken = self._seeken_dates.pop(key, None)
+            self._budget.forget(key)
+            if seeken is None:
+                return
+            columns = storage.ticker_columns(ticker)
+            raw = [column for column in columns if column.split('_')[0] == ticker]
+            if self._spill is not None and len(raw) > 0:
+                self._spill.save(ticker, storage.get(raw), seeken['ranges'], interval or '1d')
+                self._budget.count('spills')
+            storage.drop(columns)
+            derived.discard(ticker)
+            self._budget.count('evictions')
+
+    def _load_from_spill(self, key):
+        """
+        Loads an evicted ticker back from the spill directory and records the ranges it covers.
+
+        Parameters
+        ----------
+        key : hashable
+            The key of the ticker in _seeken_dates.
+
+        Returns
+        -------
+        bool
+            True if the data was loaded from disk, False otherwise.
+        """
+        if self._spill is None:
+            return False
+        ticker, interval = self._key_parts(key)
+        ranges = self._spill.get_ranges(ticker, interval or '1d')
+        if ranges is None:
+            return False
+        df = self._spill.load(ticker, interval or '1d')
+        if df is None:
+            return False
+        extra = () if interval is None else (interval,)
+        for open_date, close_date in ranges:
+            self._add_seeken_dates(ticker, open_date, close_date, *extra)
+        self._merge_data(df, interval)
+        self._spill.remove(ticker, interval or '1d')
+        self._budget.count('reloads')
+        return True
+
+    def _merge_data(self, df, interval=None):
+        """
+        Splices a DataFrame into the internal series storage.
+
+        Columns that are not stored yet are added. Columns that already exist
+        are combined with the stored values, with the new values taking priority
+        on the dates they cover.
+
+        Parameters
+        ----------
+        df : DataFrame or dict
+            The data to store, indexed by date, or a dictionary of date-indexed Series.
+        interval : str, optional
+            The data interval, for databases that keep one storage per interval.
+        """
+        with self._instrumentation.span('merge'):
+            self._stores(interval)[0].put(df)
+
+    def _align_to_business_days(self, series, name, open_date, close_date):
+        """
+        Forward-fills a series onto the business days between two dates.
+
+        Each weekday gets the last observation at or before it, found with a single
+        searchsorted over the sorted observation dates. Weekdays before the first
+        observation are left out.
+
+        Parameters
+        ----------
+        series : Series
+            The observations, indexed by date.
+        name : str
+            The name of the resulting column.
+        open_date : datetime
+            The start date of the aligned data.
+        close_date : datetime
+            The end date of the aligned data.
+
+        Returns
+        -------
+        DataFrame
+            A DataFrame with a single column, indexed by business day.
+        """
+        with self._instrumentation.span('alignment'):
+            series = series.sort_index(kind='mergesort')
+            raw_date_range = pd.date_range(
+                start=open_date, end=close_date+timedelta(days=1))
+            date_range = raw_date_range[raw_date_range.weekday < 5]
+            positions = series.index.searchsorted(date_range, side='right') - 1
+            available = positions >= 0
+            df = pd.DataFrame({name: series.to_numpy()[positions[available]]},
+                              index=date_range[available])
+            df = df.loc[open_date:close_date]
+        return df
+
+    def _transf_column(self, ticker_data):
+        """
+        Returns the name of the column produced by the transformation of a ticker.
+
+        Parameters
+        ----------
+        ticker_data : dict
+            The dictionary returned by _check_index.
+
+        Returns
+        -------
+        str or None
+            The column name, or None if no transformation was requested.
+        """
+        if ticker_data['transf'] is None:
+            return None
+        if ticker_data['transf'] == 'VOL':
+            return 'VOL' + str(ticker_data['periods']) + '_' + ticker_data['ticker'] + '_close'
+        return ticker_data['transf'] + '_' + ticker_data['ticker'] + '_close'
+
+    def _transform_frame(self, data, transf, periods=None):
+        """
+        Applies a transformation to every column of a DataFrame in a single 2-D pass.
+
+        All the columns must share the same dates, as the ones grouped by
+        _apply_transforms, so that every column sees the same rows it would see alone.
+
+        Parameters
+        ----------
+        data : DataFrame
+            The close prices, one TICKER_close column per ticker.
+        transf : str
+            The transformation: 'RET', 'LRET', 'CRET', 'CLRET' or 'VOL'.
+        periods : int, optional
+            The rolling window of the volatility.
+
+        Returns
+        -------
+        DataFrame
+            The transformed columns, named as returned by _transf_column.
+        """
+        data = data.dropna()
+        previous = data.shift(1)
+        if transf in ('LRET', 'CLRET'):
+            daily_returns = np.log(data / previous)
+        else:
+            daily_returns = (data - previous) / previous
+        if transf in ('RET', 'LRET'):
+            df = daily_returns.fillna(0)
+        elif transf == 'CRET':
+            df = (daily_returns.fillna(0) + 1).cumprod() - 1
+        elif transf == 'CLRET':
+            df = daily_returns.fillna(0).cumsum()
+        else:
+            df = daily_returns.rolling(periods).std() * (periods ** 0.5)
+        prefix = 'VOL' + str(periods) if transf == 'VOL' else transf
+        return df.rename(columns=lambda column: prefix + '_' + column)
+
+    def _apply_transforms(self, pending):
+        """
+        Computes every pending transformation of a request and stores the results together.
+
+        Transformations already in the derived cache, computed from the current version of
+        the raw close column, are reused as they are. The others are grouped by operator,
+        parameters and date range, and the close columns of a group that share the same
+        dates are transformed as one DataFrame, instead of one pass per ticker.
+
+        Parameters
+        ----------
+        pending : list of dict
+            The transformations to compute, each with the 'ticker_data' returned by
+            _check_index, the 'open_date' and 'close_date' of the range to transform
+            and, optionally, the 'interval' of the data.
+        """
+        if len(pending) == 0:
+            return
+        by_interval = {}
+        for request in pending:
+            by_interval.setdefault(request.get('interval'), []).append(request)
+        with self._instrumentation.span('transform'):
+            for interval, requests in by_interval.items():
+                storage, derived = self._stores(interval)
+                self._apply_store_transforms(requests, storage, derived)
+
+    def _apply_store_transforms(self, pending, storage, derived):
+        """
+        Computes the pending transformations of the series held by a single storage.
+
+        Parameters
+        ----------
+        pending : list of dict
+            The transformations to compute, as given to _apply_transforms.
+        storage : SeriesStore
+            The storage holding the close prices.
+        derived : DerivedCache
+            The cache of the transformations computed from that storage.
+        """
+        results = {}
+        groups = {}
+        for request in pending:
+            ticker_data = request['ticker_data']
+            column = self._transf_column(ticker_data)
+            close_column = ticker_data['ticker'] + '_close'
+            key = derived.key(ticker_data, request['open_date'], request['close_date'])
+            version = storage.version(close_column)
+            if column in storage and derived.is_stored(column, key, version):
+                continue
+            series = derived.get(key, version)
+            self._instrumentation.count('cache_hits' if series is not None else 'cache_misses',
+                                        cache='transform')
+            if series is None:
+                series = self._extend_transform(key, version, close_column, storage, derived)
+            if series is not None:
+                results[column] = (key, version, series)
+                continue
+            group = groups.setdefault(key[:1] + key[2:], {})
+            group[close_column] = (column, key, version)
+        for (transf, periods, open_date, close_date), columns in groups.items():
+            blocks = []
+            prices = {}
+            for close_column in columns:
+                series = storage.get_series(close_column).loc[open_date:close_date]
+                series = series.astype('float64', copy=False)
+                prices[close_column] = series
+                for index, block in blocks:
+                    if index.equals(series.index):
+                        block[close_column] = series.to_numpy()
+                        break
+                else:
+                    blocks.append((series.index, {close_column: series.to_numpy()}))
+            for index, block in blocks:
+                data = pd.DataFrame(block, index=index)
+                df = self._transform_frame(data, transf, periods).loc[open_date:close_date]
+                for close_column in block:
+                    column, key, version = columns[close_column]
+                    state = None
+                    if len(index) > 0:
+                        state = StreamingTransform.from_history(
+                            transf, periods, prices[close_column], df[column].iloc[-1])
+                    derived.put(key, version, df[column], state)
+                    results[column] = (key, version, df[column])
+        if len(results) == 0:
+            return
+        storage.put(pd.concat([series for _, _, series in results.values()], axis=1), replace=True)
+        for column, (key, version, _) in results.items():
+            derived.mark_stored(column, key, version)
+
+    def _extend_transform(self, key, version, close_column, storage, derived):
+        """
+        Extends the latest cached transformation of a ticker with the bars appended since.
+
+        This only applies when the new range starts on the same date and no stored price
+        up to the last transformed bar has changed. The streaming state then transforms
+        the new bars alone, so a live feed costs O(k) per update instead of O(history).
+
+        Parameters
+        ----------
+        key : tuple
+            The key of the requested transformation.
+        version : int
+            The current version of the raw close column.
+        close_column : str
+            The name of the raw close column.
+        storage : SeriesStore
+            The storage holding the close prices.
+        derived : DerivedCache
+            The cache of the transformations computed from that storage.
+
+        Returns
+        -------
+        Series or None
+            The extended transformation, or None if it must be computed in full.
+        """
+        previous = derived.latest(key)
+        if previous is None or previous['state'] is None:
+            return None
+        state = previous['state']
+        close_date = key[4]
+        if close_date < state.last_date:
+            return None
+        first = storage.first_change(close_column, previous['version'])
+        if first is None or first <= state.last_date:
+            return None
+        prices = storage.get_series(close_column)
+        start = prices.index.searchsorted(state.last_date, side='right')
+        end = prices.index.searchsorted(close_date, side='right')
+        prices = prices.iloc[start:end]
+        state = state.copy()
+        values = state.update(prices.index, prices.to_numpy(dtype=float))
+        if values is None:
+            return None
+        series = pd.concat([previous['series'], pd.Series(values, index=prices.index)])
+        series.name = previous['series'].name
+        derived.put(key, version, series, state)
+        return series
+
     def _fetch_returns(self, data, open_date, close_date):
         """
         Computes and returns daily returns for a given dataset.
@@ -32,14 +1058,7 @@ class DatabaseComponents:
         DataFrame
             A DataFrame containing the daily returns.
         """
-        ticker = (data.columns[0]).split('_')[0]
-        data = data.dropna()
-        daily_returns = (data - data.shift(1)) / data.shift(1)
-        daily_returns = daily_returns.fillna(0)
-        df = pd.DataFrame(daily_returns)
-        df = df.rename(columns={ticker + '_close': 'RET_' + ticker + '_close'})
-        df = df.loc[open_date:close_date]
-        return df
+        return self._transform_frame(data, 'RET').loc[open_date:close_date]
 
     def _fetch_log_returns(self, data, open_date, close_date):
         """
@@ -59,14 +1078,7 @@ class DatabaseComponents:
         DataFrame
             A DataFrame containing the daily logarithmic returns.
         """
-        ticker = (data.columns[0]).split('_')[0]
-        data = data.dropna()
-        daily_returns = np.log(data / data.shift(1))
-        daily_returns = daily_returns.fillna(0)
-        df = pd.DataFrame(daily_returns)
-        df = df.rename(columns={ticker + '_close': 'LRET_' + ticker + '_close'})
-        df = df.loc[open_date:close_date]
-        return df
+        return self._transform_frame(data, 'LRET').loc[open_date:close_date]
 
     def _fetch_cumulated_returns(self, data, open_date, close_date):
         """
@@ -86,14 +1098,7 @@ class DatabaseComponents:
         DataFrame
             A DataFrame containing the accumulated returns.
         """
-        ticker = (data.columns[0]).split('_')[0]
-        data = data.dropna()
-        daily_returns = (data - data.shift(1)) / data.shift(1)
-        cumulated_returns = (daily_returns.fillna(0) + 1).cumprod() - 1
-        df = pd.DataFrame(cumulated_returns)
-        df = df.rename(columns={ticker + '_close': 'CRET_' + ticker + '_close'})
-        df = df.loc[open_date:close_date]
-        return df
+        return self._transform_frame(data, 'CRET').loc[open_date:close_date]
 
     def _fetch_cumulated_log_returns(self, data, open_date, close_date):
         """
@@ -113,14 +1118,7 @@ class DatabaseComponents:
         DataFrame
             A DataFrame containing the accumulated logarithmic returns.
         """
-        ticker = (data.columns[0]).split('_')[0]
-        data = data.dropna()
-        daily_returns = np.log(data / data.shift(1))
-        cumulated_returns = daily_returns.fillna(0).cumsum()
-        df = pd.DataFrame(cumulated_returns)
-        df = df.rename(columns={ticker + '_close': 'CLRET_' + ticker + '_close'})
-        df = df.loc[open_date:close_date]
-        return df
+        return self._transform_frame(data, 'CLRET').loc[open_date:close_date]
 
     def _fetch_volatility(self, data, periods, open_date, close_date):
         """
@@ -142,18 +1140,23 @@ class DatabaseComponents:
         DataFrame
             A DataFrame containing the rolling volatility.
         """
-        ticker = (data.columns[0]).split('_')[0]
-        data = data.dropna()
-        daily_returns = (data - data.shift(1)) / data.shift(1)
-        volatility = daily_returns.rolling(periods).std() * (periods ** 0.5)
-        df = pd.DataFrame(volatility)
-        df = df.rename(columns={ticker + '_close': 'VOL' + str(periods) + '_' + ticker + '_close'})
-        df = df.loc[open_date:close_date]
-        return df
+        return self._transform_frame(data, 'VOL', periods).loc[open_date:close_date]
     
+    @staticmethod
+    def _build_universe(obj):
+        """
+        Returns the tickers listed by the BRAPI available endpoint, or None if it returned an error.
+        """
+        if obj.get('error'):
+            return None
+        return obj['stocks']
+
     def get_brazilian_tickers(self):
         """
         Retrieves a list of Brazilian stock tickers from the BRAPI API.
+
+        The list is served from the metadata cache, and only requested again once it
+        is older than its TTL.
         
         Returns
         -------
@@ -161,24 +1164,135 @@ class DatabaseComponents:
             A list of Brazilian stock tickers if successful, otherwise False.
         """
         url_request = "https://brapi.dev/api/available"
-        rqst = requests.get(url_request)
-        obj = json.loads(rqst.text)
-        error = obj.get('error')
-        if error:
+        data = self._metadata.get('universe', functools.partial(self._http_get, url_request),
+                                  self._build_universe)
+        if data is None:
             return False
-        data = obj['stocks']
-        return data
+        return list(data)
     
+    def _stored_volume(self, ticker, open_date, close_date):
+        """
+        Returns the volume traded by a ticker over a window, if its daily volumes are
+        already stored for the whole window.
+
+        Parameters
+        ----------
+        ticker : str
+            The ticker symbol.
+        open_date : datetime
+            The first date of the window, inclusive.
+        close_date : datetime
+            The last date of the window, exclusive.
+
+        Returns
+        -------
+        float or None
+            The summed volume, or None if the window is not fully stored.
+        """
+        seeken_dates = getattr(self, '_seeken_dates', {})
+        for key in (ticker, (ticker, '1d')):
+            seeken = seeken_dates.get(key)
+            if seeken is None or len(missing_ranges(seeken['ranges'], open_date, close_date)) > 0:
+                continue
+            storage = self._stores(self._key_parts(key)[1])[0]
+            if ticker+'_volume' not in storage:
+                continue
+            volume = storage.get([ticker+'_volume'])[ticker+'_volume']
+            return float(volume[(volume.index >= open_date) & (volume.index < close_date)].sum())
+        return None
+
+    def _download_volumes(self, tickers, open_date, close_date):
+        """
+        Downloads the volume traded by tickers over a window, in chunks of YF_BATCH_SIZE symbols.
+
+        Every chunk is a threaded Yahoo Finance download. Only its Volume column is kept and
+        summed before the next chunk is downloaded, so the whole OHLCV universe is never held
+        in memory at once.
+
+        Parameters
+        ----------
+        tickers : list
+            The ticker symbols, without the '.SA' suffix.
+        open_date : datetime
+            The first date of the window, inclusive.
+        close_date : datetime
+            The last date of the window, exclusive.
+
+        Returns
+        -------
+        dict
+            The summed volume of every ticker found.
+        """
+        volumes = {}
+        for position in range(0, len(tickers), YF_BATCH_SIZE):
+            chunk = [ticker + ".SA" for ticker in tickers[position:position+YF_BATCH_SIZE]]
+            candles = self._yf_download(chunk, start=open_date, end=close_date, threads=True,
+                                        progress=False, show_errors=False)
+            if len(candles) == 0:
+                continue
+            volume = candles['Volume']
+            if isinstance(volume, pd.Series):
+                volume = volume.to_frame(chunk[0])
+            for symbol, total in volume.sum().items():
+                volumes[symbol.replace(".SA", "")] = float(total)
+        return volumes
+
+    def _screen_cache(self):
+        """
+        Returns the volume rankings cached by this instance, creating them on first use.
+        Must be called while holding _screens_lock.
+        """
+        screens = getattr(self, '_screens', None)
+        if screens is None:
+            screens = self._screens = OrderedDict()
+        return screens
+
+    def _screen(self, key, universe):
+        """
+        Returns a cached volume ranking, or None if it is missing, older than the TTL of
+        the metadata cache or computed from another ticker universe.
+        """
+        with self._screens_lock:
+            screens = self._screen_cache()
+            entry = screens.get(key)
+            if entry is None:
+                return None
+            version, stored_at, ordered_volume = entry
+            if version != hash(tuple(universe)) or time.time() - stored_at >= self._metadata.ttl:
+                del screens[key]
+                return None
+            screens.move_to_end(key)
+            return ordered_volume
+
+    def _store_screen(self, key, universe, ordered_volume):
+        """
+        Caches a volume ranking, dropping the least recently used ones beyond SCREEN_CACHE_SIZE.
+        """
+        with self._screens_lock:
+            screens = self._screen_cache()
+            screens[key] = (hash(tuple(universe)), time.time(), ordered_volume)
+            screens.move_to_end(key)
+            while len(screens) > SCREEN_CACHE_SIZE:
+                screens.popitem(last=False)
+
     def get_most_traded(self,ticker_class:str="stocks", maximum_date=None, 
                         previous_days_to_consider: int = 30, 
                         volume_filter:float=None):
         """
         Retrieves the most traded Brazilian stock tickers based on trading volume within a specified date range.
+
+        The symbols are classified with the precompiled TICKER_CLASS_PATTERNS rules. The
+        volumes of the tickers whose daily data is already stored are summed from memory,
+        and only the others are downloaded. The ranking is cached per ticker class, date and
+        window, so screening the same window again costs no download. A ranking is kept
+        while the ticker universe it was computed from is unchanged and for at most the
+        TTL of the metadata cache, and only the SCREEN_CACHE_SIZE most recently used
+        rankings are kept.
         
         Parameters
         ----------
         ticker_class: str, optional
-            The type of tickers to consider. Defaults to "stocks".
+            The type of tickers to consider: "stocks", "etfs" or "bdrs". Defaults to "stocks".
         maximum_date : datetime, optional
             The end date for the period to consider. Defaults to today's date.
         previous_days_to_consider : int, optional
@@ -191,48 +1305,90 @@ class DatabaseComponents:
         list
             A list of the most traded Brazilian stock tickers.
         """
+        rule = _TICKER_CLASS_RULES.get(ticker_class.lower())
+        if rule is None:
+            raise Exception("""Unknown ticker class {}!""".format(ticker_class))
         if maximum_date is None:
             maximum_date = pd.to_datetime(date.today())
-        open_date = maximum_date - timedelta(days=previous_days_to_consider)
+        maximum_date = pd.to_datetime(maximum_date)
         br_tickers_raw = self.get_brazilian_tickers()
-        tickers_filtered = []
-        for ticker in br_tickers_raw:
-            try:
-                index_ETF_BDR = int(ticker[-2:])
-                is_ETF_BDR = True
-            except:
-                is_ETF_BDR = False
-            try:
-                is_available = int(ticker[-1])
-                is_available = True
-            except:
-                is_available = False
-            if is_available:
-                if ticker_class.lower() == "stocks":
-                    if not is_ETF_BDR:
-                        tickers_filtered.append(ticker)
+        if br_tickers_raw is False:
+            raise Exception("""No data found for the Brazilian tickers!""")
+        key = (ticker_class.lower(), maximum_date, previous_days_to_consider)
+        ordered_volume = self._screen(key, br_tickers_raw)
+        if ordered_volume is None:
+            open_date = maximum_date - timedelta(days=previous_days_to_consider)
+            volume_info = {}
+            to_download = []
+            for ticker in br_tickers_raw:
+                if rule.fullmatch(ticker) is None:
+                    continue
+                volume = self._stored_volume(ticker, open_date, maximum_date)
+                if volume is None:
+                    to_download.append(ticker)
                 else:
-                    if is_ETF_BDR:
-                        if ticker_class.lower() == "etfs" and index_ETF_BDR == 11:
-                            tickers_filtered.append(ticker)
-                        elif ticker_class.lower() == "bdrs" and index_ETF_BDR == 34:
-                            tickers_filtered.append(ticker)
-        br_tickers = [ticker + ".SA" for ticker in tickers_filtered]
-        df = yf.download(br_tickers, start=open_date,
-                        end=maximum_date, progress=False, show_errors=False)
-        volume_info = dict(df['Volume'].sum())
-        ordered_volume = dict(
-            sorted(volume_info.items(), key=lambda item: item[1], reverse=True))
+                    volume_info[ticker] = volume
+            self._instrumentation.count('cache_hits', len(volume_info), cache='volume')
+            self._instrumentation.count('cache_misses', len(to_download), cache='volume')
+            volume_info.update(self._download_volumes(to_download, open_date, maximum_date))
+            ordered_volume = dict(
+                sorted(volume_info.items(), key=lambda item: item[1], reverse=True))
+            self._store_screen(key, br_tickers_raw, ordered_volume)
         if volume_filter is not None:
-            ordered_volume = {key: value for key, value in ordered_volume.items() if value >= volume_filter}
-        tickers_raw = list(ordered_volume.keys())
-        tickers = [ticker.replace(".SA", "") for ticker in tickers_raw]
-        return tickers
+            return [ticker for ticker, value in ordered_volume.items() if value >= volume_filter]
+        return list(ordered_volume.keys())
     
     
+    @staticmethod
+    def _build_sector_index(obj):
+        """
+        Builds the sector -> tickers and ticker -> sector indexes of the BRAPI quote list.
+
+        Parameters
+        ----------
+        obj : dict
+            The decoded response of the quote/list endpoint.
+
+        Returns
+        -------
+        dict or None
+            The 'sectors' and 'tickers' indexes, or None if the response has no stocks.
+        """
+        stocks = obj.get('stocks')
+        if stocks is None:
+            return None
+        sectors = {}
+        tickers = {}
+        for stock in stocks:
+            sector = stock['sector']
+            if sector is not None:
+                sectors.setdefault(sector, []).append(stock['stock'])
+                tickers[stock['stock']] = sector
+        return {'sectors': sectors, 'tickers': tickers}
+
+    def _sector_index(self):
+        """
+        Returns the sector indexes, served from the metadata cache.
+
+        Returns
+        -------
+        dict or None
+            The 'sectors' and 'tickers' indexes, or None if the list could not be fetched.
+        """
+        url = "https://brapi.dev/api/quote/list"
+        params = {
+            'sortBy': 'close',
+            'sortOrder': 'desc',
+        }
+        return self._metadata.get('sectors', functools.partial(self._http_get, url, params),
+                                  self._build_sector_index)
+
     def get_tickers_from_sector(self, sector_name: str = None):
         """
         Retrieves a list of stock tickers grouped by sector, optionally filtering by a specific sector.
+
+        The sector index is built once per refresh of the metadata cache, so lookups need
+        no request while the cached list is fresh.
         
         Parameters
         ----------
@@ -244,28 +1400,31 @@ class DatabaseComponents:
         list or dict
             A list of tickers in the specified sector, or a dictionary of all sectors if no sector is specified.
         """
-        url = "https://brapi.dev/api/quote/list"
-        params = {
-            'sortBy': 'close',
-            'sortOrder': 'desc',
-        }
-        response = requests.get(url, params=params)
-        if response.status_code == 200:
-            data = response.json()
-            stocks = data['stocks']
-            sector_data = {}
-            for stock in stocks:
-                sector = stock['sector']
-                if sector is not None:
-                    ticker = stock['stock']
-                    try:
-                        sector_data[sector].append(ticker)
-                    except:
-                        sector_data[sector] = [ticker]
-            if sector_name is not None:
-                return sector_data[sector_name]
-            return sector_data
-        else:
-            print(f"Request failed with status code {response.status_code}")
+        index = self._sector_index()
+        if index is None:
+            print("Request failed for the sector list")
+            return None
+        if sector_name is not None:
+            return list(index['sectors'][sector_name])
+        return {sector: list(tickers) for sector, tickers in index['sectors'].items()}
+
+    def get_ticker_sector(self, ticker: str):
+        """
+        Returns the sector of a ticker, served from the metadata cache.
+
+        Parameters
+        ----------
+        ticker : str
+            The ticker symbol.
+
+        Returns
+        -------
+        str or None
+            The sector, or None if the ticker has no sector or the list could not be fetched.
+        """
+        index = self._sector_index()
+        if index is None:
+            return None
+        return index['tickers'].get(ticker)
             
             
\ No newline at end of file
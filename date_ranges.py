@@ -0,0 +1,65 @@
+import pandas as pd
+
+
+def merge_ranges(ranges):
+    """
+    Merges overlapping or touching date ranges.
+
+    Parameters
+    ----------
+    ranges : list of tuple
+        A list of (start, close) pairs.
+
+    Returns
+    -------
+    list of tuple
+        The sorted, non-overlapping (start, close) pairs covering the same dates.
+    """
+    merged = []
+    for start, close in sorted((pd.to_datetime(start), pd.to_datetime(close))
+                               for start, close in ranges):
+        if merged and start <= merged[-1][1]:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], close))
+        else:
+            merged.append((start, close))
+    return merged
+
+
+def missing_ranges(ranges, open_date, close_date):
+    """
+    Computes the parts of [open_date, close_date] not covered by the given ranges.
+
+    The returned ranges share their boundaries with the covered ones, so data
+    fetched for them can be spliced without leaving holes.
+
+    Parameters
+    ----------
+    ranges : list of tuple
+        A list of already covered (start, close) pairs.
+    open_date : datetime
+        The start date of the requested range.
+    close_date : datetime
+        The end date of the requested range.
+
+    Returns
+    -------
+    list of tuple
+        The (start, close) pairs that still need to be fetched.
+    """
+    open_date = pd.to_datetime(open_date)
+    close_date = pd.to_datetime(close_date)
+    gaps = []
+    cursor = open_date
+    reached = False
+    for start, close in merge_ranges(ranges):
+        if close < cursor:
+            continue
+        if start > close_date:
+            break
+        if start > cursor:
+            gaps.append((cursor, start))
+        cursor = max(cursor, close)
+        reached = True
+    if cursor < close_date or not reached:
+        gaps.append((cursor, close_date))
+    return gaps
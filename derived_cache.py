@@ -0,0 +1,191 @@
+import threading
+from collections import OrderedDict
+from .info import DERIVED_CACHE_SIZE
+
+
+class DerivedCache:
+    """
+    A memo of computed transformations, kept apart from the raw series they come from.
+
+    Every entry is keyed by the transformation, the ticker, its parameters and the
+    date range it was computed over, and remembers the version of the raw close
+    column it was computed from. An entry is only returned while that raw column
+    keeps the same version, so it is invalidated as soon as new prices are stored.
+    The least recently used entries are evicted once the cache is full.
+
+    The latest entry computed from the same start date also keeps the streaming state
+    of the transformation, so it can be extended when bars are appended to its range.
+    """
+
+    def __init__(self, max_entries: int = DERIVED_CACHE_SIZE) -> None:
+        """
+        Parameters
+        ----------
+        max_entries : int, optional
+            The maximum number of transformations kept.
+        """
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._latest = {}
+        self._stored = {}
+        self._lock = threading.RLock()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    @staticmethod
+    def key(ticker_data, open_date, close_date):
+        """
+        Builds the key of a transformation.
+
+        Parameters
+        ----------
+        ticker_data : dict
+            The dictionary returned by _check_index.
+        open_date : datetime
+            The start date of the transformed range.
+        close_date : datetime
+            The end date of the transformed range.
+
+        Returns
+        -------
+        tuple
+            The transformation, ticker, periods and date range.
+        """
+        return (ticker_data['transf'], ticker_data['ticker'], ticker_data.get('periods'),
+                open_date, close_date)
+
+    def get(self, key, version):
+        """
+        Returns a cached transformation if it was computed from the given raw version.
+
+        Parameters
+        ----------
+        key : tuple
+            The key returned by key.
+        version : int
+            The current version of the raw close column.
+
+        Returns
+        -------
+        Series or None
+            The transformed series, or None if it is missing or stale.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry['version'] != version:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry['series']
+
+    def latest(self, key):
+        """
+        Returns the latest entry of the same transformation, ticker, periods and start date.
+
+        Parameters
+        ----------
+        key : tuple
+            The key returned by key.
+
+        Returns
+        -------
+        dict or None
+            The entry, with its 'version', 'series' and streaming 'state', or None.
+        """
+        with self._lock:
+            latest_key = self._latest.get(key[:4])
+            return self._entries.get(latest_key)
+
+    def put(self, key, version, series, state=None):
+        """
+        Stores a transformation computed from the given raw version.
+
+        It replaces the previous entry with the same start date, which it extends.
+
+        Parameters
+        ----------
+        key : tuple
+            The key returned by key.
+        version : int
+            The version of the raw close column the series was computed from.
+        series : Series
+            The transformed series.
+        state : StreamingTransform, optional
+            The state after the last price, used to extend the series later.
+        """
+        with self._lock:
+            previous_key = self._latest.get(key[:4])
+            if previous_key is not None and previous_key != key:
+                self._entries.pop(previous_key, None)
+            self._latest[key[:4]] = key
+            self._entries[key] = {'version': version, 'series': series, 'state': state}
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def is_stored(self, column, key, version):
+        """
+        Checks if a storage column already holds the given transformation.
+
+        Parameters
+        ----------
+        column : str
+            The name of the transformed column.
+        key : tuple
+            The key returned by key.
+        version : int
+            The current version of the raw close column.
+
+        Returns
+        -------
+        bool
+            True if the column was last written with this key and raw version.
+        """
+        with self._lock:
+            return self._stored.get(column) == (key, version)
+
+    def mark_stored(self, column, key, version):
+        """
+        Records which transformation a storage column holds.
+
+        Parameters
+        ----------
+        column : str
+            The name of the transformed column.
+        key : tuple
+            The key returned by key.
+        version : int
+            The version of the raw close column the transformation was computed from.
+        """
+        with self._lock:
+            self._stored[column] = (key, version)
+
+    def discard(self, ticker):
+        """
+        Removes every cached transformation of a ticker.
+
+        Parameters
+        ----------
+        ticker : str
+            The ticker symbol.
+        """
+        with self._lock:
+            for key in [key for key in self._entries if key[1] == ticker]:
+                del self._entries[key]
+            for key in [key for key in self._latest if key[1] == ticker]:
+                del self._latest[key]
+            for column in [column for column, (key, _) in self._stored.items() if key[1] == ticker]:
+                del self._stored[column]
+
+    def clear(self):
+        """
+        Removes every cached transformation.
+        """
+        with self._lock:
+            self._entries = OrderedDict()
+            self._latest = {}
+            self._stored = {}
@@ -0,0 +1,87 @@
+import threading
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+from .info import FETCH_MAX_WORKERS, SOURCE_CONCURRENCY
+
+
+class FetchScheduler:
+    """
+    Runs planned downloads in parallel on a bounded thread pool.
+
+    Every job names the source it downloads from, and each source has its own
+    concurrency limit, so a request that mixes Yahoo, BRAPI and BCB series is
+    limited by the slowest source instead of the sum of all of them.
+    """
+
+    def __init__(self, max_workers: int = FETCH_MAX_WORKERS, source_limits: dict = None) -> None:
+        """
+        Parameters
+        ----------
+        max_workers : int, optional
+            The maximum number of downloads running at the same time.
+        source_limits : dict, optional
+            The maximum number of simultaneous downloads per source. Sources not
+            listed are only bounded by max_workers.
+        """
+        self.max_workers = max_workers
+        self.source_limits = dict(SOURCE_CONCURRENCY)
+        if source_limits is not None:
+            self.source_limits.update(source_limits)
+        self._semaphores = {}
+        self._lock = threading.Lock()
+
+    def _semaphore(self, source):
+        """
+        Returns the semaphore that bounds the downloads of a source.
+        """
+        with self._lock:
+            if source not in self._semaphores:
+                limit = self.source_limits.get(source, self.max_workers)
+                self._semaphores[source] = threading.BoundedSemaphore(limit)
+            return self._semaphores[source]
+
+    def run_job(self, job):
+        """
+        Runs a single job in the calling thread, respecting the limit of its source.
+
+        Parameters
+        ----------
+        job : dict
+            The job to run, with its 'source', 'function' and 'args'.
+
+        Returns
+        -------
+        object
+            The value returned by the job function.
+        """
+        with self._semaphore(job['source']):
+            return job['function'](*job.get('args', ()))
+
+    def run(self, jobs):
+        """
+        Runs the jobs and waits for all of them to finish.
+
+        Parameters
+        ----------
+        jobs : list of dict
+            The jobs to run. Each one has a 'source' name, a 'function' and its 'args';
+            any other key is kept untouched.
+
+        Returns
+        -------
+        list of dict
+            One outcome per job, in the same order, with the 'job', its 'result'
+            and the 'error' it raised, if any.
+        """
+        if len(jobs) == 0:
+            return []
+        workers = min(self.max_workers, len(jobs))
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            futures = [pool.submit(contextvars.copy_context().run, self.run_job, job)
+                       for job in jobs]
+        outcomes = []
+        for job, future in zip(jobs, futures):
+            error = future.exception()
+            result = None if error is not None else future.result()
+            outcomes.append({'job': job, 'result': result, 'error': error})
+        return outcomes
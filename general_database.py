@@ -1,12 +1,23 @@
+import asyncio
+import contextvars
+import functools
+import threading
+from collections import Counter
 from datetime import datetime, date, timedelta
-import yfinance as yf
 import pandas as pd
-import requests
 import json
-from bcb import sgs as sgs_bcb
 from .info import *
 from .singleton import Singleton
+from .series_store import SeriesStore
+from .derived_cache import DerivedCache
 from .database_components import DatabaseComponents
+from .persistent_store import PersistentStore
+from .shared_store import SharedStore
+from .memory_budget import MemoryBudget
+from .date_ranges import merge_ranges, missing_ranges
+from .fetch_engine import FetchScheduler
+from .inflight import InflightRegistry
+from .source_router import DataSource, SourceRouter
 
 class Database(DatabaseComponents, metaclass = Singleton): 
     """
@@ -14,144 +25,345 @@ class Database(DatabaseComponents, metaclass = Singleton):
     """
 
     def __init__(self) -> None:
-        """Initializes the Database class with an empty DataFrame and an empty dictionary for tracking dates."""
-        self._DATA = pd.DataFrame()
+        """Initializes the Database class with an empty series storage and an empty dictionary for tracking dates."""
+        self._storage = SeriesStore()
+        self._derived = DerivedCache()
         self._seeken_dates = {}
+        self._store = None
+        self._shared = None
+        self._scheduler = FetchScheduler()
+        self._lock = threading.RLock()
+        self._ticker_locks = {}
+        self._inflight = InflightRegistry()
+        self._budget = MemoryBudget()
+        self._spill = None
+        self._active = Counter()
+        self._router = SourceRouter()
+        self._register_default_sources()
+
+    def _register_default_sources(self):
+        """
+        Registers the built-in sources: Yahoo Finance for prices and currencies, BRAPI as the
+        fallback for prices, and the Brazilian Central Bank for CDI, PIBBR and the SGS series.
+        """
+        self._router.register(DataSource('yahoo', ['price'], self._fetch_yf, batch=self._fetch_yf_group))
+        self._router.register(DataSource('brapi', ['price'], self._fetch_brapi,
+                                         afetch=self._afetch_brapi, cost=2.0))
+        self._router.register(DataSource('yahoo_fx', ['currency'], self._fetch_currencies, pool='yahoo'))
+        self._router.register(DataSource('bcb', ['macro'], self._fetch_bcb, afetch=self._afetch_bcb,
+                                         tickers=['CDI', 'PIBBR']))
+        self._router.register(DataSource('sgs', ['macro'], self._fetch_bcb, afetch=self._afetch_bcb,
+                                         tickers=SGS_INFO.keys()))
+
+    def register_source(self, source):
+        """
+        Registers a data source, replacing the one with the same name.
+
+        The built-in sources are 'yahoo', 'brapi', 'yahoo_fx', 'bcb' and 'sgs'. A source
+        with a limit also sets the concurrency limit of its pool in the fetch scheduler.
+
+        Args:
+            source (DataSource): The source to register.
+        """
+        super().register_source(source)
+        if source.limit is not None:
+            self.configure_fetching(source_limits={source.pool: source.limit})
+
+    def configure_fetching(self, max_workers=None, source_limits=None):
+        """
+        Configures the thread pool used to run the downloads of a request concurrently.
+
+        Args:
+            max_workers (int, optional): The maximum number of simultaneous downloads.
+            source_limits (dict, optional): The maximum number of simultaneous downloads per source,
+                e.g. {'brapi': 2}. Sources not given keep their current limit.
+        """
+        if max_workers is None:
+            max_workers = self._scheduler.max_workers
+        limits = dict(self._scheduler.source_limits)
+        if source_limits is not None:
+            limits.update(source_limits)
+        self._scheduler = FetchScheduler(max_workers, limits)
+
+    def enable_persistence(self, path):
+        """
+        Enables the on-disk cache, so fetched series survive process restarts.
+
+        Args:
+            path (str): The directory where the series are stored.
+        """
+        self._store = PersistentStore(path)
+
+    def disable_persistence(self):
+        """
+        Disables the on-disk cache. Files already written are kept.
+        """
+        self._store = None
+
+    def publish_shared(self, path=None):
+        """
+        Publishes every stored ticker to a shared data plane that other processes can attach to.
+
+        The raw columns are written into memory-mapped arrays, so worker processes that
+        attach to the same directory read them without keeping a copy of their own.
+        Publishing again replaces the previous generation.
+
+        Args:
+            path (str, optional): The directory of the data plane. Defaults to a directory
+                in /dev/shm, or in the temporary directory if it does not exist.
+
+        Returns:
+            str: The directory of the data plane.
+        """
+        with self._lock:
+            frames = {}
+            for ticker, dates in self._seeken_dates.items():
+                columns = {ticker+field: self._storage.get_series(ticker+field)
+                           for field in ['_close', '_open', '_high', '_low', '_volume']
+                           if ticker+field in self._storage}
+                if len(columns) > 0:
+                    frames[ticker] = (columns, dates['ranges'])
+        shared = SharedStore(path)
+        shared.publish({'1d': frames})
+        return shared.path
+
+    def attach_shared(self, path=None):
+        """
+        Attaches to a shared data plane published by another process.
+
+        Tickers published there are mapped read-only instead of being fetched. The
+        others are still fetched, and the latest generation is mapped when it changes.
+
+        Args:
+            path (str, optional): The directory passed to publish_shared.
+        """
+        self._shared = SharedStore(path)
+
+    def detach_shared(self):
+        """
+        Stops reading new tickers from the shared data plane. Tickers already mapped are kept.
+        """
+        self._shared = None
+
+    def _load_from_shared(self, ticker):
+        """
+        Maps a ticker from the shared data plane and records the ranges it covers.
+
+        Args:
+            ticker (str): The ticker symbol.
+
+        Returns:
+            bool: True if the data was mapped, False otherwise.
+        """
+        if self._shared is None:
+            return False
+        ranges = self._shared.get_ranges(ticker)
+        if ranges is None:
+            return False
+        columns = self._shared.load(ticker)
+        if columns is None:
+            return False
+        for open_date, close_date in ranges:
+            self._add_seeken_dates(ticker, open_date, close_date)
+        self._merge_data(columns)
+        return True
+
+    def _load_from_store(self, ticker):
+        """
+        Loads a ticker from the on-disk cache and records the ranges it covers.
+
+        Args:
+            ticker (str): The ticker symbol.
+
+        Returns:
+            bool: True if the data was loaded from disk, False otherwise.
+        """
+        if self._store is None:
+            return False
+        ranges = self._store.get_ranges(ticker)
+        if ranges is None:
+            return False
+        df = self._store.load(ticker)
+        if df is None:
+            return False
+        for open_date, close_date in ranges:
+            self._add_seeken_dates(ticker, open_date, close_date)
+        self._merge_data(df)
+        return True
+
+    def _save_to_store(self, ticker):
+        """
+        Writes the raw columns of a ticker to the on-disk cache, if it is enabled.
+
+        Args:
+            ticker (str): The ticker symbol.
+        """
+        if self._store is None or ticker not in self._seeken_dates:
+            return
+        columns = [ticker+field for field in ['_close', '_open', '_high', '_low', '_volume']
+                   if ticker+field in self._storage]
+        self._store.save(ticker, self._storage.get(columns), self._seeken_dates[ticker]['ranges'])
 
     def _add_seeken_dates(self, ticker, open_date, close_date):
         """
-        Adds the open and close dates for a ticker to the _seeken_dates dictionary.
+        Adds a fetched date range for a ticker to the _seeken_dates dictionary.
+
+        Each entry keeps the list of fetched ranges, merged when they overlap, and
+        the overall 'start' and 'close' dates covered by them.
 
         Args:
             ticker (str): The ticker symbol.
             open_date (datetime): The start date of the data.
             close_date (datetime): The end date of the data.
-        """   
+        """
+        ranges = [(pd.to_datetime(open_date), pd.to_datetime(close_date))]
+        if ticker in self._seeken_dates:
+            ranges += self._seeken_dates[ticker]['ranges']
+        ranges = merge_ranges(ranges)
         dct_dates = {
-            'start': open_date,
-            'close': close_date
+            'start': ranges[0][0],
+            'close': ranges[-1][1],
+            'ranges': ranges
         }
         self._seeken_dates[ticker] = dct_dates
 
-    def _fetch_CDI(self, open_date, close_date):
+    def _bcb_url(self, code, open_date, close_date):
         """
-        Fetches the CDI data from the Brazilian Central Bank API and updates the _DATA DataFrame.
+        Builds the Brazilian Central Bank API URL of an SGS series.
 
         Args:
+            code (int): The SGS code of the series.
             open_date (datetime): The start date of the data.
             close_date (datetime): The end date of the data.
+
+        Returns:
+            str: The URL returning the series as JSON.
         """
         open_str = open_date.strftime('%d/%m/%Y')
         close_str = close_date.strftime('%d/%m/%Y')
-        url = f'https://api.bcb.gov.br/dados/serie/bcdata.sgs.11/dados?formato=json&dataInicial={open_str}&dataFinal={close_str}'
-        response = requests.get(url)
-        cdi = response.json()
-        dates = []
-        values = []
-        for cdi_info in cdi:
-            day, month, year = cdi_info['data'].split('/')
-            date = datetime(int(year), int(month), int(day))
-            dates.append(date)
-            value = cdi_info['valor']
-            values.append(float(value))
-        if date < close_date:
-            dates.append(close_date)
-            values.append(float(value))
-        info = {
-            'CDI_close': values,
-            'date': dates
-        }
-        df = pd.DataFrame(info)
-        df = df.set_index('date')
-        raw_date_range = pd.date_range(
-                start=open_date, end=close_date+timedelta(days=1))
-        date_range = [date for date in raw_date_range if date.weekday() < 5]
-        values = []
-        dates_to_add = []
-        for date in date_range:
-            try:
-                values.append(df[['CDI_close']].loc[:date].values[-1][-1])
-                dates_to_add.append(date)
-            except:pass
-        df = pd.DataFrame({'CDI_close': values}, index=dates_to_add)
-        df = df.loc[open_date:close_date]
-        self._DATA = pd.concat([df, self._DATA], axis=1)
+        return f'https://api.bcb.gov.br/dados/serie/bcdata.sgs.{code}/dados?formato=json&dataInicial={open_str}&dataFinal={close_str}'
+
+    def _bcb_observations(self, response, ticker):
+        """
+        Checks a response of the Brazilian Central Bank API and returns its observations.
+
+        Args:
+            response (Response): The response received.
+            ticker (str): The ticker requested, used in the error messages.
+
+        Returns:
+            list: The observations. The API answers 404 for a range without observations,
+            which is returned as an empty list.
+
+        Raises:
+            Exception: If the request failed or the payload is not a list of observations.
+        """
+        if response.status_code == 404:
+            return []
+        if response.status_code != 200:
+            raise Exception("""Download failed for {} with status {}!""".format(
+                ticker, response.status_code))
+        observations = response.json()
+        if not isinstance(observations, list):
+            raise Exception("""Download failed for {}: {}""".format(ticker, observations))
+        return observations
+
+    def _parse_bcb(self, observations, column, open_date, close_date):
+        """
+        Converts the JSON returned by the Brazilian Central Bank API into a business-day series.
+
+        Args:
+            observations (list): The observations returned by the API.
+            column (str): The name of the resulting column.
+            open_date (datetime): The start date of the data.
+            close_date (datetime): The end date of the data.
+
+        Returns:
+            pd.DataFrame: The column, forward-filled onto business days. It is empty if
+            there are no observations, such as a monthly series asked for a few days.
+        """
+        with self._instrumentation.span('parse', source='bcb'):
+            dates = []
+            values = []
+            for observation in observations:
+                day, month, year = observation['data'].split('/')
+                dates.append(datetime(int(year), int(month), int(day)))
+                values.append(float(observation['valor']))
+            if len(dates) > 0 and dates[-1] < close_date:
+                dates.append(close_date)
+                values.append(values[-1])
+            series = pd.Series(values, index=pd.DatetimeIndex(dates), dtype='float64')
+        return self._align_to_business_days(series, column, open_date, close_date)
+
+    def _fetch_CDI(self, open_date, close_date):
+        """
+        Fetches the CDI data from the Brazilian Central Bank API.
+
+        Args:
+            open_date (datetime): The start date of the data.
+            close_date (datetime): The end date of the data.
+
+        Returns:
+            pd.DataFrame: The CDI_close column, forward-filled onto business days.
+        """
+        response = self._http_get(self._bcb_url(11, open_date, close_date))
+        return self._parse_bcb(self._bcb_observations(response, 'CDI'), 'CDI_close',
+                               open_date, close_date)
 
     def _fetch_PIB_BR(self, open_date, close_date):
         """
-        Fetches the Brazilian GDP (PIB) data from the Brazilian Central Bank API and updates the _DATA DataFrame.
+        Fetches the Brazilian GDP (PIB) data from the Brazilian Central Bank API.
 
         Args:
             open_date (datetime): The start date of the data.
             close_date (datetime): The end date of the data.
+
+        Returns:
+            pd.DataFrame: The PIBBR_close column, forward-filled onto business days.
         """
-        open_str = open_date.strftime('%d/%m/%Y')
-        close_str = close_date.strftime('%d/%m/%Y')
-        url = f'https://api.bcb.gov.br/dados/serie/bcdata.sgs.24363/dados?formato=json&dataInicial={open_str}&dataFinal={close_str}'
-        response = requests.get(url)
-        pib = response.json()
-        dates = []
-        values = []
-        for pib_info in pib:
-            day, month, year = pib_info['data'].split('/')
-            date = datetime(int(year), int(month), int(day))
-            dates.append(date)
-            value = pib_info['valor']
-            values.append(float(value))
-        if date < close_date:
-            dates.append(close_date)
-            values.append(float(value))
-        info = {
-            'PIBBR_close': values,
-            'date': dates
-        }
-        df = pd.DataFrame(info)
-        df = df.set_index('date')
-        raw_date_range = pd.date_range(
-                start=open_date, end=close_date+timedelta(days=1))
-        date_range = [date for date in raw_date_range if date.weekday() < 5]
-        values = []
-        dates_to_add = []
-        for date in date_range:
-            try:
-                values.append(df[['PIBBR_close']].loc[:date].values[-1][-1])
-                dates_to_add.append(date)
-            except:pass
-        df = pd.DataFrame({'PIBBR_close': values}, index=dates_to_add)
-        df = df.loc[open_date:close_date]
-        self._DATA = pd.concat([df, self._DATA], axis=1)
-
-        
+        response = self._http_get(self._bcb_url(24363, open_date, close_date))
+        return self._parse_bcb(self._bcb_observations(response, 'PIBBR'), 'PIBBR_close',
+                               open_date, close_date)
+
     def _fetch_sgs(self, ticker, open_date, close_date):
         """
-        Fetches data from the SGS (Sistema Gerenciador de Séries Temporais) system of the Brazilian Central Bank
-        and updates the _DATA DataFrame.
+        Fetches data from the SGS (Sistema Gerenciador de Séries Temporais) system of the Brazilian Central Bank.
 
         Args:
             ticker (str): The ticker symbol corresponding to an SGS code.
             open_date (datetime): The start date of the data.
             close_date (datetime): The end date of the data.
+
+        Returns:
+            pd.DataFrame: The TICKER_close column, forward-filled onto business days.
         """
         code = SGS_INFO[ticker]
-        df = sgs_bcb.get(code, start=open_date, end=close_date)
-        raw_date_range = pd.date_range(
-            start=open_date, end=close_date+timedelta(days=1))
-        date_range = [date for date in raw_date_range if date.weekday() < 5]
-        values = []
-        dates_to_add = []
-        for date in date_range:
-            try:
-                values.append(df[[str(code)]].loc[:date].values[-1][-1])
-                dates_to_add.append(date)
-            except:
-                pass
-        df = pd.DataFrame({ticker+'_close': values}, index=dates_to_add)
-        df = df.loc[open_date:close_date]
-        self._DATA = pd.concat([df, self._DATA], axis=1)
+        response = self._http_get(self._bcb_url(code, open_date, close_date))
+        return self._parse_bcb(self._bcb_observations(response, ticker), ticker+'_close',
+                               open_date, close_date)
+
+    def _fetch_bcb(self, ticker, open_date, close_date, interval='1d'):
+        """
+        Fetches a Brazilian Central Bank series: CDI, PIBBR or one of the SGS series.
+
+        Args:
+            ticker (str): The ticker symbol.
+            open_date (datetime): The start date of the data.
+            close_date (datetime): The end date of the data.
+            interval (str): The data interval. Only '1d' is served.
+
+        Returns:
+            pd.DataFrame: The TICKER_close column, forward-filled onto business days.
+        """
+        if ticker == 'CDI':
+            return self._fetch_CDI(open_date, close_date)
+        elif ticker == 'PIBBR':
+            return self._fetch_PIB_BR(open_date, close_date)
+        return self._fetch_sgs(ticker, open_date, close_date)
 
     def _fetch_yf(self, ticker: str, open_date, close_date, interval='1d'):
         """
-        Fetches historical price data for a ticker from Yahoo Finance and updates the _DATA DataFrame.
+        Fetches historical price data for a ticker from Yahoo Finance.
 
         Args:
             ticker (str): The ticker symbol.
@@ -160,174 +372,547 @@ class Database(DatabaseComponents, metaclass = Singleton):
             interval (str): The data interval. Defaults to '1d'.
 
         Returns:
-            bool: True if data was successfully fetched, False otherwise.
+            pd.DataFrame or None: The candles of the ticker, or None if no data was found.
+        """
+        return self._download_yf(ticker, open_date, close_date, interval)[0]
+
+    def _fetch_yf_batch(self, symbols, open_date, close_date, interval='1d'):
+        """
+        Fetches historical price data for several tickers with batched, threaded Yahoo Finance downloads.
+
+        Args:
+            symbols (dict): A dictionary mapping each ticker to the Yahoo Finance symbol to download.
+            open_date (datetime): The start date of the data.
+            close_date (datetime): The end date of the data.
+            interval (str): The data interval. Defaults to '1d'.
+
+        Returns:
+            dict: A dictionary mapping each ticker found to its candles.
         """
-        ticker_yf = ticker+'.SA'
-        if ticker == 'IBOV':
-            ticker_yf = "^BVSP"
-        elif ticker == 'DJI':
-            ticker_yf = "^DJI"
-        elif ticker == 'SPX':
-            ticker_yf = "^GSPC"
-        elif ticker == 'NASDAQ':
-            ticker_yf = "^IXIC"
         close_to_seek = close_date + timedelta(days=10)
-        candles = yf.download(tickers=ticker_yf,
-                              start=open_date, end=close_to_seek, progress=False, show_errors=False)
-        if len(candles) == 0:
-            ticker_yf = ticker
-            candles = yf.download(tickers=ticker_yf,
-                                  start=open_date, end=close_to_seek, progress=False, show_errors=False)
+        found = {}
+        items = list(symbols.items())
+        for position in range(0, len(items), YF_BATCH_SIZE):
+            batch = dict(items[position:position+YF_BATCH_SIZE])
+            candles = self._yf_download(tickers=list(batch.values()), start=open_date, end=close_to_seek,
+                                  interval=interval, group_by='ticker', threads=True, progress=False,
+                                  show_errors=False)
             if len(candles) == 0:
-                return False
-        candles = candles.rename(
-            columns={'Open': ticker+'_open', 'High': ticker + '_high',
-                     'Low': ticker + '_low', 'Adj Close': ticker + '_close',
-                     'Volume': ticker + '_volume'})
-        candles.index.names = ['date']
-        candles = candles.tz_localize(None)
-        candles = candles[[ticker+'_close', ticker+'_open',
-                           ticker+'_high', ticker+'_low', ticker+'_volume']]
-        self._DATA = pd.concat([candles, self._DATA], axis=1)
-        return True
+                continue
+            if not isinstance(candles.columns, pd.MultiIndex):
+                candles = pd.concat({list(batch.values())[0]: candles}, axis=1)
+            available = set(candles.columns.get_level_values(0))
+            for ticker, symbol in batch.items():
+                if symbol not in available:
+                    continue
+                ticker_candles = candles[symbol].dropna(how='all')
+                if len(ticker_candles) == 0:
+                    continue
+                found[ticker] = self._format_candles(ticker_candles, ticker)
+        return found
 
-    def _fetch_brapi(self, ticker: str, open_date, close_date):
+    def _fetch_yf_group(self, tickers, open_date, close_date, interval='1d'):
         """
-        Fetches historical price data for a ticker from the BRAPI API and updates the _DATA DataFrame.
+        Fetches a group of tickers from Yahoo Finance, first with their Yahoo symbols and then,
+        for the ones missing, with their raw names.
 
         Args:
-            ticker (str): The ticker symbol.
+            tickers (list): The ticker symbols.
             open_date (datetime): The start date of the data.
             close_date (datetime): The end date of the data.
+            interval (str): The data interval. Defaults to '1d'.
 
         Returns:
-            bool: True if data was successfully fetched, False otherwise.
+            dict: A dictionary mapping each ticker found to its candles.
         """
-        url_request = (
-            f"https://brapi.dev/api/quote/{ticker}?=max&interval=1d&fundamental=false")
-        rqst = requests.get(url_request)
-        obj = json.loads(rqst.text)
-        error = obj.get('error')
-        if error:
-            return False
-        data = obj['results'][0]['historicalDataPrice']
-        dates = []
-        open = []
-        close = []
-        high = []
-        low = []
-        volume = []
-        for daily_data in data:
-            dates.append(daily_data['date'])
-            open.append(daily_data['open'])
-            close.append(daily_data['Adj Close'])
-            high.append(daily_data['high'])
-            low.append(daily_data['low'])
-            volume.append(daily_data['volume'])
-        dates = [datetime.fromtimestamp(ts) for ts in dates]
-        dates = [dt.replace(hour=0, minute=0, second=0) for dt in dates]
-        dates = pd.to_datetime(dates)
-        info_dct = {
-            'date': dates,
-            ticker+'_open': open,
-            ticker+'_high': high,
-            ticker+'_low': low,
-            ticker+'_close': close,
-            ticker+'_volume': volume,
-        }
-        df = pd.DataFrame(info_dct)
-        df = df.set_index('date')
-        df = df.loc[open_date:close_date]
-        self._DATA = pd.concat([df, self._DATA], axis=1)
-        return True
+        symbols = {ticker: self._yf_symbol(ticker) for ticker in tickers}
+        found = self._fetch_yf_batch(symbols, open_date, close_date, interval)
+        missing = [ticker for ticker in tickers if ticker not in found]
+        if len(missing) > 0:
+            symbols = {ticker: ticker for ticker in missing}
+            found.update(self._fetch_yf_batch(symbols, open_date, close_date, interval))
+        return found
 
-    def _fetch_prices(self, ticker, open_date, close_date):
+    def _ticker_gaps(self, ticker, open_date, close_date):
         """
-        Fetches price data for a ticker using Yahoo Finance first, then BRAPI if Yahoo fails, and updates the _DATA DataFrame.
+        Works out the date ranges of a ticker that were not fetched yet, loading it from the
+        shared data plane, the on-disk cache or the spill directory first if they are enabled.
 
         Args:
             ticker (str): The ticker symbol.
             open_date (datetime): The start date of the data.
             close_date (datetime): The end date of the data.
 
+        Returns:
+            tuple: The list of (start, close) gaps and whether the ticker already had data.
+        """
+        if ticker not in self._seeken_dates.keys():
+            if not self._load_from_shared(ticker) and not self._load_from_store(ticker):
+                self._load_from_spill(ticker)
+        had_data = ticker in self._seeken_dates.keys()
+        if had_data:
+            gaps = missing_ranges(
+                self._seeken_dates[ticker]['ranges'], open_date, close_date)
+        else:
+            gaps = [(open_date, close_date)]
+        return gaps, had_data
+
+    def _plan_fetches(self, tickers, open_date, close_date):
+        """
+        Plans every download needed to serve a request.
+
+        Every missing range is routed to the first source of the ticker. Tickers sharing a
+        range and a route are grouped in a single job when the source can fetch them in a
+        batch; every other ticker gets a job of its own. The ranges already being downloaded
+        by a concurrent request are left out and waited for instead.
+
+        Args:
+            tickers (list): The requested ticker names, possibly with transformation prefixes.
+            open_date (datetime): The start date of the data.
+            close_date (datetime): The end date of the data.
+
+        Returns:
+            tuple: The list of jobs, a dictionary telling whether each ticker already had data,
+                the flights claimed for the jobs and the futures of the concurrent downloads.
+
         Raises:
-            ValueError: If data could not be fetched from both Yahoo Finance and BRAPI.
+            Exception: If no registered source serves one of the tickers.
         """
-        data_to_fetch = {
-            'ticker': ticker,
-            'open_date': open_date,
-            'close_date': close_date
-        }
-        yahoo = self._fetch_yf(**data_to_fetch)
-        if not yahoo:
-            brapi = self._fetch_brapi(**data_to_fetch)
-            if not brapi:
-                self._seeken_dates.pop(ticker)
-                raise Exception("""No data found for {}!""".format(ticker))
+        requested = {}
+        for ticker in tickers:
+            ticker_data = self._check_index(ticker)
+            open_to_fetch = open_date
+            if ticker_data['previous_days'] is not None:
+                open_to_fetch = open_date - timedelta(days=ticker_data['previous_days'])
+            raw_ticker = ticker_data['ticker']
+            if raw_ticker in requested:
+                open_to_fetch = min(open_to_fetch, requested[raw_ticker][1])
+            requested[raw_ticker] = (ticker_data, open_to_fetch)
+        routes = {ticker: self._route(ticker_data) for ticker, (ticker_data, _) in requested.items()}
+        pending = []
+        had_data = {}
+        claimed = []
+        waits = []
+        for ticker, (ticker_data, open_to_fetch) in requested.items():
+            resident = ticker in self._seeken_dates
+            gaps, had_data[ticker] = self._ticker_gaps(ticker, open_to_fetch, close_date)
+            self._record_access(resident and len(gaps) == 0)
+            gaps, ticker_claimed, ticker_waits = self._inflight.claim(
+                ticker, open_to_fetch, close_date, gaps)
+            claimed += ticker_claimed
+            waits += ticker_waits
+            forward_filled = self._ticker_kind(ticker_data) == 'macro'
+            for gap_open, gap_close in gaps:
+                fetch_open = gap_open
+                if had_data[ticker] and forward_filled:
+                    fetch_open = gap_open - timedelta(days=MACRO_LOOKBACK_DAYS)
+                pending.append((ticker, (gap_open, gap_close), (fetch_open, gap_close), routes[ticker],
+                                None))
+        return self._source_jobs(pending), had_data, claimed, waits
 
-    def _fetch_currencies(self, ticker, open_date, close_date):
+    def _source_jobs(self, pending):
         """
-        Fetches currency exchange rate data using Yahoo Finance and updates the _DATA DataFrame.
+        Builds the jobs fetching missing ranges from the first source of their route.
 
         Args:
-            ticker (str): The ticker symbol for the currency.
+            pending (list): The (ticker, gap, fetched range, route, previous error) of every
+                missing range. The previous error is the one raised by the sources already
+                tried, if any.
+
+        Returns:
+            list: The jobs, with the sources left to try in their 'fallbacks'.
+        """
+        jobs = []
+        batches = {}
+        for ticker, gap, fetch_range, route, error in pending:
+            source = route[0]
+            if source.batch is not None:
+                key = (tuple(candidate.name for candidate in route), gap, fetch_range)
+                batch = batches.setdefault(key, (route, gap, fetch_range, [], {}))
+                batch[3].append(ticker)
+                batch[4][ticker] = error
+                continue
+            jobs.append(self._source_job(route, [ticker], gap, fetch_range, {ticker: error}))
+        for route, gap, fetch_range, group, errors in batches.values():
+            jobs.append(self._source_job(route, group, gap, fetch_range, errors))
+        return jobs
+
+    def _source_job(self, route, tickers, gap, fetch_range, previous_errors):
+        """
+        Builds the job fetching tickers from the first source of a route.
+
+        Args:
+            route (list): The sources to try, in order.
+            tickers (list): The ticker symbols.
+            gap (tuple): The missing range recorded once the job succeeds.
+            fetch_range (tuple): The range actually downloaded.
+            previous_errors (dict): The error raised for each ticker by the sources already
+                tried, or None.
+
+        Returns:
+            dict: The job.
+        """
+        source = route[0]
+        job = {'source': source.pool, 'tickers': tickers, 'gap': gap, 'fallbacks': route[1:],
+               'previous_errors': previous_errors,
+               'function': self._fetch_from, 'args': (source, tickers) + fetch_range}
+        if source.afetch is not None and source.batch is None:
+            job['coroutine'] = self._afetch_from
+        return job
+
+    def _plan_fallbacks(self, outcomes):
+        """
+        Plans a job on the next source of their route for every ticker missing from a job.
+
+        Args:
+            outcomes (list): The outcomes of the planned jobs.
+
+        Returns:
+            list: The fallback jobs.
+        """
+        pending = []
+        for outcome in outcomes:
+            job = outcome['job']
+            if len(job['fallbacks']) == 0:
+                continue
+            found = outcome['result'] or {}
+            for ticker in job['tickers']:
+                df = found.get(ticker)
+                if df is None or len(df) == 0:
+                    error = outcome['error'] or job['previous_errors'].get(ticker)
+                    pending.append((ticker, job['gap'], job['args'][2:], job['fallbacks'], error))
+        return self._source_jobs(pending)
+
+    def _merge_outcomes(self, outcomes, had_data):
+        """
+        Merges the results of the fetch jobs into the storage and records the fetched ranges.
+
+        A range is only recorded once it downloaded, or once every source answered it
+        without data. A range whose last source failed is left missing, so the next
+        request fetches it again, and the error is raised once the other ranges are merged.
+
+        Args:
+            outcomes (list): The outcomes of the jobs, including the fallback ones.
+            had_data (dict): Whether each ticker already had data before the request.
+
+        Raises:
+            Exception: If no data is found for a ticker that was not stored yet, or if the
+                download of a missing range fails.
+        """
+        tickers = [ticker for outcome in outcomes for ticker in outcome['job']['tickers']]
+        with self._tickers_locked(tickers):
+            not_found = []
+            failed = []
+            errors = []
+            fetched = set()
+            for outcome in outcomes:
+                job = outcome['job']
+                result = outcome['result']
+                for ticker in job['tickers']:
+                    df = (result or {}).get(ticker)
+                    error = outcome['error'] or job['previous_errors'].get(ticker)
+                    if df is not None and len(df) > 0:
+                        self._merge_data(df)
+                        fetched.add(ticker)
+                    elif len(job['fallbacks']) > 0:
+                        continue
+                    elif not had_data[ticker]:
+                        not_found.append(ticker)
+                        if error is not None:
+                            errors.append(error)
+                        continue
+                    elif error is not None:
+                        failed.append(ticker)
+                        errors.append(error)
+                        continue
+                    self._add_seeken_dates(ticker, *job['gap'])
+            for ticker in fetched:
+                self._save_to_store(ticker)
+            error = errors[0] if len(errors) > 0 else None
+            if len(not_found) > 0:
+                raise Exception("""No data found for {}!""".format(not_found)) from error
+            if len(failed) > 0:
+                raise Exception("""Download failed for {}!""".format(failed)) from error
+
+    def _prefetch(self, tickers, open_date, close_date):
+        """
+        Fetches the missing ranges of every requested ticker before they are added one by one.
+
+        The planned jobs run concurrently on the fetch scheduler. Tickers missing from a job, or
+        whose job failed, fall back to the next source of their route in another round, until
+        every route is exhausted. All the results are merged into
+        the storage at the end. The ranges claimed in the in-flight registry are then released
+        and the ranges claimed by concurrent requests are waited for, so identical concurrent
+        requests share a single download. The tickers are only locked while planning and merging.
+
+        Args:
+            tickers (list): The requested ticker names, possibly with transformation prefixes.
             open_date (datetime): The start date of the data.
             close_date (datetime): The end date of the data.
+
+        Raises:
+            Exception: If no data is found for a ticker that was not stored yet.
         """
-        splited_ticker = ticker.split('/')
-        ticker_to_fetch = splited_ticker[0]+splited_ticker[1]+'=X'
-        days_to_seek = (pd.to_datetime(date.today()) - open_date).days + 10
-        data = yf.download(
-            ticker_to_fetch, period=f"{str(days_to_seek)}d", progress=False)
-        data = data.rename(
-            columns={'Open': ticker+'_open', 'High': ticker + '_high',
-                     'Low': ticker + '_low', 'Close': ticker + '_close',
-                     'Volume': ticker + '_volume'})
-        data.index.names = ['date']
-        data = data.tz_localize(None)
-        data = data[[ticker+'_close', ticker+'_open',
-                     ticker+'_high', ticker+'_low', ticker+'_volume']]
-        self._DATA = pd.concat([data, self._DATA], axis=1)
+        jobs, had_data, claimed, waits = self._plan_locked(tickers, open_date, close_date)
+        try:
+            outcomes = []
+            while len(jobs) > 0:
+                round_outcomes = self._scheduler.run(jobs)
+                outcomes += round_outcomes
+                jobs = self._plan_fallbacks(round_outcomes)
+            self._merge_outcomes(outcomes, had_data)
+        except Exception as error:
+            self._inflight.release(claimed, error)
+            raise
+        self._inflight.release(claimed)
+        self._inflight.wait(waits)
 
-    def _check_index(self, ticker):
+    def _plan_locked(self, tickers, open_date, close_date):
         """
-        Checks the type of ticker and returns the configuration for fetching data.
+        Plans the fetches of a request while holding the locks of its tickers.
+
+        Args:
+            tickers (list): The requested ticker names, possibly with transformation prefixes.
+            open_date (datetime): The start date of the data.
+            close_date (datetime): The end date of the data.
+
+        Returns:
+            tuple: The jobs, had_data, claimed ranges and waits returned by _plan_fetches.
+        """
+        raw_tickers = [self._check_index(ticker)['ticker'] for ticker in tickers]
+        with self._tickers_locked(raw_tickers), self._instrumentation.span('plan'):
+            return self._plan_fetches(tickers, open_date, close_date)
+
+    async def _in_executor(self, function, *args, **kwargs):
+        """
+        Runs blocking work, such as disk loads, merges or synchronous downloads, on the
+        default executor, in a copy of the current context so its events keep the call id.
+
+        Args:
+            function (callable): The function to run.
+            *args: Its positional arguments.
+            **kwargs: Its keyword arguments.
+
+        Returns:
+            object: The value returned by the function.
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, contextvars.copy_context().run,
+                                          functools.partial(function, *args, **kwargs))
+
+    async def _arun_job(self, job):
+        """
+        Runs a fetch job on the event loop.
+
+        Jobs with a native coroutine share the pooled asynchronous HTTP client and are bounded
+        by a per-source semaphore. The others, such as the Yahoo Finance downloads, run on the
+        default executor through the fetch scheduler, so its source limits still apply.
+
+        Args:
+            job (dict): The job to run.
+
+        Returns:
+            object: The value returned by the job.
+        """
+        if 'coroutine' not in job:
+            return await self._in_executor(self._scheduler.run_job, job)
+        self._async_client()
+        semaphores = self._async_state['semaphores']
+        if job['source'] not in semaphores:
+            limit = self._scheduler.source_limits.get(job['source'], self._scheduler.max_workers)
+            semaphores[job['source']] = asyncio.Semaphore(limit)
+        async with semaphores[job['source']]:
+            return await job['coroutine'](*job['args'])
+
+    async def _arun_jobs(self, jobs):
+        """
+        Runs fetch jobs concurrently on the event loop.
+
+        Args:
+            jobs (list): The jobs to run.
+
+        Returns:
+            list: One outcome per job, with the 'job', its 'result' and the 'error' it raised, if any.
+        """
+        results = await asyncio.gather(*[self._arun_job(job) for job in jobs],
+                                       return_exceptions=True)
+        outcomes = []
+        for job, result in zip(jobs, results):
+            if isinstance(result, Exception):
+                outcomes.append({'job': job, 'result': None, 'error': result})
+            else:
+                outcomes.append({'job': job, 'result': result, 'error': None})
+        return outcomes
+
+    async def _aprefetch(self, tickers, open_date, close_date):
+        """
+        Asynchronous version of _prefetch. The planning, which may load series from disk,
+        and the merge run on the default executor, so the ticker locks are never taken on
+        the event loop.
+
+        Args:
+            tickers (list): The requested ticker names, possibly with transformation prefixes.
+            open_date (datetime): The start date of the data.
+            close_date (datetime): The end date of the data.
+
+        Raises:
+            Exception: If no data is found for a ticker that was not stored yet.
+        """
+        jobs, had_data, claimed, waits = await self._in_executor(
+            self._plan_locked, tickers, open_date, close_date)
+        try:
+            outcomes = []
+            while len(jobs) > 0:
+                round_outcomes = await self._arun_jobs(jobs)
+                outcomes += round_outcomes
+                jobs = self._plan_fallbacks(round_outcomes)
+            await self._in_executor(self._merge_outcomes, outcomes, had_data)
+        except Exception as error:
+            self._inflight.release(claimed, error)
+            raise
+        self._inflight.release(claimed)
+        await asyncio.gather(*[asyncio.wrap_future(future) for future in waits],
+                             return_exceptions=True)
+
+    async def _afetch_CDI(self, open_date, close_date):
+        """
+        Asynchronous version of _fetch_CDI.
+        """
+        response = await self._aget(self._bcb_url(11, open_date, close_date))
+        return self._parse_bcb(self._bcb_observations(response, 'CDI'), 'CDI_close',
+                               open_date, close_date)
+
+    async def _afetch_PIB_BR(self, open_date, close_date):
+        """
+        Asynchronous version of _fetch_PIB_BR.
+        """
+        response = await self._aget(self._bcb_url(24363, open_date, close_date))
+        return self._parse_bcb(self._bcb_observations(response, 'PIBBR'), 'PIBBR_close',
+                               open_date, close_date)
+
+    async def _afetch_sgs(self, ticker, open_date, close_date):
+        """
+        Asynchronous version of _fetch_sgs.
+        """
+        code = SGS_INFO[ticker]
+        response = await self._aget(self._bcb_url(code, open_date, close_date))
+        return self._parse_bcb(self._bcb_observations(response, ticker), ticker+'_close',
+                               open_date, close_date)
+
+    async def _afetch_bcb(self, ticker, open_date, close_date, interval='1d'):
+        """
+        Asynchronous version of _fetch_bcb.
+        """
+        if ticker == 'CDI':
+            return await self._afetch_CDI(open_date, close_date)
+        elif ticker == 'PIBBR':
+            return await self._afetch_PIB_BR(open_date, close_date)
+        return await self._afetch_sgs(ticker, open_date, close_date)
+
+    async def _afetch_brapi(self, ticker, open_date, close_date, interval='1d'):
+        """
+        Asynchronous version of _fetch_brapi.
+        """
+        obj = await self._aget_json(self._brapi_url(ticker, open_date))
+        return self._parse_brapi(obj, ticker, open_date, close_date)
+
+    def _fetch_brapi(self, ticker: str, open_date, close_date, interval='1d'):
+        """
+        Fetches historical price data for a ticker from the BRAPI API.
+
+        Args:
+            ticker (str): The ticker symbol.
+            open_date (datetime): The start date of the data.
+            close_date (datetime): The end date of the data.
+            interval (str): The data interval. Only '1d' is served.
+
+        Returns:
+            pd.DataFrame or None: The prices of the ticker, or None if no data was found.
+        """
+        rqst = self._http_get(self._brapi_url(ticker, open_date))
+        return self._parse_brapi(json.loads(rqst.text), ticker, open_date, close_date)
+
+    def _brapi_url(self, ticker, open_date):
+        """
+        Builds the BRAPI quote URL with the smallest range that reaches back to open_date.
+
+        BRAPI ranges are counted back from today, so the range only depends on how old the
+        first requested date is. Requests older than ten years fall back to the full history.
 
         Args:
             ticker (str): The ticker symbol.
+            open_date (datetime): The start date of the data.
 
         Returns:
-            tuple: Configuration details, such as whether the data is for an index, currency, etc.
-        """
-        info_dct = {'ticker': ticker, 'transf': None,
-                    'get_prices': True, 'previous_days': None, 'currencies': False}
-        ticker_splitted = ticker.split('_')
-        if ticker_splitted[0][:3] == 'VOL':
-            info_dct['ticker'] = ticker_splitted[1]
-            info_dct['transf'] = 'VOL'
-            info_dct['periods'] = int(ticker_splitted[0][3:])
-            info_dct['previous_days'] = (int(ticker_splitted[0][3:])+150)
-        elif ticker_splitted[0] == 'RET' or ticker_splitted[0] == 'LRET':
-            info_dct['ticker'] = ticker_splitted[1]
-            info_dct['transf'] = ticker_splitted[0]
-            info_dct['previous_days'] = None
-        elif ticker_splitted[0] == 'CRET' or ticker_splitted[0] == 'CLRET':
-            info_dct['ticker'] = ticker_splitted[1]
-            info_dct['transf'] = ticker_splitted[0]
-            info_dct['previous_days'] = None
-        is_currency = len(ticker.split('/')) > 1
-        if is_currency:
-            info_dct['currencies'] = True
-        is_cdi = ticker_splitted[-1] == 'CDI'
-        is_pib = ticker_splitted[-1] == 'PIBBR'
-        is_sgs = ticker_splitted[-1] in SGS_INFO
-        if is_cdi or is_currency or is_pib or is_sgs:
-            info_dct['get_prices'] = False
-        return info_dct
+            str: The URL returning the daily prices of the ticker as JSON.
+        """
+        days = (pd.Timestamp.today().normalize() - pd.Timestamp(open_date)).days
+        range_ = 'max'
+        for name, length in BRAPI_RANGES:
+            if days < length:
+                range_ = name
+                break
+        return f"https://brapi.dev/api/quote/{ticker}?range={range_}&interval=1d&fundamental=false"
+
+    def _parse_brapi(self, obj, ticker, open_date, close_date):
+        """
+        Converts the JSON returned by the BRAPI quote endpoint into a price DataFrame.
+
+        Args:
+            obj (dict): The decoded response.
+            ticker (str): The ticker symbol.
+            open_date (datetime): The start date of the data.
+            close_date (datetime): The end date of the data.
+
+        Returns:
+            pd.DataFrame or None: The prices of the ticker, or None if the response is an error.
+        """
+        error = obj.get('error')
+        if error:
+            return None
+        with self._instrumentation.span('parse', source='brapi'):
+            data = pd.DataFrame.from_records(obj['results'][0]['historicalDataPrice'])
+            if data.empty:
+                return None
+            dates = pd.to_datetime(data['date'].to_numpy(), unit='s').normalize()
+            df = pd.DataFrame({
+                ticker+'_open': data['open'].to_numpy(),
+                ticker+'_high': data['high'].to_numpy(),
+                ticker+'_low': data['low'].to_numpy(),
+                ticker+'_close': data['Adj Close'].to_numpy(),
+                ticker+'_volume': data['volume'].to_numpy(),
+            }, index=pd.DatetimeIndex(dates, name='date'))
+            df = df.loc[open_date:close_date]
+        return df
+
+    def _fetch_currencies(self, ticker, open_date, close_date, interval='1d'):
+        """
+        Fetches currency exchange rate data using Yahoo Finance.
+
+        Args:
+            ticker (str): The ticker symbol for the currency.
+            open_date (datetime): The start date of the data.
+            close_date (datetime): The end date of the data.
+            interval (str): The data interval. Defaults to '1d'.
+
+        Returns:
+            pd.DataFrame: The close, open, high, low and volume columns of the currency pair.
+        """
+        splited_ticker = ticker.split('/')
+        ticker_to_fetch = splited_ticker[0]+splited_ticker[1]+'=X'
+        days_to_seek = (pd.to_datetime(date.today()) - open_date).days + 10
+        data = self._yf_download(
+            ticker_to_fetch, period=f"{str(days_to_seek)}d", interval=interval, progress=False)
+        return self._format_candles(data, ticker, 'Close')
 
     def _allow_changes(self, ticker, open_date, close_date):
         """
-        Checks if the data for the specified ticker and date range needs to be updated.
+        Checks which parts of the specified date range still need to be fetched for a ticker.
+
+        The ticker is loaded from the on-disk cache first, if it is enabled. Only the
+        sub-ranges not covered by previous fetches are returned as gaps, so the data
+        already stored is kept and the new data is spliced into it. Nothing is recorded
+        as fetched here: every gap is recorded once its download succeeds.
 
         Args:
             ticker (str): The ticker symbol.
@@ -335,110 +920,99 @@ class Database(DatabaseComponents, metaclass = Singleton):
             close_date (datetime): The end date of the data.
 
         Returns:
-            tuple: Contains a boolean indicating if data should be fetched, and the adjusted open and close dates.
+            dict: Contains a boolean indicating if data should be changed, the gaps to fetch,
+                whether the ticker already had data and the requested range, extended by
+                the lookback of the transformation.
         """
         ticker_data = self._check_index(ticker)
         if ticker_data['previous_days'] is not None:
             open_date = pd.to_datetime(
                 open_date) - timedelta(days=(ticker_data['previous_days']))
+        open_date = pd.to_datetime(open_date)
+        close_date = pd.to_datetime(close_date)
         ticker = ticker_data['ticker']
-        if ticker in self._seeken_dates.keys():
-            previous_than_start = self._seeken_dates[ticker]['start'] > pd.to_datetime(
-                open_date)
-            after_close = self._seeken_dates[ticker]['close'] < pd.to_datetime(
-                close_date)
-            there_is_transf = ticker_data['transf'] is not None
-            if previous_than_start or after_close or there_is_transf:
-                self._DATA = self._DATA.drop(columns=[ticker+'_close'])
-                try:
-                    self._DATA = self._DATA.drop(columns=[ticker+'_open',
-                                                          ticker+'_high', ticker+'_low', ticker+'_volume'])
-                except:
-                    pass
-                try:
-                    self._DATA = self._DATA.drop(
-                        columns=[ticker_data['transf']+'_'+ticker+'_close'])
-                except:
-                    pass
-                try:
-                    self._DATA = self._DATA.drop(
-                        columns=[ticker_data['transf']+str(ticker_data['periods'])+'_'+ticker+'_close'])
-                except:
-                    pass
-                open_date = min(
-                    self._seeken_dates[ticker]['start'], pd.to_datetime(open_date))
-                close_date = max(
-                    self._seeken_dates[ticker]['close'], pd.to_datetime(close_date))
-                self._add_seeken_dates(ticker, open_date, close_date)
-                return {'changes': True, 'open_date': open_date, 'close_date': close_date}
-            else:
-                return {'changes': False}
-        self._add_seeken_dates(ticker, open_date, close_date)
-        return {'changes': True, 'open_date': open_date, 'close_date': close_date}
+        gaps, had_data = self._ticker_gaps(ticker, open_date, close_date)
+        if len(gaps) == 0 and ticker_data['transf'] is None:
+            return {'changes': False}
+        return {'changes': True, 'gaps': gaps, 'had_data': had_data,
+                'open_date': open_date, 'close_date': close_date}
 
-    def _add_assets(self, ticker: str, open_date, close_date):
+    def _add_assets(self, ticker: str, open_date, close_date, coalesce=True):
         """
-        Adds the data for the specified ticker and date range to the internal DataFrame (_DATA).
+        Adds the data for the specified ticker and date range to the internal series storage.
+
+        Only the missing sub-ranges are fetched, and each one is recorded as fetched once its
+        download succeeds, so a failed download is retried by the next request. Forward-filled
+        macro series are fetched with MACRO_LOOKBACK_DAYS of extra history, so the first days
+        of a gap can be filled. The sub-ranges already being downloaded by a concurrent request
+        are waited for instead of being fetched again, unless coalesce is False.
 
         Args:
             ticker (str): The ticker symbol.
             open_date (datetime): The start date of the data.
             close_date (datetime): The end date of the data.
+            coalesce (bool): Whether to claim the gaps in the in-flight registry and wait for
+                the overlapping downloads of other requests. Defaults to True.
+
+        Returns:
+            dict or None: The transformation still to be computed by _apply_transforms,
+                or None if the ticker has no transformation.
 
         Raises:
-            ValueError: If the ticker is not recognized.
+            Exception: If no data is found for a ticker that was not stored yet, or if the
+                download of a missing range fails.
         """
-        changes_data = self._allow_changes(ticker, open_date, close_date)
-        if not changes_data['changes']:
-            return
         ticker_data = self._check_index(ticker)
-        open_date = changes_data['open_date']
-        close_date = changes_data['close_date']
+        with self._ticker_lock(ticker_data['ticker']), self._instrumentation.span('allow_changes'):
+            changes_data = self._allow_changes(ticker, open_date, close_date)
+            if not changes_data['changes']:
+                return None
+            gaps, claimed, waits = changes_data['gaps'], [], []
+            if coalesce:
+                gaps, claimed, waits = self._inflight.claim(
+                    ticker_data['ticker'], changes_data['open_date'], changes_data['close_date'],
+                    changes_data['gaps'])
         ticker = ticker_data['ticker']
-        if ticker_data['get_prices']:
-            self._fetch_prices(ticker, open_date, close_date)
-        if ticker_data['currencies']:
-            self._fetch_currencies(ticker, open_date, close_date)
-        elif ticker_data['ticker'] == 'CDI':
-            self._fetch_CDI(open_date, close_date)
-        elif ticker_data['ticker'] == 'PIBBR':
-            self._fetch_PIB_BR(open_date, close_date)
-        elif ticker_data['ticker'] in SGS_INFO:
-            self._fetch_sgs(ticker_data['ticker'], open_date, close_date)
-        df = None
-        data = self._DATA[[ticker+'_close']].dropna()
-        if ticker_data['transf'] == 'VOL':
-            df = self._fetch_volatility(
-                data, ticker_data['periods'], open_date, close_date)
-        elif ticker_data['transf'] == 'RET':
-            df = self._fetch_returns(data, open_date, close_date)
-        elif ticker_data['transf'] == 'LRET':
-            df = self._fetch_log_returns(data, open_date, close_date)
-        elif ticker_data['transf'] == 'CRET':
-            data = data.loc[open_date:close_date]
-            df = self._fetch_cumulated_returns(data, open_date, close_date)
-        elif ticker_data['transf'] == 'CLRET':
-            data = data.loc[open_date:close_date]
-            df = self._fetch_cumulated_log_returns(data, open_date, close_date)
-        if df is not None:
-            self._DATA = pd.concat([df, self._DATA], axis=1)
+        forward_filled = self._ticker_kind(ticker_data) == 'macro'
+        try:
+            for gap_open, gap_close in gaps:
+                fetch_open = gap_open
+                if changes_data['had_data'] and forward_filled:
+                    fetch_open = gap_open - timedelta(days=MACRO_LOOKBACK_DAYS)
+                df = self._fetch_routed(ticker_data, fetch_open, gap_close)
+                if df is None and not changes_data['had_data']:
+                    raise Exception("""No data found for {}!""".format(ticker))
+                with self._ticker_lock(ticker):
+                    if df is not None:
+                        self._merge_data(df)
+                    self._add_seeken_dates(ticker, gap_open, gap_close)
+        except Exception as error:
+            self._inflight.release(claimed, error)
+            raise
+        self._inflight.release(claimed)
+        errors = self._inflight.wait(waits)
+        with self._ticker_lock(ticker):
+            if len(gaps) > 0:
+                self._save_to_store(ticker)
+            covering = self._covering_range(ticker, changes_data['open_date'], changes_data['close_date'])
+        if covering is None:
+            if len(errors) > 0:
+                raise errors[0]
+            raise Exception("""No data found for {}!""".format(ticker))
+        if ticker_data['transf'] is not None:
+            return {'ticker_data': ticker_data, 'open_date': covering[0], 'close_date': covering[1]}
 
-    def get_info(self, 
-            tickers, 
-            open_date: str = None, 
-            close_date: str = None, 
-            info='close' or 'ohlcv'):
+    def _prepare_request(self, tickers, open_date, close_date):
         """
-        Retrieves the specified information (e.g., 'close', 'ohlcv') for a list of tickers.
+        Normalizes the arguments of get_info.
 
         Args:
-            tickers (list): List of ticker symbols.
-            open_date (str, optional): Start date for the data. Defaults to None.
-            close_date (str, optional): End date for the data. Defaults to None.
-            info (str): The type of information to retrieve. Defaults to 'close'.
+            tickers (list or str): The ticker symbols.
+            open_date (str): Start date for the data, or None.
+            close_date (str): End date for the data, or None.
 
         Returns:
-            pd.DataFrame: DataFrame containing the requested data.
+            tuple: The upper-cased ticker list and the open and close timestamps.
         """
         if close_date is None:
             close_date = pd.to_datetime(date.today())
@@ -448,40 +1022,124 @@ class Database(DatabaseComponents, metaclass = Singleton):
         close_date = pd.to_datetime(close_date)
         if type(tickers) is str:
             tickers = [tickers]
+        tickers = [ticker.upper() for ticker in tickers]
+        return tickers, open_date, close_date
+
+    def _build_info(self, tickers, open_date, close_date, info, coalesce=True):
+        """
+        Adds every ticker to the storage, computes the requested transformations
+        together and assembles the requested columns.
+
+        Args:
+            tickers (list): The upper-cased ticker symbols.
+            open_date (datetime): Start date for the data.
+            close_date (datetime): End date for the data.
+            info (str): The type of information to retrieve.
+            coalesce (bool): Whether the downloads left to _add_assets join the in-flight
+                registry. It is False on the event loop, where waiting for a flight owned
+                by another coroutine would block the loop.
+
+        Returns:
+            pd.DataFrame: DataFrame containing the requested data.
+        """
         tickers_to_display = []
+        pending = []
         for ticker in tickers:
-            ticker = ticker.upper()
-            self._add_assets(ticker, open_date, close_date)
+            transform = self._add_assets(ticker, open_date, close_date, coalesce)
+            if transform is not None:
+                pending.append(transform)
             if info == 'ohlcv':
                 tickers_to_display += [ticker+'_open', ticker+'_high',
                                        ticker+'_low', ticker+'_close',
                                        ticker+'_volume']
             else:
                 tickers_to_display += [ticker+'_'+info]
-                
-        try:
-            info_to_return = self._DATA[tickers_to_display].loc[open_date:close_date]
-        except:
-            info_to_return = self._DATA[tickers_to_display].dropna()
-            info_to_return = info_to_return.loc[open_date:close_date]
+        self._apply_transforms(pending)
+        with self._instrumentation.span('slice'):
+            info_to_return = self._storage.get(tickers_to_display).loc[open_date:close_date]
+        self._instrumentation.count('rows_produced', len(info_to_return))
         if len(info_to_return) == 0:
             raise Exception("""No data found for {}!""".format(tickers))
         return info_to_return
 
+    def get_info(self, 
+            tickers, 
+            open_date: str = None, 
+            close_date: str = None, 
+            info='close' or 'ohlcv'):
+        """
+        Retrieves the specified information (e.g., 'close', 'ohlcv') for a list of tickers.
+
+        Args:
+            tickers (list): List of ticker symbols.
+            open_date (str, optional): Start date for the data. Defaults to None.
+            close_date (str, optional): End date for the data. Defaults to None.
+            info (str): The type of information to retrieve. Defaults to 'close'.
+
+        Returns:
+            pd.DataFrame: DataFrame containing the requested data.
+        """
+        tickers, open_date, close_date = self._prepare_request(tickers, open_date, close_date)
+        with self._instrumentation.call('get_info', database='daily'), \
+                self._request_scope([self._check_index(ticker)['ticker'] for ticker in tickers]):
+            self._prefetch(tickers, open_date, close_date)
+            return self._build_info(tickers, open_date, close_date, info)
+
+    async def aget_info(self,
+            tickers,
+            open_date: str = None,
+            close_date: str = None,
+            info='close' or 'ohlcv'):
+        """
+        Asynchronous version of get_info.
+
+        BRAPI and Brazilian Central Bank series are fetched with a pooled asynchronous HTTP
+        client shared by every call on the running loop. Yahoo Finance downloads, which are
+        blocking, run on the default executor, as do the disk loads, the merges and the
+        assembly of the result, which may fall back to a blocking download if a concurrent
+        fetch it waited for failed.
+
+        Args:
+            tickers (list): List of ticker symbols.
+            open_date (str, optional): Start date for the data. Defaults to None.
+            close_date (str, optional): End date for the data. Defaults to None.
+            info (str): The type of information to retrieve. Defaults to 'close'.
+
+        Returns:
+            pd.DataFrame: DataFrame containing the requested data.
+        """
+        tickers, open_date, close_date = self._prepare_request(tickers, open_date, close_date)
+        keys = [self._check_index(ticker)['ticker'] for ticker in tickers]
+        with self._instrumentation.call('get_info', database='daily'):
+            await self._in_executor(self._begin_request, keys)
+            try:
+                await self._aprefetch(tickers, open_date, close_date)
+                return await self._in_executor(self._build_info, tickers, open_date, close_date,
+                                               info, coalesce=False)
+            finally:
+                await self._in_executor(self._end_request, keys)
+
     def reset(self):
         """
-        Resets the internal data storage (_DATA) and clears the _seeken_dates dictionary.
+        Resets the internal series storage and clears the _seeken_dates dictionary.
+        The spill directory is cleared too. The on-disk cache, if enabled, is left untouched.
         """
-        self._DATA = pd.DataFrame()
-        self._seeken_dates = {}
+        with self._lock:
+            self._storage.clear()
+            self._derived.clear()
+            self._seeken_dates = {}
+            self._budget.clear()
+            if self._spill is not None:
+                self._spill.clear()
 
     @property
     def data(self):
         """
-        Returns the current state of the internal DataFrame storing all the fetched data.
+        Returns a wide DataFrame with all the fetched data. It is assembled lazily
+        from the series storage and rebuilt only after the storage changes.
 
         Returns:
-            pd.DataFrame: The internal _DATA DataFrame.
+            pd.DataFrame: A DataFrame with every stored column.
         """
-        return self._DATA
+        return self._storage.frame
 
@@ -0,0 +1,164 @@
+import time
+import random
+import asyncio
+import threading
+from urllib.parse import urlparse
+import httpx
+import requests
+from requests.adapters import HTTPAdapter
+from .info import (HTTP_TIMEOUT, HTTP_RETRIES, HTTP_BACKOFF, HTTP_BACKOFF_MAX,
+                   HTTP_POOL_SIZE, HTTP_RETRY_STATUSES)
+
+
+class HttpSession:
+    """
+    A pooled HTTP session shared by every request sent to BRAPI and the Brazilian Central Bank.
+
+    Connections are kept alive and reused per host. Every request has a timeout, and
+    connection errors and retryable status codes are retried with exponential backoff
+    and full jitter. A 429 response pauses the whole host, for all threads, for the time
+    given in its Retry-After header, and a minimum interval between requests to the same
+    host can be configured.
+    """
+
+    def __init__(self, timeout: float = HTTP_TIMEOUT, retries: int = HTTP_RETRIES,
+                 backoff: float = HTTP_BACKOFF, backoff_max: float = HTTP_BACKOFF_MAX,
+                 pool_size: int = HTTP_POOL_SIZE, min_interval: dict = None) -> None:
+        """
+        Parameters
+        ----------
+        timeout : float, optional
+            The timeout of every request, in seconds.
+        retries : int, optional
+            The number of retries after the first attempt.
+        backoff : float, optional
+            The base delay of the exponential backoff, in seconds.
+        backoff_max : float, optional
+            The maximum delay between two attempts, in seconds.
+        pool_size : int, optional
+            The number of connections kept alive per host.
+        min_interval : dict, optional
+            The minimum number of seconds between two requests to a host, keyed by host name.
+        """
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.backoff_max = backoff_max
+        self.min_interval = min_interval or {}
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        self._next_request = {}
+        self._lock = threading.Lock()
+
+    def _delay(self, attempt):
+        """
+        Returns the jittered backoff delay before a retry.
+        """
+        return random.uniform(0, min(self.backoff_max, self.backoff * 2 ** attempt))
+
+    def _retry_after(self, response, attempt):
+        """
+        Returns the delay asked by a 429 response, or the backoff delay if it gives none.
+        """
+        try:
+            return min(self.backoff_max, float(response.headers.get('Retry-After')))
+        except (TypeError, ValueError):
+            return self._delay(attempt)
+
+    def _reserve(self, host):
+        """
+        Reserves the next request slot of a host and returns how long to wait for it.
+        """
+        with self._lock:
+            now = time.monotonic()
+            start = max(now, self._next_request.get(host, now))
+            self._next_request[host] = start + self.min_interval.get(host, 0)
+            return start - now
+
+    def _pause(self, host, seconds):
+        """
+        Keeps every thread from sending requests to a host for the given time.
+        """
+        with self._lock:
+            resume = time.monotonic() + seconds
+            self._next_request[host] = max(self._next_request.get(host, 0), resume)
+
+    def get(self, url, params=None, headers=None):
+        """
+        Sends a GET request, retrying on connection errors and retryable status codes.
+
+        Parameters
+        ----------
+        url : str
+            The URL to request.
+        params : dict, optional
+            The query parameters.
+        headers : dict, optional
+            Extra request headers, such as the ones of a conditional request.
+
+        Returns
+        -------
+        requests.Response
+            The last response received.
+
+        Raises
+        ------
+        requests.RequestException
+            If the last attempt fails without a response.
+        """
+        host = urlparse(url).netloc
+        for attempt in range(self.retries + 1):
+            time.sleep(self._reserve(host))
+            try:
+                response = self.session.get(url, params=params, headers=headers,
+                                            timeout=self.timeout)
+            except (requests.ConnectionError, requests.Timeout):
+                if attempt == self.retries:
+                    raise
+                time.sleep(self._delay(attempt))
+                continue
+            if response.status_code not in HTTP_RETRY_STATUSES or attempt == self.retries:
+                return response
+            if response.status_code == 429:
+                self._pause(host, self._retry_after(response, attempt))
+            else:
+                time.sleep(self._delay(attempt))
+        return response
+
+    async def aget(self, client, url, params=None):
+        """
+        Asynchronous version of get, sent with the given httpx client and the same retry policy.
+
+        Parameters
+        ----------
+        client : httpx.AsyncClient
+            The pooled asynchronous client.
+        url : str
+            The URL to request.
+        params : dict, optional
+            The query parameters.
+
+        Returns
+        -------
+        httpx.Response
+            The last response received.
+        """
+        host = urlparse(url).netloc
+        for attempt in range(self.retries + 1):
+            await asyncio.sleep(self._reserve(host))
+            try:
+                response = await client.get(url, params=params, timeout=self.timeout)
+            except httpx.TransportError:
+                if attempt == self.retries:
+                    raise
+                await asyncio.sleep(self._delay(attempt))
+                continue
+            if response.status_code not in HTTP_RETRY_STATUSES or attempt == self.retries:
+                return response
+            if response.status_code == 429:
+                self._pause(host, self._retry_after(response, attempt))
+            else:
+                await asyncio.sleep(self._delay(attempt))
+        return response
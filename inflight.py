@@ -0,0 +1,103 @@
+import threading
+from concurrent.futures import Future, wait
+from .date_ranges import missing_ranges
+
+
+class InflightRegistry:
+    """
+    Keeps track of the date ranges being downloaded for each ticker.
+
+    A request claims the parts of its gaps that nobody is downloading yet and gets
+    the downloads of other requests that overlap its range. It downloads its own
+    parts, releases them, and then waits for the others, so concurrent requests for
+    overlapping ranges share a single download per range.
+    """
+
+    def __init__(self) -> None:
+        self._flights = {}
+        self._lock = threading.Lock()
+
+    def claim(self, key, open_date, close_date, gaps):
+        """
+        Claims the parts of the gaps that are not being downloaded yet.
+
+        Parameters
+        ----------
+        key : hashable
+            The ticker, or the (ticker, interval) pair.
+        open_date : datetime
+            The start date of the requested range.
+        close_date : datetime
+            The end date of the requested range.
+        gaps : list of tuple
+            The (start, close) pairs missing from the storage.
+
+        Returns
+        -------
+        tuple
+            The (start, close) pairs the caller must download, the flights it claimed
+            for them, to be released with release, and the futures of the overlapping
+            downloads of other requests, to be waited with wait. Without gaps, nothing is
+            claimed or waited for.
+        """
+        if len(gaps) == 0:
+            return [], [], []
+        with self._lock:
+            flights = self._flights.get(key, [])
+            waits = [flight['future'] for flight in flights
+                     if flight['open'] <= close_date and flight['close'] >= open_date]
+            busy = [(flight['open'], flight['close']) for flight in flights]
+            own = []
+            for gap_open, gap_close in gaps:
+                if len(busy) == 0:
+                    own.append((gap_open, gap_close))
+                else:
+                    own += missing_ranges(busy, gap_open, gap_close)
+            claimed = [{'key': key, 'open': gap_open, 'close': gap_close, 'future': Future()}
+                       for gap_open, gap_close in own]
+            if len(claimed) > 0:
+                self._flights[key] = flights + claimed
+            return own, claimed, waits
+
+    def release(self, claimed, error=None):
+        """
+        Finishes claimed downloads and wakes up the requests waiting for them.
+
+        Parameters
+        ----------
+        claimed : list of dict
+            The flights returned by claim.
+        error : Exception, optional
+            The error that made the downloads fail, passed on to the waiting requests.
+        """
+        with self._lock:
+            for flight in claimed:
+                flights = self._flights.get(flight['key'], [])
+                if flight in flights:
+                    flights.remove(flight)
+                if len(flights) == 0:
+                    self._flights.pop(flight['key'], None)
+        for flight in claimed:
+            if error is None:
+                flight['future'].set_result(None)
+            else:
+                flight['future'].set_exception(error)
+
+    @staticmethod
+    def wait(futures):
+        """
+        Waits for the downloads of other requests.
+
+        Parameters
+        ----------
+        futures : list of Future
+            The futures returned by claim.
+
+        Returns
+        -------
+        list of Exception
+            The errors of the downloads that failed.
+        """
+        if len(futures) > 0:
+            wait(futures)
+        return [future.exception() for future in futures if future.exception() is not None]
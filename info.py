@@ -1,5 +1,96 @@
 AVAILABLE_TIME_FRAMES =  {"1m", "2m","5m", "15m", "30m", "60m", "90m", "1h", "1d", "5d", "1wk", "1mo", "3mo"}
 
+MACRO_LOOKBACK_DAYS = 400
+
+YF_BATCH_SIZE = 100
+
+FETCH_MAX_WORKERS = 8
+
+# yfinance keeps the result of yf.download in module-level state, so calls to it
+# must not overlap. Its batch downloads are already threaded internally.
+SOURCE_CONCURRENCY = {
+    "yahoo": 1,
+    "brapi": 4,
+    "bcb": 4,
+    "sgs": 4,
+}
+
+# A data source is demoted after this many consecutive failures, or once its smoothed
+# latency per ticker exceeds SOURCE_SLOW_SECONDS, and only used as a fallback for
+# SOURCE_DEMOTION_SECONDS.
+SOURCE_MAX_FAILURES = 3
+
+SOURCE_SLOW_SECONDS = 10
+
+SOURCE_DEMOTION_SECONDS = 300
+
+SOURCE_LATENCY_SMOOTHING = 0.2
+
+YF_SYMBOLS = {
+    "IBOV": "^BVSP",
+    "DJI": "^DJI",
+    "SPX": "^GSPC",
+    "NASDAQ": "^IXIC",
+}
+
+HTTP_TIMEOUT = 30
+
+HTTP_RETRIES = 3
+
+HTTP_BACKOFF = 0.5
+
+HTTP_BACKOFF_MAX = 30
+
+HTTP_POOL_SIZE = 20
+
+HTTP_RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+ASYNC_MAX_CONNECTIONS = 20
+
+DERIVED_CACHE_SIZE = 512
+
+# Bytes of series kept in memory before the least recently used tickers are evicted. None means no limit.
+MEMORY_BUDGET_BYTES = None
+
+SUBSCRIPTION_POLL_SECONDS = 30
+
+# Deliveries a subscription keeps queued for stream. The oldest ones are dropped beyond it.
+SUBSCRIPTION_QUEUE_SIZE = 1024
+
+# Seconds the ticker universe and the sector list are served from the metadata cache
+# before being revalidated with BRAPI.
+METADATA_TTL_SECONDS = 24 * 60 * 60
+
+# Volume rankings of get_most_traded kept per database. The least recently used are dropped beyond it.
+SCREEN_CACHE_SIZE = 64
+
+# Intraday intervals that can be built from finer cached bars, in minutes. The bins are
+# counted from the session open, as Yahoo Finance does, so 90m bars can be built too.
+RESAMPLABLE_INTERVALS = {"1m": 1, "2m": 2, "5m": 5, "15m": 15, "30m": 30, "60m": 60, "1h": 60,
+                         "90m": 90}
+
+# Local time the intraday bars of a Yahoo Finance symbol are counted from, matched against
+# the whole symbol and then its suffix. Symbols of other exchanges are never resampled.
+SESSION_OPENS = {
+    "^BVSP": "10:00",
+    "^DJI": "09:30",
+    "^GSPC": "09:30",
+    "^IXIC": "09:30",
+    ".SA": "10:00",
+    "=X": "00:00",
+}
+
+# Rules classifying the B3 symbols listed by BRAPI, matched against the whole symbol:
+# stocks end in a single digit, ETFs in 11 and BDRs in 34.
+TICKER_CLASS_PATTERNS = {
+    "stocks": r".*\D\d",
+    "etfs": r".*11",
+    "bdrs": r".*34",
+}
+
+BRAPI_RANGES = [("5d", 5), ("1mo", 31), ("3mo", 92), ("6mo", 183), ("1y", 366),
+                ("2y", 731), ("5y", 1827), ("10y", 3653)]
+
 SGS_INFO = {
     "SELIC": 11,
     "INPC": 188,
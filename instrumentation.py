@@ -0,0 +1,232 @@
+import time
+import itertools
+import threading
+import contextvars
+from contextlib import contextmanager, nullcontext
+
+_current_call = contextvars.ContextVar('database_call', default=None)
+
+_NULL_SPAN = nullcontext()
+
+
+class _Span:
+    """
+    Times a block and reports it to the hooks of an Instrumentation when it ends.
+    """
+
+    __slots__ = ('_instrumentation', '_name', '_labels', '_start')
+
+    def __init__(self, instrumentation, name, labels) -> None:
+        self._instrumentation = instrumentation
+        self._name = name
+        self._labels = labels
+
+    def __enter__(self):
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, error_type, error, traceback):
+        self._instrumentation.emit('span', self._name, time.perf_counter() - self._start,
+                                   self._labels, error is not None)
+        return False
+
+
+class Instrumentation:
+    """
+    Reports the stages and counters of every request to the registered hooks.
+
+    A hook is a callable that receives one event dictionary per finished span or
+    counted quantity, with its 'kind' ('span' or 'counter'), 'name', 'value' (seconds
+    or amount), 'labels', the 'call' id of the request it belongs to and, for spans,
+    whether it ended with an 'error'. The call id follows the request into the threads
+    and coroutines that fetch its data, so the events of a request can be grouped.
+
+    While no hook is registered, spans are a shared no-op context manager and
+    counters return right away, so the overhead is a method call per stage.
+    """
+
+    def __init__(self) -> None:
+        self._hooks = ()
+        self._calls = itertools.count(1)
+        self._lock = threading.Lock()
+        self.last_error = None
+
+    @property
+    def enabled(self):
+        """
+        Returns True if at least one hook is registered.
+        """
+        return len(self._hooks) > 0
+
+    def add_hook(self, hook):
+        """
+        Registers a callable that receives every event.
+
+        Parameters
+        ----------
+        hook : callable
+            The function to call with each event dictionary. It runs on the thread
+            that produced the event, so it should return quickly.
+        """
+        with self._lock:
+            self._hooks = self._hooks + (hook,)
+
+    def remove_hook(self, hook):
+        """
+        Unregisters a hook, ignoring it if it was not registered.
+
+        Parameters
+        ----------
+        hook : callable
+            The function to remove.
+        """
+        with self._lock:
+            self._hooks = tuple(registered for registered in self._hooks if registered != hook)
+
+    def emit(self, kind, name, value, labels, error=False):
+        """
+        Sends an event to every hook. Errors raised by a hook are kept in last_error
+        instead of failing the request.
+        """
+        event = {'kind': kind, 'name': name, 'value': value, 'labels': labels,
+                 'call': _current_call.get(), 'error': error}
+        for hook in self._hooks:
+            try:
+                hook(event)
+            except Exception as hook_error:
+                self.last_error = hook_error
+
+    def span(self, name, **labels):
+        """
+        Returns a context manager that times a stage.
+
+        Parameters
+        ----------
+        name : str
+            The name of the stage.
+        **labels
+            Extra labels of the event, such as the source or the ticker.
+
+        Returns
+        -------
+        context manager
+            The span, or a no-op context manager if no hook is registered.
+        """
+        if not self._hooks:
+            return _NULL_SPAN
+        return _Span(self, name, labels)
+
+    def count(self, name, value=1, **labels):
+        """
+        Reports a counted quantity, such as downloaded bytes or cache hits.
+
+        Parameters
+        ----------
+        name : str
+            The name of the counter.
+        value : int, optional
+            The amount to add. Defaults to 1.
+        **labels
+            Extra labels of the event.
+        """
+        if not self._hooks:
+            return
+        self.emit('counter', name, value, labels)
+
+    @contextmanager
+    def call(self, name, **labels):
+        """
+        Gives a new call id to a request and times it as a whole.
+
+        Parameters
+        ----------
+        name : str
+            The name of the request, such as 'get_info'.
+        **labels
+            Extra labels of the event.
+        """
+        if not self._hooks:
+            yield
+            return
+        token = _current_call.set(next(self._calls))
+        try:
+            with _Span(self, name, labels):
+                yield
+        finally:
+            _current_call.reset(token)
+
+
+class PrometheusExporter:
+    """
+    A hook that aggregates the events and renders them in the Prometheus text format.
+
+    Spans become a ``<prefix>_stage_seconds`` summary, with its sum and count, and
+    counters become ``<prefix>_<name>_total`` counters. Both are labelled with the
+    event labels, so per-source download times and byte counts are kept apart.
+    """
+
+    def __init__(self, prefix: str = 'database') -> None:
+        """
+        Parameters
+        ----------
+        prefix : str, optional
+            The prefix of every metric name.
+        """
+        self.prefix = prefix
+        self._spans = {}
+        self._counters = {}
+        self._lock = threading.Lock()
+
+    def __call__(self, event):
+        labels = tuple(sorted((key, str(value)) for key, value in event['labels'].items()))
+        with self._lock:
+            if event['kind'] == 'span':
+                key = (event['name'],) + labels
+                total, count = self._spans.get(key, (0.0, 0))
+                self._spans[key] = (total + event['value'], count + 1)
+            else:
+                key = (event['name'], labels)
+                self._counters[key] = self._counters.get(key, 0) + event['value']
+
+    @staticmethod
+    def _format_labels(labels):
+        if len(labels) == 0:
+            return ''
+        return '{' + ','.join('{}="{}"'.format(key, value.replace('"', '\\"'))
+                              for key, value in labels) + '}'
+
+    def render(self):
+        """
+        Returns every aggregated metric in the Prometheus text exposition format.
+
+        Returns
+        -------
+        str
+            The metrics, one sample per line.
+        """
+        with self._lock:
+            spans = dict(self._spans)
+            counters = dict(self._counters)
+        lines = []
+        if len(spans) > 0:
+            metric = self.prefix + '_stage_seconds'
+            lines.append('# TYPE {} summary'.format(metric))
+            for (stage, *labels), (total, count) in sorted(spans.items()):
+                label_text = self._format_labels([('stage', stage)] + labels)
+                lines.append('{}_sum{} {}'.format(metric, label_text, total))
+                lines.append('{}_count{} {}'.format(metric, label_text, count))
+        for name in sorted({name for name, _ in counters}):
+            metric = '{}_{}_total'.format(self.prefix, name)
+            lines.append('# TYPE {} counter'.format(metric))
+            for (counter, labels), value in sorted(counters.items()):
+                if counter == name:
+                    lines.append('{}{} {}'.format(metric, self._format_labels(labels), value))
+        return '\n'.join(lines) + '\n'
+
+    def clear(self):
+        """
+        Forgets every aggregated metric.
+        """
+        with self._lock:
+            self._spans = {}
+            self._counters = {}
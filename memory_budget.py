@@ -0,0 +1,143 @@
+import threading
+from collections import OrderedDict
+from .info import MEMORY_BUDGET_BYTES
+
+
+class MemoryBudget:
+    """
+    Tracks the memory used by the series of every ticker and picks the ones to evict.
+
+    Tickers are kept in least recently used order. Once the tracked bytes exceed the
+    budget, the least recently used tickers are returned as victims, skipping the
+    ones still in use by a running request. Without a budget nothing is evicted, but
+    the usage and the counters are still tracked.
+    """
+
+    def __init__(self, max_bytes: int = MEMORY_BUDGET_BYTES) -> None:
+        """
+        Parameters
+        ----------
+        max_bytes : int, optional
+            The maximum number of bytes kept in memory. None means no limit.
+        """
+        self.max_bytes = max_bytes
+        self._sizes = OrderedDict()
+        self._total = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.spills = 0
+        self.reloads = 0
+
+    @property
+    def total_bytes(self):
+        """
+        Returns the number of bytes currently tracked.
+        """
+        return self._total
+
+    def record(self, hit):
+        """
+        Counts a ticker served from memory, or one that had to be loaded or fetched.
+
+        Parameters
+        ----------
+        hit : bool
+            True if the requested range was already in memory.
+        """
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def count(self, counter):
+        """
+        Increments the 'evictions', 'spills' or 'reloads' counter.
+
+        Parameters
+        ----------
+        counter : str
+            The name of the counter.
+        """
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    def touch(self, key, nbytes):
+        """
+        Marks a ticker as the most recently used one and updates its size.
+
+        Parameters
+        ----------
+        key : hashable
+            The key of the ticker in _seeken_dates.
+        nbytes : int
+            The bytes used by its series.
+        """
+        with self._lock:
+            self._total += nbytes - self._sizes.pop(key, 0)
+            self._sizes[key] = nbytes
+
+    def forget(self, key):
+        """
+        Stops tracking a ticker, ignoring it if it is not tracked.
+
+        Parameters
+        ----------
+        key : hashable
+            The key of the ticker in _seeken_dates.
+        """
+        with self._lock:
+            self._total -= self._sizes.pop(key, 0)
+
+    def victims(self, protected=()):
+        """
+        Returns the least recently used tickers to evict to get back under the budget.
+
+        Parameters
+        ----------
+        protected : collection, optional
+            The keys that must not be evicted.
+
+        Returns
+        -------
+        list
+            The keys to evict, least recently used first.
+        """
+        with self._lock:
+            if self.max_bytes is None or self._total <= self.max_bytes:
+                return []
+            victims = []
+            excess = self._total - self.max_bytes
+            for key, nbytes in self._sizes.items():
+                if excess <= 0:
+                    break
+                if key in protected:
+                    continue
+                victims.append(key)
+                excess -= nbytes
+            return victims
+
+    def stats(self):
+        """
+        Returns the usage and the counters.
+
+        Returns
+        -------
+        dict
+            The budget, the tracked bytes and tickers, and the hit, miss, eviction,
+            spill and reload counters.
+        """
+        with self._lock:
+            return {'max_bytes': self.max_bytes, 'total_bytes': self._total,
+                    'tickers': len(self._sizes), 'hits': self.hits, 'misses': self.misses,
+                    'evictions': self.evictions, 'spills': self.spills, 'reloads': self.reloads}
+
+    def clear(self):
+        """
+        Stops tracking every ticker. The counters are kept.
+        """
+        with self._lock:
+            self._sizes = OrderedDict()
+            self._total = 0
@@ -0,0 +1,157 @@
+import os
+import json
+import time
+import threading
+from .info import METADATA_TTL_SECONDS
+from .persistent_store import replace_file
+
+
+class MetadataCache:
+    """
+    Caches the responses of the metadata endpoints, such as the ticker universe and the
+    sector list, in memory and optionally on disk.
+
+    An entry is served without any request while it is younger than the TTL. Once it
+    expires, it is revalidated with a conditional request carrying its ETag and
+    Last-Modified date, so an unchanged list costs a 304 response instead of a new
+    download. If the refresh fails, the stale entry is served. Requests are sent without
+    holding the lock, and while an entry is being refreshed the other threads are served
+    its stale value. Every entry also keeps the value built from its payload, such as a
+    sector index, which is only rebuilt when the payload changes.
+    """
+
+    FILE_NAME = 'metadata.json'
+
+    def __init__(self, path: str = None, ttl: float = METADATA_TTL_SECONDS) -> None:
+        """
+        Parameters
+        ----------
+        path : str, optional
+            The directory where the entries are stored. None keeps them in memory only.
+        ttl : float, optional
+            The number of seconds an entry is served before being revalidated.
+        """
+        self.path = None if path is None else os.path.abspath(path)
+        self.ttl = ttl
+        self._entries = None
+        self._values = {}
+        self._refreshing = set()
+        self._lock = threading.RLock()
+
+    @property
+    def entries(self):
+        """
+        Returns the cached entries, reading them from disk on first access.
+
+        Returns
+        -------
+        dict
+            A dictionary mapping each name to its 'data', 'etag', 'last_modified' and
+            'fetched_at' time.
+        """
+        with self._lock:
+            if self._entries is None:
+                self._entries = {}
+                if self.path is not None:
+                    try:
+                        with open(os.path.join(self.path, self.FILE_NAME)) as file:
+                            self._entries = json.load(file)
+                    except (FileNotFoundError, ValueError):
+                        pass
+            return self._entries
+
+    def _save(self):
+        """
+        Writes the entries to disk, replacing the previous file atomically.
+        """
+        if self.path is None:
+            return
+        os.makedirs(self.path, exist_ok=True)
+        entries = self._entries
+        replace_file(os.path.join(self.path, self.FILE_NAME),
+                     lambda file: json.dump(entries, file), mode='w')
+
+    def _value(self, name, build):
+        """
+        Returns the value built from the payload of an entry, building it on first use.
+        """
+        if name not in self._values:
+            data = self.entries[name]['data']
+            self._values[name] = data if build is None else build(data)
+        return self._values[name]
+
+    def get(self, name, request, build=None):
+        """
+        Returns the value of an entry, fetching or revalidating it if needed.
+
+        Parameters
+        ----------
+        name : str
+            The name of the entry.
+        request : callable
+            Sends the request, called with the conditional 'headers' as a keyword
+            argument and returning the response.
+        build : callable, optional
+            Builds the value served from the decoded payload, or returns None if the
+            payload is an error. Defaults to serving the payload itself.
+
+        Returns
+        -------
+        object or None
+            The value, or None if it could not be fetched and nothing is cached.
+        """
+        with self._lock:
+            entry = self.entries.get(name)
+            if entry is not None and (time.time() - entry['fetched_at'] < self.ttl
+                                      or name in self._refreshing):
+                return self._value(name, build)
+            headers = {}
+            if entry is not None and entry.get('etag') is not None:
+                headers['If-None-Match'] = entry['etag']
+            if entry is not None and entry.get('last_modified') is not None:
+                headers['If-Modified-Since'] = entry['last_modified']
+            self._refreshing.add(name)
+        try:
+            try:
+                response = request(headers=headers)
+            except Exception:
+                with self._lock:
+                    if name not in self.entries:
+                        raise
+                    return self._value(name, build)
+            with self._lock:
+                return self._store(name, response, build)
+        finally:
+            with self._lock:
+                self._refreshing.discard(name)
+
+    def _store(self, name, response, build):
+        """
+        Updates an entry with the response of its refresh and returns its value.
+        """
+        entry = self.entries.get(name)
+        if response.status_code == 304 and entry is not None:
+            entry['fetched_at'] = time.time()
+            self._save()
+            return self._value(name, build)
+        if response.status_code != 200:
+            return None if entry is None else self._value(name, build)
+        data = response.json()
+        value = data if build is None else build(data)
+        if value is None:
+            return None if entry is None else self._value(name, build)
+        self._entries[name] = {'data': data, 'etag': response.headers.get('ETag'),
+                               'last_modified': response.headers.get('Last-Modified'),
+                               'fetched_at': time.time()}
+        self._values[name] = value
+        self._save()
+        return value
+
+    def clear(self):
+        """
+        Forgets every entry, in memory and on disk.
+        """
+        with self._lock:
+            self._entries = {}
+            self._values = {}
+            self._save()
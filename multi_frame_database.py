@@ -1,18 +1,81 @@
+import asyncio
+import functools
+import threading
+import time
+from collections import Counter
 from datetime import date, timedelta
-import yfinance as yf
 import pandas as pd
 from .singleton import Singleton
+from .series_store import SeriesStore
+from .derived_cache import DerivedCache
+from .subscription import Subscription
 from .database_components import *
 from .info import *
+from .date_ranges import merge_ranges, missing_ranges
+from .resampling import resample_ohlcv
+from .memory_budget import MemoryBudget
+from .source_router import DataSource, SourceRouter
 
 class MultiFrameDatabase(DatabaseComponents, metaclass = Singleton):
     def __init__(self)-> None:
-        self._DATA = pd.DataFrame()
+        self._frames = {}
         self._seeken_dates = {}
+        self._lock = threading.RLock()
+        self._ticker_locks = {}
+        self._symbols = {}
+        self._subscriptions = []
+        self._poller = None
+        self._stop_polling = threading.Event()
+        self._budget = MemoryBudget()
+        self._compact = False
+        self._spill = None
+        self._active = Counter()
+        self._router = SourceRouter()
+        self._router.register(DataSource('yahoo', ['price'], self._fetch_yf,
+                                         intervals=AVAILABLE_TIME_FRAMES))
+        self._router.register(DataSource('yahoo_fx', ['currency'], self._fetch_currencies,
+                                         intervals=AVAILABLE_TIME_FRAMES, pool='yahoo'))
+
+    def _stores(self, interval=None):
+        """
+        Returns the series storage and derived cache of an interval, creating them on first use.
+
+        Every interval has its own storage, so the frames of a ticker at different
+        intervals stay resident at the same time, each one with its own dates.
+
+        Parameters
+        ----------
+        interval : str
+            The data interval (e.g., '1m', '5m').
+
+        Returns
+        -------
+        tuple
+            The SeriesStore and the DerivedCache of the interval.
+        """
+        with self._lock:
+            if interval not in self._frames:
+                self._frames[interval] = (SeriesStore(self._compact), DerivedCache())
+            return self._frames[interval]
+
+    def _all_stores(self):
+        """
+        Returns the series storages and derived caches of every resident interval.
+
+        Returns
+        -------
+        list of tuple
+            The SeriesStore and DerivedCache pairs.
+        """
+        with self._lock:
+            return list(self._frames.values())
 
     def _add_seeken_dates(self, ticker, open_date, close_date, interval):
         """
-        Adds the date range and interval for a ticker to the _seeken_dates dictionary.
+        Adds a fetched date range of a ticker at an interval to the _seeken_dates dictionary,
+        which is keyed by (ticker, interval).
+
+        The range is merged with the ones previously fetched at the same interval.
 
         Parameters
         ----------
@@ -25,14 +88,20 @@ class MultiFrameDatabase(DatabaseComponents, metaclass = Singleton):
         interval : str
             The data interval (e.g., '1m', '5m').
         """
+        ranges = [(pd.to_datetime(open_date), pd.to_datetime(close_date))]
+        previous = self._seeken_dates.get((ticker, interval))
+        if previous is not None:
+            ranges += previous['ranges']
+        ranges = merge_ranges(ranges)
         dct_dates = {
-            'start': open_date,
-            'close': close_date,
-            "interval": interval
+            'start': ranges[0][0],
+            'close': ranges[-1][1],
+            "interval": interval,
+            'ranges': ranges
         }
-        self._seeken_dates[ticker] = dct_dates
+        self._seeken_dates[(ticker, interval)] = dct_dates
 
-    def _fetch_yf(self, ticker: str, interval, open_date, close_date):
+    def _fetch_yf(self, ticker: str, open_date, close_date, interval):
         """
         Fetches data from Yahoo Finance for the specified ticker, date range, and interval.
         
@@ -40,79 +109,101 @@ class MultiFrameDatabase(DatabaseComponents, metaclass = Singleton):
         ----------
         ticker : str
             The ticker symbol for the asset.
-        interval : str
-            The data interval (e.g., '1m', '5m').
         open_date : datetime
             The start date of the data range.
         close_date : datetime
             The end date of the data range.
+        interval : str
+            The data interval (e.g., '1m', '5m').
 
         Returns
         -------
-        bool
-            True if data is successfully fetched, False otherwise.
-        """
-        ticker_yf = ticker+'.SA'
-        if ticker == 'IBOV':
-            ticker_yf = "^BVSP"
-        elif ticker == 'DJI':
-            ticker_yf = "^DJI"
-        elif ticker == 'SPX':
-            ticker_yf = "^GSPC"
-        elif ticker == 'NASDAQ':
-            ticker_yf = "^IXIC"
-        close_to_seek = close_date + timedelta(days=10)
-        candles = yf.download(tickers=ticker_yf,
-                              start=open_date, end=close_to_seek, interval=interval, progress=False, show_errors=False)
-        if len(candles) == 0:
-            ticker_yf = ticker
-            candles = yf.download(tickers=ticker_yf,
-                                  start=open_date, end=close_to_seek, interval=interval, progress=False, show_errors=False)
-            if len(candles) == 0:
-                return False
-        candles = candles.rename(
-            columns={'Open': ticker+'_open', 'High': ticker + '_high',
-                     'Low': ticker + '_low', 'Adj Close': ticker + '_close',
-                     'Volume': ticker + '_volume'})
-        candles.index.names = ['date']
-        candles = candles.tz_localize(None)
-        candles = candles[[ticker+'_close', ticker+'_open',
-                           ticker+'_high', ticker+'_low', ticker+'_volume']]
-        self._DATA = pd.concat([candles, self._DATA], axis=1)
-        return True
+        DataFrame or None
+            The candles of the ticker, or None if no data was found.
+        """
+        candles, symbol = self._download_yf(ticker, open_date, close_date, interval)
+        if symbol is not None:
+            self._symbols[ticker] = symbol
+        return candles
 
-    def _fetch_prices(self, ticker, interval, open_date, close_date):
+    def _session_open(self, ticker):
         """
-        Fetches the price data for the given ticker and raises an exception if no data is found.
-        
+        Returns the local time the intraday bars of a ticker are counted from.
+
+        The time is looked up in SESSION_OPENS with the Yahoo Finance symbol the ticker
+        was downloaded with, since a ticker may be listed on B3 or on another exchange.
+
+        Parameters
+        ----------
+        ticker : str
+            The ticker symbol for the asset.
+
+        Returns
+        -------
+        str or None
+            The session open, such as '10:00', or None if the exchange of the ticker is unknown.
+        """
+        symbol = self._symbols.get(ticker, YF_SYMBOLS.get(ticker))
+        if symbol is None:
+            return None
+        for key, session_open in SESSION_OPENS.items():
+            if symbol == key or (key[0] in '.=' and symbol.endswith(key)):
+                return session_open
+        return None
+
+    def _resample_from_finer(self, ticker, interval, open_date, close_date):
+        """
+        Builds the bars of a range from finer bars already stored, instead of downloading them.
+
+        Among the stored intervals whose length divides the requested one and whose fetched
+        ranges cover the whole range, the coarsest is resampled. Bins are counted from the
+        session open of the exchange, so tickers of unknown exchanges are always downloaded.
+
         Parameters
         ----------
         ticker : str
             The ticker symbol for the asset.
         interval : str
-            The data interval (e.g., '1m', '5m').
+            The requested interval (e.g., '15m').
         open_date : datetime
             The start date of the data range.
         close_date : datetime
             The end date of the data range.
 
-        Raises
-        ------
-        Exception
-            If no data is found for the specified ticker.
+        Returns
+        -------
+        bool
+            True if the range was served from finer bars, False if it must be downloaded.
         """
-        data_to_fetch = {
-            'ticker': ticker,
-            'interval': interval,
-            'open_date': open_date,
-            'close_date': close_date
-        }
-        yahoo = self._fetch_yf(**data_to_fetch)
-        if not yahoo:
-            self._seeken_dates.pop(ticker)
-            raise Exception("""No data found for {}!""".format(ticker))
+        minutes = RESAMPLABLE_INTERVALS.get(interval)
+        session_open = self._session_open(ticker)
+        if minutes is None or session_open is None:
+            return False
+        candidates = []
+        for finer, finer_minutes in RESAMPLABLE_INTERVALS.items():
+            seeken = self._seeken_dates.get((ticker, finer))
+            if finer == interval or minutes % finer_minutes != 0 or seeken is None:
+                continue
+            if len(missing_ranges(seeken['ranges'], open_date, close_date)) == 0:
+                candidates.append((finer_minutes, finer))
+        if len(candidates) == 0:
+            return False
+        finer = max(candidates)[1]
+        storage = self._stores(finer)[0]
+        columns = [ticker+'_close', ticker+'_open', ticker+'_high', ticker+'_low', ticker+'_volume']
+        if not all(column in storage for column in columns):
+            return False
+        bin_close = close_date + timedelta(minutes=minutes)
+        bars = storage.get(columns).loc[open_date:bin_close]
+        bars = bars[bars.index < bin_close]
+        resampled = resample_ohlcv(bars, ticker, minutes, session_open)
+        resampled = resampled.loc[open_date:close_date]
+        if len(resampled) == 0:
+            return False
+        self._merge_data(resampled, interval)
+        return True
 
-    def _fetch_currencies(self, ticker, interval, open_date, close_date):
+    def _fetch_currencies(self, ticker, open_date, close_date, interval):
         """
         Fetches currency exchange data for the specified ticker.
         
@@ -120,70 +211,34 @@ class MultiFrameDatabase(DatabaseComponents, metaclass = Singleton):
         ----------
         ticker : str
             The currency pair symbol (e.g., 'USD/BRL').
-        interval : str
-            The data interval (e.g., '1m', '5m').
         open_date : datetime
             The start date of the data range.
         close_date : datetime
             The end date of the data range.
+        interval : str
+            The data interval (e.g., '1m', '5m').
+
+        Returns
+        -------
+        DataFrame
+            The close, open, high, low and volume columns of the currency pair.
         """
         splited_ticker = ticker.split('/')
         ticker_to_fetch = splited_ticker[0]+splited_ticker[1]+'=X'
         days_to_seek = (pd.to_datetime(date.today()) - open_date).days + 10
-        data = yf.download(
+        data = self._yf_download(
             ticker_to_fetch, period=f"{str(days_to_seek)}d", interval=interval, progress=False, show_errors=False)
-        data = data.rename(
-            columns={'Open': ticker+'_open', 'High': ticker + '_high',
-                     'Low': ticker + '_low', 'Close': ticker + '_close',
-                     'Volume': ticker + '_volume'})
-        data.index.names = ['date']
-        data = data.tz_localize(None)
-        data = data[[ticker+'_close', ticker+'_open',
-                     ticker+'_high', ticker+'_low', ticker+'_volume']]
-        self._DATA = pd.concat([data, self._DATA], axis=1)
-
-    def _check_index(self, ticker):
-        """
-        Analyzes the ticker and returns a dictionary with relevant information about it.
-        
-        Parameters
-        ----------
-        ticker : str
-            The ticker symbol or currency pair.
-
-        Returns
-        -------
-        dict
-            A dictionary containing information about the ticker, such as whether it 
-            is a currency, if transformations are needed, and other relevant details.
-        """
-        info_dct = {'ticker': ticker, 'transf': None,
-                    'get_prices': True, 'previous_days': None, 'currencies': False}
-        ticker_splitted = ticker.split('_')
-        if ticker_splitted[0][:3] == 'VOL':
-            info_dct['ticker'] = ticker_splitted[1]
-            info_dct['transf'] = 'VOL'
-            info_dct['periods'] = int(ticker_splitted[0][3:])
-            info_dct['previous_days'] = (int(ticker_splitted[0][3:])+150)
-        elif ticker_splitted[0] == 'RET' or ticker_splitted[0] == 'LRET':
-            info_dct['ticker'] = ticker_splitted[1]
-            info_dct['transf'] = ticker_splitted[0]
-            info_dct['previous_days'] = None
-        elif ticker_splitted[0] == 'CRET' or ticker_splitted[0] == 'CLRET':
-            info_dct['ticker'] = ticker_splitted[1]
-            info_dct['transf'] = ticker_splitted[0]
-            info_dct['previous_days'] = None
-        is_currency = len(ticker.split('/')) > 1
-        if is_currency:
-            info_dct['currencies'] = True
-        if is_currency:
-            info_dct['get_prices'] = False
-        return info_dct
+        self._symbols[ticker] = ticker_to_fetch
+        return self._format_candles(data, ticker, 'Close')
 
     def _allow_changes(self, ticker, interval, open_date, close_date):
         """
-        Determines whether changes are needed for the specified ticker based on 
-        the existing data and the requested date range and interval.
+        Determines which parts of the requested date range still need to be fetched
+        for the specified ticker, based on the existing data and the requested interval.
+
+        Only the sub-ranges missing at the requested interval are returned as gaps. The
+        data of the ticker at other intervals is left untouched. Nothing is recorded as
+        fetched here: every gap is recorded once its download succeeds.
         
         Parameters
         ----------
@@ -199,51 +254,39 @@ class MultiFrameDatabase(DatabaseComponents, metaclass = Singleton):
         Returns
         -------
         dict
-            A dictionary indicating whether changes are needed and the updated date range.
+            A dictionary indicating whether changes are needed, the gaps to fetch,
+            whether the ticker already had data and the requested range, extended by
+            the lookback of the transformation.
         """
         ticker_data = self._check_index(ticker)
         if ticker_data['previous_days'] is not None:
             open_date = pd.to_datetime(
                 open_date) - timedelta(days=(ticker_data['previous_days']))
+        open_date = pd.to_datetime(open_date)
+        close_date = pd.to_datetime(close_date)
         ticker = ticker_data['ticker']
-        if ticker in self._seeken_dates.keys():
-            previous_than_start = self._seeken_dates[ticker]['start'] > pd.to_datetime(
-                open_date)
-            after_close = self._seeken_dates[ticker]['close'] < pd.to_datetime(
-                close_date)
-            different_interval = self._seeken_dates[ticker]['interval'] != interval
-            there_is_transf = ticker_data['transf'] is not None
-            if previous_than_start or after_close or there_is_transf or different_interval:
-                self._DATA = self._DATA.drop(columns=[ticker+'_close'])
-                try:
-                    self._DATA = self._DATA.drop(columns=[ticker+'_open',
-                                                          ticker+'_high', ticker+'_low', ticker+'_volume'])
-                except:
-                    pass
-                try:
-                    self._DATA = self._DATA.drop(
-                        columns=[ticker_data['transf']+'_'+ticker+'_close'])
-                except:
-                    pass
-                try:
-                    self._DATA = self._DATA.drop(
-                        columns=[ticker_data['transf']+str(ticker_data['periods'])+'_'+ticker+'_close'])
-                except:
-                    pass
-                open_date = min(
-                    self._seeken_dates[ticker]['start'], pd.to_datetime(open_date))
-                close_date = max(
-                    self._seeken_dates[ticker]['close'], pd.to_datetime(close_date))
-                self._add_seeken_dates(ticker, open_date, close_date, interval)
-                return {'changes': True, 'open_date': open_date, 'close_date': close_date}
-            else:
+        resident = (ticker, interval) in self._seeken_dates
+        if not resident:
+            self._load_from_spill((ticker, interval))
+        had_data = (ticker, interval) in self._seeken_dates
+        if had_data:
+            gaps = missing_ranges(
+                self._seeken_dates[(ticker, interval)]['ranges'], open_date, close_date)
+            self._record_access(resident and len(gaps) == 0)
+            if len(gaps) == 0 and ticker_data['transf'] is None:
                 return {'changes': False}
-        self._add_seeken_dates(ticker, open_date, close_date, interval)
-        return {'changes': True, 'open_date': open_date, 'close_date': close_date}
+        else:
+            self._record_access(False)
+            gaps = [(open_date, close_date)]
+        return {'changes': True, 'gaps': gaps, 'had_data': had_data,
+                'open_date': open_date, 'close_date': close_date}
 
     def _add_assets(self, ticker: str, interval: str, open_date, close_date):
         """
-        Adds the data for a specific asset to the database, applying necessary transformations.
+        Adds the data for a specific asset to the database.
+
+        Only the missing sub-ranges are fetched and spliced into the stored columns. A
+        sub-range already covered by finer bars of the ticker is resampled from them.
 
         Parameters
         ----------
@@ -255,33 +298,33 @@ class MultiFrameDatabase(DatabaseComponents, metaclass = Singleton):
             The start date of the data range.
         close_date : datetime
             The end date of the data range.
+
+        Returns
+        -------
+        dict or None
+            The transformation still to be computed by _apply_transforms, or None
+            if the ticker has no transformation.
         """
-        changes_data = self._allow_changes(ticker, interval, open_date, close_date)
-        if not changes_data['changes']:
-            return
-        ticker_data = self._check_index(ticker)
-        open_date = changes_data['open_date']
-        close_date = changes_data['close_date']
-        ticker = ticker_data['ticker']
-        if ticker_data['get_prices']:
-            self._fetch_prices(ticker, interval, open_date, close_date)
-        if ticker_data['currencies']:
-            self._fetch_currencies(ticker, interval, open_date, close_date)
-        df = None
-        data = self._DATA[[ticker+'_close']].dropna()
-        if ticker_data['transf'] == 'VOL':
-            df = self._fetch_volatility(
-                data, ticker_data['periods'], open_date, close_date)
-        elif ticker_data['transf'] == 'RET':
-            df = self._fetch_returns(data, open_date, close_date)
-        elif ticker_data['transf'] == 'LRET':
-            df = self._fetch_log_returns(data, open_date, close_date)
-        elif ticker_data['transf'] == 'CRET':
-            df = self._fetch_cumulated_returns(data, open_date, close_date)
-        elif ticker_data['transf'] == 'CLRET':
-            df = self._fetch_cumulated_log_returns(data, open_date, close_date)
-        if df is not None:
-            self._DATA = pd.concat([df, self._DATA], axis=1)
+        with self._ticker_lock((self._check_index(ticker)['ticker'], interval)), \
+                self._instrumentation.span('allow_changes'):
+            changes_data = self._allow_changes(ticker, interval, open_date, close_date)
+            if not changes_data['changes']:
+                return None
+            ticker_data = self._check_index(ticker)
+            ticker = ticker_data['ticker']
+            for gap_open, gap_close in changes_data['gaps']:
+                if not self._resample_from_finer(ticker, interval, gap_open, gap_close):
+                    df = self._fetch_routed(ticker_data, gap_open, gap_close, interval)
+                    if df is None and not changes_data['had_data']:
+                        raise Exception("""No data found for {}!""".format(ticker))
+                    if df is not None:
+                        self._merge_data(df, interval)
+                self._add_seeken_dates(ticker, gap_open, gap_close, interval)
+            if ticker_data['transf'] is not None:
+                open_date, close_date = self._covering_range(
+                    (ticker, interval), changes_data['open_date'], changes_data['close_date'])
+                return {'ticker_data': ticker_data, 'open_date': open_date, 'close_date': close_date,
+                        'interval': interval}
 
     def get_info(self, tickers,
                  interval='1m',
@@ -326,35 +369,235 @@ class MultiFrameDatabase(DatabaseComponents, metaclass = Singleton):
             open_date = today - timedelta(days=59)
         if type(tickers) is str:
             tickers = [tickers]
-        tickers_to_display = []
-        for ticker in tickers:
-            ticker = ticker.upper()
-            self._add_assets(ticker, interval, open_date, close_date)
-            if info == 'ohlcv':
-                tickers_to_display += [ticker+'_open', ticker+'_high',
-                                       ticker+'_low', ticker+'_close',
-                                       ticker+'_volume']
-            else:
-                tickers_to_display += [ticker+'_'+info]
-        try:
-            info_to_return = self._DATA[tickers_to_display].loc[open_date:close_date]
-        except:
-            info_to_return = self._DATA[tickers_to_display].dropna()
-            info_to_return = info_to_return.loc[open_date:close_date]
+        tickers = [ticker.upper() for ticker in tickers]
+        keys = [(self._check_index(ticker)['ticker'], interval) for ticker in tickers]
+        with self._instrumentation.call('get_info', database='intraday'), self._request_scope(keys):
+            tickers_to_display = []
+            pending = []
+            for ticker in tickers:
+                transform = self._add_assets(ticker, interval, open_date, close_date)
+                if transform is not None:
+                    pending.append(transform)
+                if info == 'ohlcv':
+                    tickers_to_display += [ticker+'_open', ticker+'_high',
+                                           ticker+'_low', ticker+'_close',
+                                           ticker+'_volume']
+                else:
+                    tickers_to_display += [ticker+'_'+info]
+            self._apply_transforms(pending)
+            storage = self._stores(interval)[0]
+            with self._instrumentation.span('slice'):
+                info_to_return = storage.get(tickers_to_display).loc[open_date:close_date]
+            self._instrumentation.count('rows_produced', len(info_to_return))
         if len(info_to_return) == 0:
             raise Exception("""No data found for {}!""".format(tickers))
         return info_to_return
 
+    async def aget_info(self, tickers,
+                        interval='1m',
+                        open_date: str = None,
+                        close_date: str = None,
+                        info='close' or 'ohlcv'):
+        """
+        Asynchronous version of get_info.
+
+        Every intraday series comes from Yahoo Finance, whose client is blocking, so the
+        request runs on the default executor and the event loop stays free meanwhile.
+
+        Parameters
+        ----------
+        tickers : str or list
+            The ticker(s) for which information is requested.
+        interval : str, optional
+            The data interval (default is '1m').
+        open_date : str, optional
+            The start date of the data range (default is None).
+        close_date : str, optional
+            The end date of the data range (default is None).
+        info : str, optional
+            The type of information requested (default is 'close' or 'ohlcv').
+
+        Returns
+        -------
+        pd.DataFrame
+            A DataFrame containing the requested data.
+        """
+        loop = asyncio.get_running_loop()
+        request = functools.partial(self.get_info, tickers, interval=interval, open_date=open_date,
+                                    close_date=close_date, info=info)
+        return await loop.run_in_executor(None, request)
+
+    def subscribe(self, tickers, interval='1m', callback=None,
+                  poll_every: float = SUBSCRIPTION_POLL_SECONDS):
+        """
+        Keeps the bars of the given tickers up to date in the background.
+
+        The tickers are fetched once with get_info. After that a background thread polls
+        them every poll_every seconds, downloading only the bars from the last stored
+        timestamp onwards, appending them to the storage and delivering them to the
+        callbacks and to the stream of the returned subscription.
+
+        Parameters
+        ----------
+        tickers : str or list
+            The ticker(s) to keep up to date.
+        interval : str, optional
+            The data interval (default is '1m').
+        callback : callable, optional
+            A function called with (ticker, bars) on every delivery.
+        poll_every : float, optional
+            The number of seconds between two polls (default is SUBSCRIPTION_POLL_SECONDS).
+
+        Returns
+        -------
+        Subscription
+            The subscription, whose stream method yields the new bars.
+        """
+        if interval not in AVAILABLE_TIME_FRAMES:
+            raise Exception("""The interval {} is not available!""".format(interval))
+        if type(tickers) is str:
+            tickers = [tickers]
+        tickers = [ticker.upper() for ticker in tickers]
+        self.get_info(tickers, interval=interval, info='ohlcv')
+        subscription = Subscription(tickers, interval, poll_every)
+        storage = self._stores(interval)[0]
+        for ticker in tickers:
+            subscription.last_bar[ticker] = storage.get_series(ticker+'_close').index[-1]
+        subscription.next_poll = time.monotonic() + poll_every
+        if callback is not None:
+            subscription.add_callback(callback)
+        with self._lock:
+            self._subscriptions.append(subscription)
+            if self._poller is None or not self._poller.is_alive():
+                self._stop_polling.clear()
+                self._poller = threading.Thread(target=self._poll_loop, daemon=True)
+                self._poller.start()
+        return subscription
+
+    def unsubscribe(self, subscription):
+        """
+        Cancels a subscription. The polling thread stops with the last one.
+
+        Parameters
+        ----------
+        subscription : Subscription
+            The subscription returned by subscribe.
+        """
+        subscription.cancel()
+        with self._lock:
+            if subscription in self._subscriptions:
+                self._subscriptions.remove(subscription)
+            if len(self._subscriptions) == 0:
+                self._stop_polling.set()
+
+    def poll(self, subscription):
+        """
+        Fetches and delivers the new bars of a subscription right away.
+
+        Only the bars at or after the last stored timestamp of each ticker are
+        downloaded. The last stored bar is downloaded again because it may have
+        been still forming, and only the bars that are new or changed are delivered.
+
+        Parameters
+        ----------
+        subscription : Subscription
+            The subscription to update.
+        """
+        interval = subscription.interval
+        storage = self._stores(interval)[0]
+        today = pd.to_datetime(date.today())
+        for ticker in subscription.tickers:
+            last_bar = subscription.last_bar[ticker]
+            try:
+                candles = self._fetch_routed(self._check_index(ticker), last_bar, today, interval)
+            except Exception as error:
+                subscription.last_error = error
+                continue
+            if candles is None:
+                continue
+            bars = candles[candles.index >= last_bar]
+            with self._ticker_lock((ticker, interval)):
+                if all(column in storage for column in bars.columns):
+                    stored = pd.DataFrame({column: storage.get_series(column).reindex(bars.index)
+                                           for column in bars.columns})
+                    conformed = pd.DataFrame({column: storage.conform(column, bars[column])
+                                              for column in bars.columns})
+                    bars = bars[(stored != conformed).any(axis=1)]
+                if len(bars) == 0:
+                    continue
+                seeken = self._seeken_dates.get((ticker, interval))
+                self._merge_data(bars, interval)
+                start = bars.index[0] if seeken is None else seeken['close']
+                self._add_seeken_dates(ticker, start, bars.index[-1], interval)
+            subscription.last_bar[ticker] = bars.index[-1]
+            subscription.publish(ticker, bars)
+
+    def _poll_loop(self):
+        """
+        Polls every active subscription when it is due, until the last one is cancelled.
+        """
+        while not self._stop_polling.is_set():
+            with self._lock:
+                subscriptions = list(self._subscriptions)
+            now = time.monotonic()
+            for subscription in subscriptions:
+                if subscription.active and subscription.next_poll <= now:
+                    subscription.next_poll = now + subscription.poll_every
+                    self.poll(subscription)
+            next_poll = min([subscription.next_poll for subscription in subscriptions],
+                            default=now + SUBSCRIPTION_POLL_SECONDS)
+            self._stop_polling.wait(max(0.0, next_poll - time.monotonic()))
+
     def reset(self):
         """
-        Resets the database by clearing all data and the _seeken_dates dictionary.
+        Resets the database by clearing all data and the _seeken_dates dictionary,
+        and the spill directory if one is configured.
+        Active subscriptions keep polling and start from their last delivered bar.
         """
-        self._DATA = pd.DataFrame()
-        self._seeken_dates = {}
+        with self._lock:
+            self._frames = {}
+            self._seeken_dates = {}
+            self._budget.clear()
+            if self._spill is not None:
+                self._spill.clear()
 
     @property
     def data(self):
         """
-        Returns the current state of the _DATA DataFrame.
+        Returns the current state of the fetched data as a single wide DataFrame, joining
+        the storages of every resident interval on the union of their dates. A ticker
+        resident at several intervals keeps the columns of its first interval fetched;
+        use data_at to read the frame of a given interval.
+
+        Returns
+        -------
+        pd.DataFrame
+            The fetched data of every interval.
+        """
+        with self._lock:
+            frames = [storage.frame for storage, _ in self._frames.values()]
+        frames = [frame for frame in frames if len(frame.columns) > 0]
+        if len(frames) == 0:
+            return pd.DataFrame()
+        data = pd.concat(frames, axis=1).sort_index()
+        return data.loc[:, ~data.columns.duplicated()]
+
+    def data_at(self, interval):
+        """
+        Returns the fetched data of a single interval, assembled lazily from its storage.
+
+        Parameters
+        ----------
+        interval : str
+            The data interval.
+
+        Returns
+        -------
+        pd.DataFrame
+            The wide DataFrame of the interval, empty if nothing was fetched at it.
         """
-        return self._DATA
+        with self._lock:
+            frames = self._frames.get(interval)
+        if frames is None:
+            return pd.DataFrame()
+        return frames[0].frame
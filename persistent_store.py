@@ -0,0 +1,277 @@
+import os
+import json
+import shutil
+import tempfile
+import threading
+from contextlib import contextmanager
+import numpy as np
+import pandas as pd
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+    import msvcrt
+
+
+def replace_file(file_path, write, mode='wb'):
+    """
+    Writes a file through a uniquely named temporary file in the same directory and moves
+    it into place, so concurrent writers never share a temporary file and readers that
+    memory-mapped the previous version keep a valid mapping.
+
+    Parameters
+    ----------
+    file_path : str
+        The path of the file to write.
+    write : callable
+        Called with the open temporary file.
+    mode : str, optional
+        The mode the temporary file is opened with. Defaults to binary writing.
+    """
+    descriptor, tmp_path = tempfile.mkstemp(dir=os.path.dirname(file_path), suffix='.tmp')
+    try:
+        with os.fdopen(descriptor, mode) as file:
+            write(file)
+        os.replace(tmp_path, file_path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except FileNotFoundError:
+            pass
+        raise
+
+
+@contextmanager
+def file_lock(lock_path):
+    """
+    Holds an exclusive lock on a file, shared by every process using it.
+
+    Parameters
+    ----------
+    lock_path : str
+        The path of the lock file. It is created if missing.
+    """
+    with open(lock_path, 'a+b') as file:
+        if fcntl is not None:
+            fcntl.flock(file.fileno(), fcntl.LOCK_EX)
+        else:
+            file.seek(0)
+            msvcrt.locking(file.fileno(), msvcrt.LK_LOCK, 1)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(file.fileno(), fcntl.LOCK_UN)
+            else:
+                file.seek(0)
+                msvcrt.locking(file.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+class PersistentStore:
+    """
+    An on-disk columnar cache for the series fetched by the databases.
+
+    Every ticker/interval pair is kept in its own directory, with one ``.npy``
+    file per column plus an ``index.npy`` file holding the dates. A single
+    ``manifest.json`` records which date ranges were fetched for each pair, so a
+    new process can tell whether the network is needed without touching the
+    column files. Columns are memory-mapped when loaded.
+
+    Every save writes its files into a new generation directory and only then points
+    the manifest at it, so a reader never pairs the index of one save with the columns
+    of another. The previous generation is removed afterwards. The manifest is written
+    through a uniquely named temporary file, and every change to it re-reads and merges
+    it under a file lock, so tickers can be saved from several threads and several
+    processes sharing the same directory.
+    """
+
+    MANIFEST_NAME = 'manifest.json'
+    LOCK_NAME = 'manifest.lock'
+
+    def __init__(self, path: str) -> None:
+        """
+        Parameters
+        ----------
+        path : str
+            The directory where the cache is stored. It is created if missing.
+        """
+        self.path = os.path.abspath(path)
+        os.makedirs(self.path, exist_ok=True)
+        self._manifest = None
+        self._lock = threading.RLock()
+
+    @staticmethod
+    def _safe_name(ticker):
+        """
+        Converts a ticker into a string that can be used as a directory name.
+        """
+        return ticker.replace('/', '-').replace('^', '')
+
+    def _ticker_dir(self, ticker, interval):
+        return os.path.join(self.path, interval, self._safe_name(ticker))
+
+    def _generation_dir(self, ticker, interval, entry):
+        """
+        Returns the directory holding the files of a manifest entry. Entries written before
+        generations were introduced keep their files in the directory of the ticker.
+        """
+        ticker_dir = self._ticker_dir(ticker, interval)
+        if entry.get('generation') is None:
+            return ticker_dir
+        return os.path.join(ticker_dir, entry['generation'])
+
+    @property
+    def manifest(self):
+        """
+        Returns the manifest, reading it from disk on first access.
+
+        Returns
+        -------
+        dict
+            A dictionary mapping interval -> ticker -> fetched range and columns.
+        """
+        with self._lock:
+            if self._manifest is None:
+                self._manifest = self._read_manifest()
+            return self._manifest
+
+    def _read_manifest(self):
+        try:
+            with open(os.path.join(self.path, self.MANIFEST_NAME)) as file:
+                return json.load(file)
+        except (FileNotFoundError, ValueError):
+            return {}
+
+    def _update_manifest(self, change):
+        """
+        Applies a change to the manifest on disk and in memory. The manifest is re-read
+        under the file lock before the change, so the entries written by other
+        processes since it was loaded are kept.
+
+        Parameters
+        ----------
+        change : callable
+            Called with the current manifest, which it modifies in place. It returns
+            False if nothing changed and the manifest does not need to be written.
+        """
+        with self._lock, file_lock(os.path.join(self.path, self.LOCK_NAME)):
+            manifest = self._read_manifest()
+            if change(manifest) is not False:
+                replace_file(os.path.join(self.path, self.MANIFEST_NAME),
+                             lambda file: json.dump(manifest, file), mode='w')
+            self._manifest = manifest
+
+    def get_ranges(self, ticker, interval='1d'):
+        """
+        Returns the date ranges stored on disk for a ticker.
+
+        Parameters
+        ----------
+        ticker : str
+            The ticker symbol.
+        interval : str, optional
+            The data interval. Defaults to '1d'.
+
+        Returns
+        -------
+        list of tuple or None
+            The fetched (start, close) pairs, or None if the ticker is not stored.
+        """
+        entry = self.manifest.get(interval, {}).get(ticker)
+        if entry is None:
+            return None
+        return [(pd.to_datetime(start), pd.to_datetime(close))
+                for start, close in entry['ranges']]
+
+    def load(self, ticker, interval='1d'):
+        """
+        Loads the columns stored for a ticker.
+
+        Parameters
+        ----------
+        ticker : str
+            The ticker symbol.
+        interval : str, optional
+            The data interval. Defaults to '1d'.
+
+        Returns
+        -------
+        pd.DataFrame or None
+            A DataFrame indexed by date, or None if the ticker is not stored.
+        """
+        entry = self.manifest.get(interval, {}).get(ticker)
+        if entry is None:
+            return None
+        ticker_dir = self._generation_dir(ticker, interval, entry)
+        try:
+            index = np.load(os.path.join(ticker_dir, 'index.npy'))
+            columns = {}
+            for column in entry['columns']:
+                file_name = column[len(ticker)+1:] + '.npy'
+                columns[column] = np.load(
+                    os.path.join(ticker_dir, file_name), mmap_mode='r')
+            index = pd.DatetimeIndex(index.view('datetime64[ns]'), name='date')
+            return pd.DataFrame(columns, index=index, copy=False)
+        except (FileNotFoundError, ValueError):
+            # A generation removed by a newer save, or a damaged file, is a cache miss.
+            return None
+
+    def save(self, ticker, df, ranges, interval='1d'):
+        """
+        Writes the columns of a ticker to disk and records the fetched ranges.
+
+        Parameters
+        ----------
+        ticker : str
+            The ticker symbol.
+        df : pd.DataFrame
+            A DataFrame indexed by date whose columns are named TICKER_field.
+        ranges : list of tuple
+            The (start, close) pairs that were fetched.
+        interval : str, optional
+            The data interval. Defaults to '1d'.
+        """
+        df = df.dropna(how='all')
+        if len(df) == 0:
+            return
+        ticker_dir = self._ticker_dir(ticker, interval)
+        os.makedirs(ticker_dir, exist_ok=True)
+        generation_dir = tempfile.mkdtemp(dir=ticker_dir, prefix='generation-')
+        try:
+            index = pd.DatetimeIndex(df.index).values.astype('datetime64[ns]')
+            np.save(os.path.join(generation_dir, 'index.npy'), index.view('int64'))
+            for column in df.columns:
+                file_name = column[len(ticker)+1:] + '.npy'
+                np.save(os.path.join(generation_dir, file_name),
+                        df[column].to_numpy(dtype='float64'))
+        except BaseException:
+            shutil.rmtree(generation_dir, ignore_errors=True)
+            raise
+        entry = {
+            'ranges': [[pd.to_datetime(start).isoformat(), pd.to_datetime(close).isoformat()]
+                       for start, close in ranges],
+            'columns': list(df.columns),
+            'generation': os.path.basename(generation_dir),
+        }
+        previous = []
+
+        def change(manifest):
+            previous.append(manifest.setdefault(interval, {}).get(ticker))
+            manifest[interval][ticker] = entry
+
+        self._update_manifest(change)
+        if previous[0] is not None and previous[0].get('generation') is not None:
+            shutil.rmtree(self._generation_dir(ticker, interval, previous[0]), ignore_errors=True)
+
+    def remove(self, ticker, interval='1d'):
+        """
+        Removes a ticker from the manifest, so it will be fetched again.
+        """
+        self._update_manifest(
+            lambda manifest: manifest.get(interval, {}).pop(ticker, None) is not None)
+
+    def clear(self):
+        """
+        Forgets every stored series.
+        """
+        self._update_manifest(lambda manifest: manifest.clear())
@@ -0,0 +1,70 @@
+import numpy as np
+import pandas as pd
+
+
+def _nanoseconds(index):
+    """
+    Returns the timestamps of a naive DatetimeIndex as int64 nanoseconds, whatever the
+    resolution the index is stored with.
+    """
+    return index.values.astype('datetime64[ns]').view('int64')
+
+
+def resample_ohlcv(df, ticker, minutes, session_open='00:00'):
+    """
+    Aggregates intraday bars of a ticker into coarser bars.
+
+    Bars are grouped into bins of the given number of minutes counted from the session
+    open of each day, in the local time of the bars. This is the alignment Yahoo Finance
+    uses for its intraday bars: a session opening at 9:30 gets hourly bars starting at
+    9:30, 10:30 and so on, not at 9:00 and 10:00. The open is a fixed time of the
+    exchange, so a day whose first bars are missing keeps the same bins. Each bin takes
+    the first open, the highest high, the lowest low, the last close and the summed
+    volume of its bars. Bins without bars are left out. The aggregation runs with one
+    reduceat per column over the sorted bars.
+
+    Parameters
+    ----------
+    df : DataFrame
+        The finer bars, indexed by date, with the TICKER_open, high, low, close
+        and volume columns.
+    ticker : str
+        The ticker symbol.
+    minutes : int
+        The length of the coarser bars, in minutes.
+    session_open : str, optional
+        The local time the session opens at, such as '10:00'. Defaults to midnight.
+
+    Returns
+    -------
+    DataFrame
+        The coarser bars, indexed by the start of their bins, with the same columns.
+    """
+    df = df.dropna()
+    columns = [ticker+'_close', ticker+'_open', ticker+'_high', ticker+'_low', ticker+'_volume']
+    if len(df) == 0:
+        return pd.DataFrame(columns=columns, index=pd.DatetimeIndex([], name='date'))
+    step = np.int64(minutes) * 60 * 10**9
+    day = np.int64(24 * 60) * 60 * 10**9
+    offset = np.int64(pd.Timedelta(session_open + ':00').value)
+    index = pd.DatetimeIndex(df.index)
+    if index.tz is None:
+        timestamps = local = _nanoseconds(index)
+    else:
+        timestamps = _nanoseconds(index.tz_convert(None))
+        local = _nanoseconds(index.tz_localize(None))
+    opens = local - local % day + offset
+    bins = timestamps - (local - opens) % step
+    starts = np.flatnonzero(np.r_[True, bins[1:] != bins[:-1]])
+    ends = np.r_[starts[1:], len(bins)] - 1
+    dates = pd.DatetimeIndex(bins[starts].view('datetime64[ns]'), name='date')
+    if index.tz is not None:
+        dates = dates.tz_localize('UTC').tz_convert(index.tz)
+    resampled = pd.DataFrame({
+        ticker+'_close': df[ticker+'_close'].to_numpy()[ends],
+        ticker+'_open': df[ticker+'_open'].to_numpy()[starts],
+        ticker+'_high': np.maximum.reduceat(df[ticker+'_high'].to_numpy(), starts),
+        ticker+'_low': np.minimum.reduceat(df[ticker+'_low'].to_numpy(), starts),
+        ticker+'_volume': np.add.reduceat(df[ticker+'_volume'].to_numpy(), starts),
+    }, index=dates)
+    return resampled
@@ -0,0 +1,383 @@
+import threading
+from collections import deque
+import numpy as np
+import pandas as pd
+
+
+class SeriesStore:
+    """
+    A columnar store that keeps every column as its own date-indexed Series.
+
+    Writing a column only touches that column, instead of re-aligning a wide
+    DataFrame with every stored ticker. The wide DataFrame is assembled on
+    demand from the requested columns only, or lazily for the whole store.
+
+    Writers are serialized by a lock. Every write replaces a column with a new
+    Series in a single assignment, so readers never see a half-written column
+    and do not need the lock.
+
+    In compact mode, raw prices are kept as float32 and volumes as the smallest
+    unsigned integer type that holds them, and columns written together with the same
+    dates share a single date index. Assembled DataFrames are still float64.
+
+    The columns of every ticker and their sizes are indexed as they are written, so
+    the memory used by a ticker is known without scanning the stored columns.
+    """
+
+    change_log_size = 32
+
+    def __init__(self, compact: bool = False) -> None:
+        """
+        Parameters
+        ----------
+        compact : bool, optional
+            If True, raw columns are stored with compact dtypes.
+        """
+        self.compact = compact
+        self._series = {}
+        self._frame = None
+        self._versions = {}
+        self._changes = {}
+        self._clock = 0
+        self._tickers = {}
+        self._lock = threading.RLock()
+
+    def __contains__(self, column):
+        return column in self._series
+
+    def __len__(self):
+        return len(self._series)
+
+    @property
+    def columns(self):
+        """
+        Returns the names of the stored columns.
+
+        Returns
+        -------
+        list
+            The stored column names.
+        """
+        return list(self._series.keys())
+
+    @staticmethod
+    def _column_ticker(column):
+        """
+        Returns the ticker of a raw TICKER_field or transformed PREFIX_TICKER_field column.
+        """
+        parts = column.split('_')
+        if len(parts) == 3:
+            return parts[1]
+        return parts[0]
+
+    def _index_column(self, column, series):
+        """
+        Records the size of a column in the index of its ticker, or removes it if series is None.
+        """
+        ticker = self._column_ticker(column)
+        if series is not None:
+            self._tickers.setdefault(ticker, {})[column] = int(series.memory_usage(index=True))
+            return
+        columns = self._tickers.get(ticker)
+        if columns is not None:
+            columns.pop(column, None)
+            if len(columns) == 0:
+                del self._tickers[ticker]
+
+    def ticker_columns(self, ticker):
+        """
+        Returns the raw and transformed columns of a ticker.
+
+        Parameters
+        ----------
+        ticker : str
+            The ticker symbol.
+
+        Returns
+        -------
+        list
+            The column names, raw columns first.
+        """
+        with self._lock:
+            columns = list(self._tickers.get(ticker, ()))
+        return sorted(columns, key=lambda column: len(column.split('_')) != 2)
+
+    def ticker_bytes(self, ticker):
+        """
+        Returns the bytes used by the columns of a ticker, including their dates.
+
+        Parameters
+        ----------
+        ticker : str
+            The ticker symbol.
+
+        Returns
+        -------
+        int
+            The bytes used.
+        """
+        with self._lock:
+            return sum(self._tickers.get(ticker, {}).values())
+
+    def version(self, column):
+        """
+        Returns the version of a column, which changes every time the column is written or removed.
+
+        Versions come from a counter that is never reset, so a column that is removed and
+        stored again never gets back a version it had before.
+
+        Parameters
+        ----------
+        column : str
+            The column name.
+
+        Returns
+        -------
+        int or None
+            The current version, or None if the column was never stored.
+        """
+        return self._versions.get(column)
+
+    def first_change(self, column, version):
+        """
+        Returns the first date whose value changed since a given version of a column.
+
+        Parameters
+        ----------
+        column : str
+            The column name.
+        version : int
+            A version previously returned by version.
+
+        Returns
+        -------
+        Timestamp or None
+            The earliest date written with a different value after that version,
+            Timestamp.max if no value changed, or None if the version is too old to tell.
+        """
+        first = pd.Timestamp.max
+        found = False
+        with self._lock:
+            changes = list(self._changes.get(column, ()))
+        for change_version, change_date in changes:
+            if change_version == version:
+                found = True
+            elif change_version > version:
+                first = min(first, change_date)
+        return first if found else None
+
+    def _touch(self, column, first=pd.Timestamp.min):
+        """
+        Gives a new version to a column and logs the first date it changed.
+        """
+        self._clock += 1
+        self._versions[column] = self._clock
+        if column not in self._changes:
+            self._changes[column] = deque(maxlen=self.change_log_size)
+        self._changes[column].append((self._clock, first))
+
+    @staticmethod
+    def _first_difference(stored, series):
+        """
+        Returns the first date of a new series whose value differs from the stored one.
+        """
+        if len(series) == 0:
+            return pd.Timestamp.max
+        changed = (stored.reindex(series.index) != series).to_numpy()
+        if not changed.any():
+            return pd.Timestamp.max
+        return series.index[changed.argmax()]
+
+    @staticmethod
+    def _clean(series):
+        """
+        Drops missing values and duplicated dates and sorts a Series by date.
+        """
+        if series.hasnans:
+            series = series.dropna()
+        if not series.index.is_unique:
+            series = series[~series.index.duplicated(keep='last')]
+        if not series.index.is_monotonic_increasing:
+            series = series.sort_index()
+        return series
+
+    def set_compact(self, compact):
+        """
+        Switches the compact mode on or off, converting the stored columns.
+
+        Parameters
+        ----------
+        compact : bool
+            If True, raw columns are stored with compact dtypes, otherwise as float64.
+        """
+        with self._lock:
+            if compact == self.compact:
+                return
+            self.compact = compact
+            self.put({column: self.conform(column, series)
+                      for column, series in self._series.items()}, replace=True)
+
+    def conform(self, column, series):
+        """
+        Converts a Series to the dtype the storage keeps for a column.
+
+        Parameters
+        ----------
+        column : str
+            The column name.
+        series : Series
+            The values to convert.
+
+        Returns
+        -------
+        Series
+            The converted values, or the same Series if nothing changes.
+        """
+        parts = column.split('_')
+        if len(parts) != 2:
+            return series
+        if not self.compact:
+            return series.astype('float64', copy=False)
+        if parts[1] == 'volume':
+            values = series.to_numpy(dtype='float64')
+            if len(values) > 0 and values.min() >= 0 and np.array_equal(values, np.floor(values)):
+                return pd.to_numeric(series, downcast='unsigned')
+        return series.astype('float32', copy=False)
+
+    def put(self, df, replace=False):
+        """
+        Stores the columns of a DataFrame.
+
+        New columns are added as they are. Columns already stored are spliced, with
+        the new values taking priority on the dates they cover.
+
+        Parameters
+        ----------
+        df : DataFrame or dict
+            The data to store, indexed by date. A dictionary of Series is stored without
+            assembling a DataFrame, so Series that are already clean are kept as they are.
+        replace : bool, optional
+            If True, stored columns are replaced instead of spliced.
+        """
+        with self._lock:
+            indexes = []
+            for column, series in df.items():
+                series = self._clean(series)
+                if self.compact:
+                    series = self.conform(column, series)
+                stored = None if replace else self._series.get(column)
+                first = pd.Timestamp.min
+                if stored is not None:
+                    first = self._first_difference(stored, series)
+                    series = self._clean(series.combine_first(stored))
+                    if self.compact:
+                        series = self.conform(column, series)
+                if self.compact:
+                    for index in indexes:
+                        if index is not series.index and index.equals(series.index):
+                            series = pd.Series(series.to_numpy(), index=index)
+                            break
+                    else:
+                        indexes.append(series.index)
+                series.name = column
+                self._series[column] = series
+                self._index_column(column, series)
+                self._touch(column, first)
+            self._frame = None
+
+    def get_series(self, column):
+        """
+        Returns a single stored column.
+
+        Parameters
+        ----------
+        column : str
+            The column name.
+
+        Returns
+        -------
+        Series
+            The stored values, indexed by date.
+        """
+        return self._series[column]
+
+    def get(self, columns):
+        """
+        Assembles a DataFrame with the requested columns.
+
+        Parameters
+        ----------
+        columns : list
+            The column names to assemble.
+
+        Returns
+        -------
+        DataFrame
+            A DataFrame indexed by the union of the dates of the requested columns.
+
+        Raises
+        ------
+        KeyError
+            If a requested column is not stored.
+        """
+        series = [self._series[column] for column in columns]
+        if len(series) == 0:
+            return pd.DataFrame()
+        df = pd.concat(series, axis=1)
+        if self.compact:
+            df = df.astype('float64')
+        df.index.name = 'date'
+        return df
+
+    def drop(self, columns):
+        """
+        Removes the given columns, ignoring the ones that are not stored.
+
+        Parameters
+        ----------
+        columns : list
+            The column names to remove.
+        """
+        with self._lock:
+            for column in columns:
+                if self._series.pop(column, None) is not None:
+                    self._index_column(column, None)
+                    self._touch(column)
+            self._frame = None
+
+    def clear(self):
+        """
+        Removes every stored column.
+        """
+        with self._lock:
+            for column in self._series:
+                self._touch(column)
+            self._series = {}
+            self._tickers = {}
+            self._frame = None
+
+    @property
+    def frame(self):
+        """
+        Returns a wide DataFrame with every stored column, built on first access.
+
+        The frame is built outside the lock and tagged with the clock of the store. It is
+        only cached if no column was written meanwhile, so a frame built before a write is
+        never kept after it.
+
+        Returns
+        -------
+        DataFrame
+            The wide DataFrame, indexed by the union of all dates.
+        """
+        with self._lock:
+            cached = self._frame
+            clock = self._clock
+            columns = self.columns
+        if cached is not None and cached[0] == clock:
+            return cached[1]
+        frame = self.get(columns)
+        with self._lock:
+            if self._clock == clock:
+                self._frame = (clock, frame)
+        return frame
@@ -0,0 +1,230 @@
+import os
+import json
+import glob
+import tempfile
+import threading
+import numpy as np
+import pandas as pd
+from .persistent_store import replace_file, file_lock
+
+
+class SharedStore:
+    """
+    A read-only data plane that lets several processes share the series of one loader.
+
+    The loader process publishes its raw columns into two flat arrays, one with the
+    values of every column and one with their dates, written as ``.npy`` files next
+    to an ``index.json`` file. The index maps every column to the offset and length
+    of its segment, and every ticker to the date ranges it covers. Columns of a ticker
+    that share the same dates also share the same date segment.
+
+    Worker processes attach to the same directory and memory-map both arrays, so the
+    series they read are views of the pages kept by the operating system, instead of
+    one copy per process. By default the directory lives in ``/dev/shm`` when it exists.
+
+    Every publication writes a new generation of the arrays and then replaces the
+    index, so workers that mapped the previous generation keep a valid mapping until
+    they refresh. Files are written through uniquely named temporary files, and a
+    publication holds a lock file of the directory, so two publishers never pick the
+    same generation.
+    """
+
+    INDEX_NAME = 'index.json'
+    LOCK_NAME = 'publish.lock'
+
+    def __init__(self, path: str = None) -> None:
+        """
+        Parameters
+        ----------
+        path : str, optional
+            The directory shared by the processes. It is created if missing.
+        """
+        if path is None:
+            root = '/dev/shm' if os.path.isdir('/dev/shm') else tempfile.gettempdir()
+            path = os.path.join(root, 'database_shared')
+        self.path = os.path.abspath(path)
+        os.makedirs(self.path, exist_ok=True)
+        self._index = None
+        self._arrays = {}
+        self._index_mtime = None
+        self._lock = threading.RLock()
+
+    def _array_path(self, name, generation):
+        return os.path.join(self.path, '{}-{}.npy'.format(name, generation))
+
+    def refresh(self):
+        """
+        Maps the latest published generation if the index changed since the last call.
+
+        Returns
+        -------
+        bool
+            True if a published generation is mapped, False if nothing was published yet.
+        """
+        index_path = os.path.join(self.path, self.INDEX_NAME)
+        with self._lock:
+            try:
+                mtime = os.stat(index_path).st_mtime_ns
+            except FileNotFoundError:
+                return False
+            if mtime == self._index_mtime:
+                return True
+            try:
+                with open(index_path) as file:
+                    index = json.load(file)
+                arrays = {name: np.load(self._array_path(name, index['generation']), mmap_mode='r')
+                          for name in ['values', 'dates']}
+            except (FileNotFoundError, ValueError):
+                return self._index is not None
+            self._index = index
+            self._arrays = arrays
+            self._index_mtime = mtime
+            return True
+
+    def get_ranges(self, ticker, interval='1d'):
+        """
+        Returns the date ranges published for a ticker.
+
+        Parameters
+        ----------
+        ticker : str
+            The ticker symbol.
+        interval : str, optional
+            The data interval. Defaults to '1d'.
+
+        Returns
+        -------
+        list of tuple or None
+            The fetched (start, close) pairs, or None if the ticker is not published.
+        """
+        if not self.refresh():
+            return None
+        entry = self._index['tickers'].get(interval, {}).get(ticker)
+        if entry is None:
+            return None
+        return [(pd.to_datetime(start), pd.to_datetime(close))
+                for start, close in entry['ranges']]
+
+    def load(self, ticker, interval='1d', open_date=None, close_date=None):
+        """
+        Loads the columns published for a ticker without copying them.
+
+        The date range is located with a binary search on the date segment of every
+        column, so only the offsets of the requested rows are computed.
+
+        Parameters
+        ----------
+        ticker : str
+            The ticker symbol.
+        interval : str, optional
+            The data interval. Defaults to '1d'.
+        open_date : datetime, optional
+            The first date to load. Defaults to the first published date.
+        close_date : datetime, optional
+            The last date to load. Defaults to the last published date.
+
+        Returns
+        -------
+        dict or None
+            A dictionary mapping every column to a read-only Series indexed by date,
+            or None if the ticker is not published.
+        """
+        if not self.refresh():
+            return None
+        with self._lock:
+            index = self._index
+            arrays = self._arrays
+        entry = index['tickers'].get(interval, {}).get(ticker)
+        if entry is None:
+            return None
+        columns = {}
+        dates = {}
+        for column in entry['columns']:
+            offset, length, dates_offset = index['columns'][interval][column]
+            if dates_offset not in dates:
+                segment = arrays['dates'][dates_offset:dates_offset+length]
+                start, stop = 0, length
+                if open_date is not None:
+                    start = np.searchsorted(segment, pd.to_datetime(open_date).value, side='left')
+                if close_date is not None:
+                    stop = np.searchsorted(segment, pd.to_datetime(close_date).value, side='right')
+                dates[dates_offset] = (start, pd.DatetimeIndex(
+                    segment[start:stop].view('datetime64[ns]'), name='date'))
+            start, dates_index = dates[dates_offset]
+            values = arrays['values'][offset+start:offset+start+len(dates_index)]
+            columns[column] = pd.Series(values, index=dates_index, name=column, copy=False)
+        return columns
+
+    def _read_index(self):
+        try:
+            with open(os.path.join(self.path, self.INDEX_NAME)) as file:
+                return json.load(file)
+        except (FileNotFoundError, ValueError):
+            return {}
+
+    @staticmethod
+    def _write_array(file_path, array):
+        replace_file(file_path, lambda file: np.save(file, array))
+
+    def _remove_old_generations(self, generation):
+        """
+        Removes the arrays of the previous generations. Processes that still map them keep
+        their mapping, since the pages are only released once every mapping is closed.
+        """
+        for name in ['values', 'dates']:
+            for file_path in glob.glob(os.path.join(self.path, name + '-*.npy')):
+                if file_path == self._array_path(name, generation):
+                    continue
+                try:
+                    os.remove(file_path)
+                except OSError:
+                    pass
+
+    def publish(self, frames):
+        """
+        Publishes a new generation with the given tickers, replacing the previous one.
+
+        Parameters
+        ----------
+        frames : dict
+            A dictionary mapping interval -> ticker -> (columns, ranges), where columns maps
+            the column names to date-indexed Series and ranges is the list of fetched
+            (start, close) pairs.
+        """
+        with self._lock, file_lock(os.path.join(self.path, self.LOCK_NAME)):
+            generation = self._read_index().get('generation', 0) + 1
+            tickers = {}
+            layout = {}
+            values = []
+            dates = []
+            values_size = 0
+            dates_size = 0
+            for interval, interval_frames in frames.items():
+                tickers[interval] = {}
+                layout[interval] = {}
+                for ticker, (columns, ranges) in interval_frames.items():
+                    last_index = None
+                    for column, series in columns.items():
+                        if last_index is None or not series.index.equals(last_index):
+                            last_index = series.index
+                            dates_offset = dates_size
+                            dates.append(pd.DatetimeIndex(series.index).values
+                                         .astype('datetime64[ns]').view('int64'))
+                            dates_size += len(series)
+                        values.append(series.to_numpy(dtype='float64'))
+                        layout[interval][column] = [values_size, len(series), dates_offset]
+                        values_size += len(series)
+                    tickers[interval][ticker] = {
+                        'ranges': [[pd.to_datetime(start).isoformat(),
+                                    pd.to_datetime(close).isoformat()]
+                                   for start, close in ranges],
+                        'columns': list(columns.keys()),
+                    }
+            self._write_array(self._array_path('values', generation),
+                              np.concatenate(values) if values else np.empty(0))
+            self._write_array(self._array_path('dates', generation),
+                              np.concatenate(dates) if dates else np.empty(0, dtype='int64'))
+            index = {'generation': generation, 'tickers': tickers, 'columns': layout}
+            replace_file(os.path.join(self.path, self.INDEX_NAME),
+                         lambda file: json.dump(index, file), mode='w')
+            self._remove_old_generations(generation)
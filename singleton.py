@@ -1,9 +1,16 @@
+import threading
+
+
 class Singleton(type):
     """
     A metaclass that implements the Singleton design pattern.
+
+    The instance is created under a lock, so threads that instantiate the class
+    at the same time all get the same object.
     """
 
     _instances = {}
+    _lock = threading.RLock()
 
     def __call__(cls, *args, **kwargs):
         """
@@ -27,5 +34,7 @@ class Singleton(type):
             The single instance of the class.
         """
         if cls not in cls._instances:
-            cls._instances[cls] = super(Singleton, cls).__call__(*args, **kwargs)
+            with Singleton._lock:
+                if cls not in cls._instances:
+                    cls._instances[cls] = super(Singleton, cls).__call__(*args, **kwargs)
         return cls._instances[cls]
@@ -0,0 +1,195 @@
+import time
+import threading
+from .info import (SOURCE_MAX_FAILURES, SOURCE_SLOW_SECONDS, SOURCE_DEMOTION_SECONDS,
+                   SOURCE_LATENCY_SMOOTHING)
+
+TICKER_KINDS = {'price', 'currency', 'macro'}
+
+
+class DataSource:
+    """
+    Describes a backend the databases fetch series from.
+
+    A source declares the kinds of tickers it serves ('price', 'currency' or 'macro'),
+    optionally restricted to a set of tickers and of intervals, how it fetches them and
+    what it costs. Its fetch function is called as fetch(ticker, open_date, close_date,
+    interval) and returns the TICKER_field columns, or None if it has no data. A source
+    that can download many tickers in one call also gives a batch function, called as
+    batch(tickers, open_date, close_date, interval) and returning a dictionary with the
+    candles of every ticker found. An afetch coroutine, with the signature of fetch, lets
+    the asynchronous requests fetch without a thread.
+    """
+
+    def __init__(self, name: str, kinds, fetch, batch=None, afetch=None, tickers=None,
+                 intervals=('1d',), cost: float = 1.0, pool: str = None, limit: int = None) -> None:
+        """
+        Parameters
+        ----------
+        name : str
+            The unique name of the source.
+        kinds : collection
+            The kinds of tickers served: 'price', 'currency' and/or 'macro'.
+        fetch : callable
+            The function fetching a single ticker.
+        batch : callable, optional
+            The function fetching several tickers in one call.
+        afetch : coroutine function, optional
+            The asynchronous version of fetch.
+        tickers : collection, optional
+            The only tickers served. None means every ticker of its kinds.
+        intervals : collection, optional
+            The intervals served. None means every interval. Defaults to daily only.
+        cost : float, optional
+            The relative cost of a call. Cheaper sources are tried first.
+        pool : str, optional
+            The name of the concurrency pool of the fetch scheduler. Sources hitting the
+            same service share a pool. Defaults to the name of the source.
+        limit : int, optional
+            The maximum number of simultaneous calls of the pool.
+        """
+        unknown = set(kinds) - TICKER_KINDS
+        if len(unknown) > 0:
+            raise Exception("""Unknown ticker kinds {}!""".format(sorted(unknown)))
+        self.name = name
+        self.kinds = frozenset(kinds)
+        self.fetch = fetch
+        self.batch = batch
+        self.afetch = afetch
+        self.tickers = None if tickers is None else frozenset(tickers)
+        self.intervals = None if intervals is None else frozenset(intervals)
+        self.cost = cost
+        self.pool = name if pool is None else pool
+        self.limit = limit
+
+    def supports(self, kind, ticker, interval='1d'):
+        """
+        Returns True if the source serves a ticker at an interval.
+        """
+        return (kind in self.kinds
+                and (self.tickers is None or ticker in self.tickers)
+                and (self.intervals is None or interval in self.intervals))
+
+
+class SourceRouter:
+    """
+    Keeps the registered sources and picks, for every ticker, the order they are tried in.
+
+    Sources are ordered by cost and then by their smoothed latency per ticker. A source
+    that fails SOURCE_MAX_FAILURES times in a row, or whose latency exceeds
+    SOURCE_SLOW_SECONDS, is demoted for SOURCE_DEMOTION_SECONDS: it is still used as a
+    fallback, but only after every healthy source. Once the demotion expires, its next
+    call decides whether it stays healthy.
+    """
+
+    def __init__(self) -> None:
+        self._sources = {}
+        self._health = {}
+        self._lock = threading.Lock()
+
+    def register(self, source):
+        """
+        Registers a source, replacing the one with the same name.
+
+        Parameters
+        ----------
+        source : DataSource
+            The source to register.
+        """
+        with self._lock:
+            self._sources[source.name] = source
+            self._health[source.name] = {'latency': None, 'failures': 0, 'calls': 0,
+                                         'errors': 0, 'demoted_until': 0.0}
+
+    def unregister(self, name):
+        """
+        Removes a source, ignoring it if it is not registered.
+
+        Parameters
+        ----------
+        name : str
+            The name of the source.
+        """
+        with self._lock:
+            self._sources.pop(name, None)
+            self._health.pop(name, None)
+
+    def route(self, kind, ticker, interval='1d'):
+        """
+        Returns the sources serving a ticker, in the order they should be tried.
+
+        Parameters
+        ----------
+        kind : str
+            The kind of the ticker: 'price', 'currency' or 'macro'.
+        ticker : str
+            The ticker symbol.
+        interval : str, optional
+            The data interval. Defaults to '1d'.
+
+        Returns
+        -------
+        list of DataSource
+            The healthy sources by cost and latency, followed by the demoted ones.
+        """
+        now = time.monotonic()
+        with self._lock:
+            candidates = []
+            for position, source in enumerate(self._sources.values()):
+                if not source.supports(kind, ticker, interval):
+                    continue
+                health = self._health[source.name]
+                latency = health['latency'] if health['latency'] is not None else 0.0
+                candidates.append(((health['demoted_until'] > now, source.cost, latency, position),
+                                   source))
+        return [source for _, source in sorted(candidates, key=lambda candidate: candidate[0])]
+
+    def record(self, name, seconds, ok):
+        """
+        Updates the health of a source after a call.
+
+        Parameters
+        ----------
+        name : str
+            The name of the source.
+        seconds : float
+            The duration of the call per ticker.
+        ok : bool
+            False if the call raised an error.
+        """
+        with self._lock:
+            health = self._health.get(name)
+            if health is None:
+                return
+            health['calls'] += 1
+            if ok:
+                health['failures'] = 0
+                if health['latency'] is None:
+                    health['latency'] = seconds
+                else:
+                    health['latency'] += SOURCE_LATENCY_SMOOTHING * (seconds - health['latency'])
+            else:
+                health['errors'] += 1
+                health['failures'] += 1
+            slow = health['latency'] is not None and health['latency'] > SOURCE_SLOW_SECONDS
+            if health['failures'] >= SOURCE_MAX_FAILURES or slow:
+                health['demoted_until'] = time.monotonic() + SOURCE_DEMOTION_SECONDS
+                health['failures'] = 0
+                if slow:
+                    health['latency'] = None
+
+    def health(self):
+        """
+        Returns the health of every registered source.
+
+        Returns
+        -------
+        dict
+            For each source name, its smoothed 'latency' per ticker, its consecutive
+            'failures', its 'calls' and 'errors', and whether it is 'demoted'.
+        """
+        now = time.monotonic()
+        with self._lock:
+            return {name: {'latency': health['latency'], 'failures': health['failures'],
+                           'calls': health['calls'], 'errors': health['errors'],
+                           'demoted': health['demoted_until'] > now}
+                    for name, health in self._health.items()}
@@ -0,0 +1,141 @@
+from collections import deque
+import numpy as np
+
+
+class StreamingTransform:
+    """
+    The running state of a transformation, used to extend it when new bars are appended.
+
+    It keeps the last price, the last cumulative value and, for the volatility, the
+    returns of the current window with their running sum and sum of squares, so that
+    appending k bars costs O(k) instead of recomputing the whole history.
+    """
+
+    def __init__(self, transf: str, periods: int = None) -> None:
+        """
+        Parameters
+        ----------
+        transf : str
+            The transformation: 'RET', 'LRET', 'CRET', 'CLRET' or 'VOL'.
+        periods : int, optional
+            The rolling window of the volatility.
+        """
+        self.transf = transf
+        self.periods = periods
+        self.last_date = None
+        self.last_price = None
+        self.cumulated = 0.0
+        self.returns_count = 0
+        self.window = deque(maxlen=periods)
+        self.window_sum = 0.0
+        self.window_sum_squares = 0.0
+
+    @classmethod
+    def from_history(cls, transf, periods, prices, last_value):
+        """
+        Builds the state left by a full computation of a transformation.
+
+        Parameters
+        ----------
+        transf : str
+            The transformation.
+        periods : int or None
+            The rolling window of the volatility.
+        prices : Series
+            The close prices the transformation was computed from, without missing values.
+        last_value : float
+            The last transformed value.
+
+        Returns
+        -------
+        StreamingTransform
+            The state after the last price.
+        """
+        state = cls(transf, periods)
+        values = prices.to_numpy(dtype=float)
+        state.last_date = prices.index[-1]
+        state.last_price = values[-1]
+        state.returns_count = len(values) - 1
+        if transf == 'CRET':
+            state.cumulated = last_value + 1
+        elif transf == 'CLRET':
+            state.cumulated = last_value
+        elif transf == 'VOL':
+            tail = values[-(periods + 1):]
+            state.window.extend((tail[1:] - tail[:-1]) / tail[:-1])
+        return state
+
+    def copy(self):
+        """
+        Returns an independent copy of the state.
+        """
+        state = StreamingTransform(self.transf, self.periods)
+        state.__dict__.update(self.__dict__)
+        state.window = deque(self.window, maxlen=self.periods)
+        return state
+
+    def update(self, dates, prices):
+        """
+        Appends new prices and returns their transformed values.
+
+        Parameters
+        ----------
+        dates : DatetimeIndex
+            The dates of the new prices, all after last_date.
+        prices : ndarray
+            The new close prices.
+
+        Returns
+        -------
+        ndarray or None
+            The transformed values, or None if a return is not finite and the
+            transformation must be recomputed from the whole history instead.
+        """
+        output = np.empty(len(prices))
+        if self.transf == 'VOL':
+            window = np.asarray(self.window)
+            self.window_sum = window.sum()
+            self.window_sum_squares = (window ** 2).sum()
+        last_price = self.last_price
+        for i, price in enumerate(prices):
+            if self.transf in ('LRET', 'CLRET'):
+                daily_return = np.log(price / last_price)
+            else:
+                daily_return = (price - last_price) / last_price
+            if not np.isfinite(daily_return):
+                if self.transf == 'VOL':
+                    return None
+                daily_return = 0.0 if np.isnan(daily_return) else daily_return
+            last_price = price
+            self.returns_count += 1
+            if self.transf in ('RET', 'LRET'):
+                output[i] = daily_return
+            elif self.transf == 'CRET':
+                self.cumulated *= daily_return + 1
+                output[i] = self.cumulated - 1
+            elif self.transf == 'CLRET':
+                self.cumulated += daily_return
+                output[i] = self.cumulated
+            else:
+                output[i] = self._push(daily_return)
+        self.last_price = last_price
+        if len(dates) > 0:
+            self.last_date = dates[-1]
+        return output
+
+    def _push(self, daily_return):
+        """
+        Adds a return to the volatility window and returns the new volatility.
+        """
+        if len(self.window) == self.periods:
+            removed = self.window[0]
+            self.window_sum -= removed
+            self.window_sum_squares -= removed ** 2
+        self.window.append(daily_return)
+        self.window_sum += daily_return
+        self.window_sum_squares += daily_return ** 2
+        if self.returns_count < self.periods or self.periods < 2:
+            return np.nan
+        n = self.periods
+        variance = (self.window_sum_squares - self.window_sum ** 2 / n) / (n - 1)
+        return np.sqrt(max(variance, 0.0)) * (n ** 0.5)
@@ -0,0 +1,138 @@
+import queue
+import time
+import threading
+from .info import SUBSCRIPTION_QUEUE_SIZE
+
+
+class Subscription:
+    """
+    A set of tickers kept up to date at one interval by MultiFrameDatabase.
+
+    Every poll delivers, for each ticker, the bars newer than its last stored
+    timestamp, plus the last stored bar itself if it was still forming and changed.
+    They are passed to the registered callbacks and queued for stream. The queue keeps
+    at most SUBSCRIPTION_QUEUE_SIZE deliveries: when nobody reads it, the oldest ones
+    are dropped and counted in dropped, so a subscription used only through callbacks
+    does not grow without bound.
+    """
+
+    def __init__(self, tickers: list, interval: str, poll_every: float) -> None:
+        """
+        Parameters
+        ----------
+        tickers : list
+            The upper-cased ticker symbols.
+        interval : str
+            The data interval (e.g., '1m', '5m').
+        poll_every : float
+            The number of seconds between two polls.
+        """
+        self.tickers = tickers
+        self.interval = interval
+        self.poll_every = poll_every
+        self.next_poll = time.monotonic()
+        self.last_bar = {}
+        self.last_error = None
+        self.active = True
+        self.dropped = 0
+        self._callbacks = []
+        self._queue = queue.Queue(maxsize=SUBSCRIPTION_QUEUE_SIZE)
+        self._lock = threading.Lock()
+
+    def add_callback(self, callback):
+        """
+        Registers a function called with (ticker, bars) for every delivery.
+
+        Parameters
+        ----------
+        callback : callable
+            The function to call. It runs on the polling thread, so it should return quickly.
+        """
+        with self._lock:
+            self._callbacks.append(callback)
+
+    def remove_callback(self, callback):
+        """
+        Unregisters a callback, ignoring it if it was not registered.
+
+        Parameters
+        ----------
+        callback : callable
+            The function to remove.
+        """
+        with self._lock:
+            if callback in self._callbacks:
+                self._callbacks.remove(callback)
+
+    def publish(self, ticker, bars):
+        """
+        Delivers new bars to the callbacks and to the stream queue.
+
+        Parameters
+        ----------
+        ticker : str
+            The ticker symbol.
+        bars : DataFrame
+            The new bars, with the TICKER_close, open, high, low and volume columns.
+        """
+        with self._lock:
+            callbacks = list(self._callbacks)
+        for callback in callbacks:
+            try:
+                callback(ticker, bars)
+            except Exception as error:
+                self.last_error = error
+        self._enqueue((ticker, bars))
+
+    def _enqueue(self, item):
+        """
+        Puts an item in the stream queue, dropping the oldest deliveries while it is full.
+        Deliveries published after the subscription was cancelled are discarded, so the
+        end of the stream stays the last item.
+        """
+        with self._lock:
+            if item is not None and not self.active:
+                return
+            while True:
+                try:
+                    self._queue.put_nowait(item)
+                    return
+                except queue.Full:
+                    pass
+                try:
+                    self._queue.get_nowait()
+                    self.dropped += 1
+                except queue.Empty:
+                    pass
+
+    def cancel(self):
+        """
+        Stops the subscription and ends every running stream.
+        """
+        self.active = False
+        self._enqueue(None)
+
+    def stream(self, timeout: float = None):
+        """
+        Yields the new bars of every ticker as they arrive.
+
+        Parameters
+        ----------
+        timeout : float, optional
+            The maximum number of seconds to wait for a delivery. The stream ends when
+            it expires. By default it waits until the subscription is cancelled.
+
+        Yields
+        ------
+        tuple
+            The ticker symbol and a DataFrame with its new bars.
+        """
+        while self.active or not self._queue.empty():
+            try:
+                item = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                return
+            if item is None:
+                self._enqueue(None)
+                return
+            yield item
@@ -0,0 +1,31 @@
+import asyncio
+import threading
+from ..general_database import Database
+from ..benchmarks.backends import FakeBackend, patched
+
+BLOCKING = ['_plan_fetches', '_merge_outcomes', '_build_info', '_end_request']
+
+
+def test_aget_info_keeps_blocking_work_off_the_event_loop(monkeypatch):
+    database = Database()
+    database.disable_persistence()
+    database.reset()
+    threads = {}
+    for name in BLOCKING:
+        method = getattr(database, name)
+
+        def recorded(*args, _name=name, _method=method, **kwargs):
+            threads.setdefault(_name, set()).add(threading.get_ident())
+            return _method(*args, **kwargs)
+
+        monkeypatch.setattr(database, name, recorded)
+
+    async def request():
+        return threading.get_ident(), await database.aget_info(
+            ['PETR4', 'RET_VALE3', 'CDI'], '2024-01-02', '2024-03-01')
+
+    with patched(FakeBackend()):
+        loop_thread, df = asyncio.run(request())
+    assert sorted(df.columns) == ['CDI_close', 'PETR4_close', 'RET_VALE3_close']
+    assert sorted(threads) == sorted(BLOCKING)
+    assert all(loop_thread not in idents for idents in threads.values())
@@ -0,0 +1,37 @@
+import pandas as pd
+import pytest
+from ..general_database import Database
+from ..benchmarks.backends import FakeResponse
+
+OPEN_DATE = pd.Timestamp('2024-03-04')
+CLOSE_DATE = pd.Timestamp('2024-03-08')
+
+
+def test_parse_bcb_without_observations():
+    df = Database()._parse_bcb([], 'IPCA_close', OPEN_DATE, CLOSE_DATE)
+    assert list(df.columns) == ['IPCA_close']
+    assert len(df) == 0
+
+
+def test_parse_bcb_fills_up_to_close_date():
+    observations = [{'data': '01/03/2024', 'valor': '0.83'}]
+    df = Database()._parse_bcb(observations, 'IPCA_close', OPEN_DATE, CLOSE_DATE)
+    assert df.index[0] == OPEN_DATE and df.index[-1] == CLOSE_DATE
+    assert (df['IPCA_close'] == 0.83).all()
+
+
+def test_bcb_range_without_observations_is_empty(monkeypatch):
+    database = Database()
+    response = FakeResponse({'error': 'Value(s) not found'}, 404)
+    monkeypatch.setattr(database, '_http_get', lambda *args, **kwargs: response)
+    df = database._fetch_sgs('IPCA', OPEN_DATE, CLOSE_DATE)
+    assert len(df) == 0
+
+
+@pytest.mark.parametrize('response', [FakeResponse({'erro': {'message': 'invalid range'}}),
+                                      FakeResponse([], 500)])
+def test_bcb_error_response_raises(monkeypatch, response):
+    database = Database()
+    monkeypatch.setattr(database, '_http_get', lambda *args, **kwargs: response)
+    with pytest.raises(Exception, match='Download failed for IPCA'):
+        database._fetch_sgs('IPCA', OPEN_DATE, CLOSE_DATE)
@@ -0,0 +1,40 @@
+import os
+import json
+import threading
+from ..metadata_cache import MetadataCache
+from ..benchmarks.backends import FakeResponse
+
+
+def test_stale_entry_is_served_while_it_is_refreshed():
+    cache = MetadataCache(ttl=0)
+    assert cache.get('universe', lambda headers: FakeResponse(['PETR4'])) == ['PETR4']
+    served = []
+
+    def refresh(headers):
+        reader = threading.Thread(target=lambda: served.append(
+            cache.get('universe', lambda headers: FakeResponse(['unexpected']))))
+        reader.start()
+        reader.join(timeout=5)
+        return FakeResponse(['PETR4', 'VALE3'])
+
+    assert cache.get('universe', refresh) == ['PETR4', 'VALE3']
+    assert served == [['PETR4']]
+
+
+def test_concurrent_saves_keep_a_valid_file(tmp_path):
+    caches = [MetadataCache(str(tmp_path)) for _ in range(4)]
+
+    def save(cache, number):
+        for step in range(25):
+            cache.get('list-{}-{}'.format(number, step),
+                      lambda headers: FakeResponse([number, step]))
+
+    threads = [threading.Thread(target=save, args=(cache, number))
+               for number, cache in enumerate(caches)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    with open(os.path.join(str(tmp_path), MetadataCache.FILE_NAME)) as file:
+        assert isinstance(json.load(file), dict)
+    assert [name for name in os.listdir(str(tmp_path)) if name.endswith('.tmp')] == []
@@ -0,0 +1,18 @@
+import pandas as pd
+from ..database_components import DatabaseComponents
+from ..benchmarks.backends import FakeBackend, patched
+
+UNIVERSE = ['PETR4', 'VALE3', 'ITUB4', 'BOVA11', 'AAPL34']
+
+
+def test_get_most_traded_on_bare_components():
+    components = DatabaseComponents()
+    components.configure_metadata()
+    backend = FakeBackend(universe=UNIVERSE)
+    with patched(backend):
+        stocks = components.get_most_traded('stocks', pd.Timestamp('2024-06-03'), 30)
+        downloads = backend.calls['download']
+        assert components.get_most_traded('stocks', pd.Timestamp('2024-06-03'), 30) == stocks
+        assert backend.calls['download'] == downloads
+        assert components.get_most_traded('etfs', pd.Timestamp('2024-06-03'), 30) == ['BOVA11']
+    assert sorted(stocks) == ['ITUB4', 'PETR4', 'VALE3']
@@ -0,0 +1,45 @@
+import multiprocessing
+import numpy as np
+import pandas as pd
+from ..persistent_store import PersistentStore
+
+
+def _frame(start, periods=50):
+    dates = pd.date_range(start, periods=periods, name='date')
+    ordinals = np.array([date.toordinal() for date in dates], dtype='float64')
+    return pd.DataFrame({'PETR4_close': ordinals, 'PETR4_open': ordinals}, index=dates)
+
+
+def _save(path, saves):
+    store = PersistentStore(path)
+    for number in range(saves):
+        df = _frame(pd.Timestamp('2020-01-01') + pd.Timedelta(days=number))
+        store.save('PETR4', df, [(df.index[0], df.index[-1])])
+
+
+def test_load_never_pairs_the_index_of_one_save_with_columns_of_another(tmp_path):
+    path = str(tmp_path)
+    _save(path, 1)
+    writer = multiprocessing.Process(target=_save, args=(path, 200))
+    writer.start()
+    loads = 0
+    while writer.is_alive():
+        df = PersistentStore(path).load('PETR4')
+        if df is None:
+            continue
+        ordinals = [date.toordinal() for date in df.index]
+        assert df['PETR4_close'].tolist() == ordinals
+        assert df['PETR4_open'].tolist() == ordinals
+        loads += 1
+    writer.join()
+    assert writer.exitcode == 0 and loads > 0
+
+
+def test_save_replaces_the_previous_generation(tmp_path):
+    store = PersistentStore(str(tmp_path))
+    store.save('PETR4', _frame('2020-01-01'), [('2020-01-01', '2020-02-19')])
+    first = store.manifest['1d']['PETR4']['generation']
+    store.save('PETR4', _frame('2020-01-01', 60), [('2020-01-01', '2020-02-29')])
+    assert store.manifest['1d']['PETR4']['generation'] != first
+    assert len(PersistentStore(str(tmp_path)).load('PETR4')) == 60
+    assert not (tmp_path / '1d' / 'PETR4' / first).exists()
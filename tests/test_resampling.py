@@ -0,0 +1,50 @@
+import numpy as np
+import pandas as pd
+import pytest
+from ..resampling import resample_ohlcv
+
+TICKER = 'SPX'
+
+
+def _bars(start, end, tz=None):
+    index = pd.date_range(start, end, freq='5min', tz=tz, name='date')
+    values = np.arange(len(index), dtype='float64')
+    return pd.DataFrame({TICKER+'_close': values, TICKER+'_open': values,
+                         TICKER+'_high': values + 1, TICKER+'_low': values - 1,
+                         TICKER+'_volume': np.ones(len(index))}, index=index)
+
+
+def _starts(resampled):
+    return [date.strftime('%H:%M') for date in resampled.index]
+
+
+def test_hourly_bars_of_a_session_opening_at_930():
+    resampled = resample_ohlcv(_bars('2024-03-04 09:30', '2024-03-04 15:55'), TICKER, 60, '09:30')
+    assert _starts(resampled) == ['09:30', '10:30', '11:30', '12:30', '13:30', '14:30', '15:30']
+    assert resampled[TICKER+'_volume'].tolist() == [12, 12, 12, 12, 12, 12, 6]
+    assert resampled[TICKER+'_open'].iloc[1] == 12 and resampled[TICKER+'_close'].iloc[0] == 11
+
+
+def test_missing_first_bar_keeps_the_session_bins():
+    bars = _bars('2024-03-04 10:00', '2024-03-04 11:55').drop(pd.Timestamp('2024-03-04 10:00'))
+    resampled = resample_ohlcv(bars, TICKER, 15, '10:00')
+    assert _starts(resampled) == ['10:00', '10:15', '10:30', '10:45', '11:00', '11:15',
+                                  '11:30', '11:45']
+    assert resampled[TICKER+'_volume'].iloc[0] == 2
+
+
+def test_timezone_aware_bars_keep_their_timezone():
+    bars = _bars('2024-03-04 09:30', '2024-03-05 15:55', tz='America/New_York')
+    bars = bars[(bars.index.hour * 60 + bars.index.minute >= 570) & (bars.index.hour < 16)]
+    resampled = resample_ohlcv(bars, TICKER, 90, '09:30')
+    assert str(resampled.index.tz) == 'America/New_York'
+    assert _starts(resampled)[:5] == ['09:30', '11:00', '12:30', '14:00', '15:30']
+    assert len(resampled) == 10
+
+
+@pytest.mark.skipif(not hasattr(pd.DatetimeIndex, 'as_unit'), reason='needs non-nanosecond indexes')
+def test_microsecond_resolution():
+    bars = _bars('2024-03-04 10:00', '2024-03-04 10:55')
+    bars.index = bars.index.as_unit('us')
+    resampled = resample_ohlcv(bars, TICKER, 30, '10:00')
+    assert list(resampled.index) == [pd.Timestamp('2024-03-04 10:00'), pd.Timestamp('2024-03-04 10:30')]
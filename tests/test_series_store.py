@@ -0,0 +1,29 @@
+import pandas as pd
+from ..series_store import SeriesStore
+
+DATES = pd.date_range('2024-01-01', periods=3, name='date')
+
+
+def test_frame_built_before_a_write_is_not_cached():
+    store = SeriesStore()
+    store.put(pd.DataFrame({'PETR4_close': [1.0, 2.0, 3.0]}, index=DATES))
+    get = store.get
+
+    def get_then_write(columns):
+        frame = get(columns)
+        store.put(pd.DataFrame({'VALE3_close': [4.0, 5.0, 6.0]}, index=DATES))
+        return frame
+
+    store.get = get_then_write
+    assert list(store.frame.columns) == ['PETR4_close']
+    store.get = get
+    assert sorted(store.frame.columns) == ['PETR4_close', 'VALE3_close']
+
+
+def test_frame_is_cached_until_the_next_write():
+    store = SeriesStore()
+    store.put(pd.DataFrame({'PETR4_close': [1.0, 2.0, 3.0]}, index=DATES))
+    assert store.frame is store.frame
+    frame = store.frame
+    store.put(pd.DataFrame({'PETR4_close': [1.0, 2.0, 4.0]}, index=DATES))
+    assert store.frame is not frame and store.frame['PETR4_close'].iloc[-1] == 4.0
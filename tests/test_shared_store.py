@@ -0,0 +1,29 @@
+import os
+import multiprocessing
+import numpy as np
+import pandas as pd
+from ..shared_store import SharedStore
+
+DATES = pd.date_range('2024-01-01', periods=5, name='date')
+
+
+def _publish(path, number):
+    store = SharedStore(path)
+    for step in range(10):
+        column = pd.Series(np.full(len(DATES), float(number)), index=DATES)
+        store.publish({'1d': {'PETR4': ({'PETR4_close': column}, [(DATES[0], DATES[-1])])}})
+
+
+def test_concurrent_publishers_leave_a_consistent_generation(tmp_path):
+    path = str(tmp_path)
+    processes = [multiprocessing.Process(target=_publish, args=(path, number))
+                 for number in range(4)]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join()
+        assert process.exitcode == 0
+    columns = SharedStore(path).load('PETR4')
+    assert len(set(columns['PETR4_close'])) == 1
+    assert [name for name in os.listdir(path) if name.endswith('.tmp')] == []
+    assert len([name for name in os.listdir(path) if name.startswith('values-')]) == 1